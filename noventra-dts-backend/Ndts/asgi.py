@@ -2,15 +2,62 @@
 ASGI config for Ndts project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP goes to Django; WebSocket connections go to the accounts session event endpoint.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
 
+import logging
 import os
 
 from django.core.asgi import get_asgi_application
+from django.core.exceptions import ImproperlyConfigured
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Ndts.settings')
+# settings default CONN_MAX_AGE to 0 (no persistent connections) under ASGI
+os.environ.setdefault('NDTS_ASGI', '1')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# imported after setup: the websocket app touches models
+from accounts.events import require_cross_process_broker  # noqa: E402
+from accounts.ws import auth_events_app  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+_broker_error = None
+_broker_checked = False
+
+
+def _websocket_broker_error():
+    """
+    Sockets here must see revocations published by other (WSGI) processes. Checked on the
+    first WebSocket, not at import, so HTTP keeps being served with an in-process broker.
+    """
+    global _broker_error, _broker_checked
+    if not _broker_checked:
+        try:
+            require_cross_process_broker()
+        except ImproperlyConfigured as exc:
+            _broker_error = str(exc)
+            logger.error("refusing WebSocket connections: %s", exc)
+        _broker_checked = True
+    return _broker_error
+
+
+async def _refuse_websocket(receive, send):
+    # closing before accept makes the server answer the handshake with 403
+    message = await receive()
+    if message["type"] == "websocket.connect":
+        await send({"type": "websocket.close", "code": 1011})
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "websocket":
+        if _websocket_broker_error():
+            await _refuse_websocket(receive, send)
+            return
+        await auth_events_app(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +45,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # no-op unless PROFILING_ENABLED; first so captures cover the whole stack
+    "accounts.profiling.ProfilingMiddleware",
+    # no-op unless TRACING_ENABLED; root span per request (accounts/tracing.py)
+    "accounts.tracing.TracingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -80,6 +85,7 @@ CORS_ALLOW_HEADERS = [
     "x-csrftoken",
     "x-csrf-refresh",
     "x-requested-with",
+    "x-profile",
     # ... any custom headers you use
 ]
 
@@ -96,6 +102,20 @@ REST_FRAMEWORK = {
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # orjson-backed when installed, stdlib json otherwise (see accounts/renderers.py)
+    "DEFAULT_RENDERER_CLASSES": (
+        "accounts.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "accounts.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
+    # per client IP (or user); "health" covers the public /api/auth/health/db/ probe
+    "DEFAULT_THROTTLE_RATES": {
+        "health": os.environ.get("NDTS_HEALTH_THROTTLE_RATE", "60/min"),
+    },
 }
 
 SPECTACULAR_SETTINGS = {
@@ -122,6 +142,38 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'Ndts.wsgi.application'
+ASGI_APPLICATION = 'Ndts.asgi.application'
+
+# Session push channel (ws /ws/auth/events/). Use "accounts.events.RedisBroker" with
+# ACCOUNTS_EVENT_REDIS_URL whenever WSGI workers or more than one ASGI worker publish events;
+# Ndts/asgi.py refuses WebSockets (HTTP is still served) with the in-process broker unless
+# ACCOUNTS_EVENT_BROKER_ALLOW_IN_PROCESS says one ASGI process serves all traffic.
+ACCOUNTS_EVENT_BROKER = os.environ.get("NDTS_EVENT_BROKER", "accounts.events.InProcessBroker")
+ACCOUNTS_EVENT_BROKER_ALLOW_IN_PROCESS = os.environ.get("NDTS_EVENT_BROKER_ALLOW_IN_PROCESS", "") == "1"
+ACCOUNTS_EVENT_REDIS_URL = os.environ.get("NDTS_EVENT_REDIS_URL", "redis://localhost:6379/0")
+
+# Segmented audit store (accounts/audit_store.py); run `manage.py accounts_audit --seal --prune` from cron
+AUDIT_STORE_DIR = os.environ.get("NDTS_AUDIT_STORE_DIR", str(BASE_DIR / "var" / "audit"))
+AUDIT_SEGMENT_HOURS = 24
+AUDIT_RETENTION_DAYS = 365
+
+# Tracing (accounts/tracing.py): spans for tokens, access checks, session middleware, cache
+# and SQL, head-sampled per request. Off = no instrumentation installed.
+TRACING_ENABLED = os.environ.get("NDTS_TRACING", "") == "1"
+TRACING_SAMPLE_RATE = float(os.environ.get("NDTS_TRACING_SAMPLE_RATE", "0.01"))
+TRACING_EXPORTER = os.environ.get("NDTS_TRACING_EXPORTER", "accounts.tracing.NDJSONExporter")
+TRACING_NDJSON_PATH = os.environ.get("NDTS_TRACING_PATH", str(BASE_DIR / "var" / "traces.ndjson"))
+TRACING_NDJSON_MAX_BYTES = 256 * 1024 * 1024
+# IPs / CIDRs (e.g. the upstream gateway) whose `traceparent` sampled flag is honoured;
+# everyone else is head-sampled at TRACING_SAMPLE_RATE regardless of the header
+TRACING_TRUSTED_SOURCES = [t.strip() for t in os.environ.get("NDTS_TRACING_TRUSTED_SOURCES", "").split(",") if t.strip()]
+
+# Opt-in request profiling (accounts/profiling.py); see `manage.py accounts_profiling`
+PROFILING_ENABLED = os.environ.get("NDTS_PROFILING", "") == "1"
+PROFILING_SAMPLE_RATE = float(os.environ.get("NDTS_PROFILING_SAMPLE_RATE", "0"))
+PROFILING_MODE = "cprofile"
+PROFILING_DIR = os.environ.get("NDTS_PROFILING_DIR", str(BASE_DIR / "var" / "profiles"))
+PROFILING_MAX_CAPTURES = 200
 
 
 # Database
@@ -134,7 +186,109 @@ DATABASES = {
     }
 }
 
+# Networked database (NDTS_DB_ENGINE=postgresql). Connection reuse:
+#  - NDTS_DB_POOL=1: bounded per-process psycopg pool (needs psycopg[pool]); checkouts wait
+#    at most NDTS_DB_POOL_TIMEOUT seconds. Use this under threaded/ASGI servers.
+#  - otherwise persistent per-thread connections, health-checked before reuse: CONN_MAX_AGE
+#    defaults to 60 s under WSGI (and for commands) and to 0 under ASGI, where Django advises
+#    against persistent connections (Ndts/asgi.py sets NDTS_ASGI=1 before settings load).
+#    NDTS_DB_CONN_MAX_AGE=<seconds> overrides either default.
+# Pool and connection metrics: GET /api/auth/health/db/ (see accounts/dbpool.py), probed at
+# most every DB_HEALTH_CHECK_CACHE_SECONDS per process.
+if os.environ.get("NDTS_DB_ENGINE") == "postgresql":
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get("NDTS_DB_NAME", "ndts"),
+        'USER': os.environ.get("NDTS_DB_USER", "ndts"),
+        'PASSWORD': os.environ.get("NDTS_DB_PASSWORD", ""),
+        'HOST': os.environ.get("NDTS_DB_HOST", "localhost"),
+        'PORT': os.environ.get("NDTS_DB_PORT", "5432"),
+        'OPTIONS': {},
+    }
+    if os.environ.get("NDTS_DB_POOL") == "1":
+        from psycopg_pool import ConnectionPool
+
+        DATABASES['default']['OPTIONS']['pool'] = {
+            "min_size": int(os.environ.get("NDTS_DB_POOL_MIN", "2")),
+            "max_size": int(os.environ.get("NDTS_DB_POOL_MAX", "10")),
+            "timeout": float(os.environ.get("NDTS_DB_POOL_TIMEOUT", "5")),
+            # health check on checkout (the pool's equivalent of CONN_HEALTH_CHECKS)
+            "check": ConnectionPool.check_connection,
+        }
+
+# pooled connections must not also be persistent
+_DB_POOLED = "pool" in DATABASES['default'].get('OPTIONS', {})
+_DB_ASGI = os.environ.get("NDTS_ASGI") == "1"
+DATABASES['default']['CONN_MAX_AGE'] = (
+    0 if _DB_POOLED else int(os.environ.get("NDTS_DB_CONN_MAX_AGE", "0" if _DB_ASGI else "60"))
+)
+DATABASES['default']['CONN_HEALTH_CHECKS'] = not _DB_POOLED
+DB_HEALTH_CHECK_CACHE_SECONDS = 5
+
+# Read replicas for read-only auth endpoints (accounts/db_router.py). Each replica copies the
+# primary's settings with its own HOST (Postgres) or NAME (SQLite, for local testing; it may
+# point at the primary's file). Tests mirror replicas to the primary.
+#   NDTS_DB_REPLICA_HOSTS=replica1.internal,replica2.internal
+#   NDTS_SQLITE_REPLICAS=/path/a.sqlite3,/path/b.sqlite3
+DATABASE_REPLICAS = []
+_replica_targets = (
+    os.environ.get("NDTS_DB_REPLICA_HOSTS", "") if DATABASES['default']['ENGINE'].endswith("postgresql")
+    else os.environ.get("NDTS_SQLITE_REPLICAS", "")
+)
+for _i, _target in enumerate(t.strip() for t in _replica_targets.split(",") if t.strip()):
+    _alias = f"replica{_i + 1}"
+    DATABASES[_alias] = {
+        **DATABASES['default'],
+        ("HOST" if DATABASES['default']['ENGINE'].endswith("postgresql") else "NAME"): _target,
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(_alias)
+
+# RefreshToken hash partitioning (accounts/sharding.py). Each extra shard copies the
+# primary's settings with its own HOST (Postgres) or NAME (SQLite); "default" stays shard 0.
+# Run `manage.py migrate --database rt_shardN` for new shards and
+# `manage.py accounts_rebalance_tokens` after changing the list. Read replicas only front
+# the unsharded table.
+#   NDTS_RT_SHARDS=rt-shard1.internal,rt-shard2.internal
+REFRESH_TOKEN_SHARDS = ["default"]
+_is_postgres = DATABASES['default']['ENGINE'].endswith("postgresql")
+for _i, _target in enumerate(t.strip() for t in os.environ.get("NDTS_RT_SHARDS", "").split(",") if t.strip()):
+    _alias = f"rt_shard{_i + 1}"
+    DATABASES[_alias] = {**DATABASES['default'], ("HOST" if _is_postgres else "NAME"): _target}
+    REFRESH_TOKEN_SHARDS.append(_alias)
+# pin buckets (0-255) to an alias while moving them, e.g. {17: "rt_shard2"}
+REFRESH_TOKEN_SHARD_MAP = {}
+# look up jtis that don't encode their shard (issued before sharding) on every shard
+REFRESH_TOKEN_JTI_FALLBACK = True
+
+DATABASE_ROUTERS = ["accounts.db_router.RefreshTokenShardRouter", "accounts.db_router.PrimaryReplicaRouter"]
+# seconds a user's reads stay on the primary after they write; keep above replica lag
+REPLICA_PIN_SECONDS = 5
+
+# SQLite production profile for single-node deployments (NDTS_SQLITE_PROFILE=production).
+# accounts/sqlite.py applies the profile PRAGMAs (WAL, synchronous=NORMAL, mmap/cache size)
+# per connection; set SQLITE_PRAGMAS to override them. Write transactions use BEGIN IMMEDIATE
+# so lock upgrades can't deadlock into "database is locked". SQLITE_BUSY_TIMEOUT (seconds) is
+# the only write-lock wait: it becomes OPTIONS["timeout"], so don't add busy_timeout to
+# SQLITE_PRAGMAS.
+SQLITE_PROFILE = os.environ.get("NDTS_SQLITE_PROFILE", "")
+SQLITE_SINGLE_WRITER = os.environ.get("NDTS_SQLITE_SINGLE_WRITER", "") == "1"
+SQLITE_BUSY_TIMEOUT = float(os.environ.get("NDTS_SQLITE_BUSY_TIMEOUT", "5"))
+if SQLITE_PROFILE == "production" and DATABASES['default']['ENGINE'].endswith("sqlite3"):
+    DATABASES['default']['OPTIONS'] = {
+        "transaction_mode": "IMMEDIATE",
+        "timeout": SQLITE_BUSY_TIMEOUT,
+    }
+
 AUTH_USER_MODEL = "accounts.User"
+# ModelBackend with the resolved permission set cached across requests (accounts/perm_cache.py).
+# Permission changes invalidate entries through the default cache, so PERM_CACHE_TTL only
+# applies with a shared cache (Redis / Memcached). With the per-process LocMemCache below,
+# entries live PERM_CACHE_LOCAL_TTL seconds: the longest other workers keep serving a
+# revoked permission.
+AUTHENTICATION_BACKENDS = ["accounts.perm_cache.CachedPermissionBackend"]
+PERM_CACHE_TTL = 3600
+PERM_CACHE_LOCAL_TTL = 30
 
 REQUIRE_EMAIL_VERIFICATION = False
 # Password validation
@@ -190,6 +344,31 @@ REFRESH_JTI_COOKIE_NAME = "refresh_jti"
 REFRESH_COOKIE_MAX_AGE = 60 * 60 * 24 * 30
 REFRESH_REQUIRE_CUSTOM_HEADER = True  # enable optional custom header check for refresh
 REFRESH_REQUIRED_HEADER_NAME = "X-CSRF-REFRESH"
+# "jwt": refresh JWT + refresh_jti cookies on path "/" (session checks on every request).
+# "opaque": one short random handle cookie sent only to REFRESH_HANDLE_COOKIE_PATH
+# (refresh and token/logout/), plus a copy (REFRESH_HANDLE_WS_COOKIE_NAME) for the session
+# event socket; refresh does one indexed lookup instead of a JWT decode. Session checks use
+# the access token's "sid" claim instead of the refresh_jti cookie.
+REFRESH_TOKEN_MODE = os.environ.get("NDTS_REFRESH_MODE", "jwt")
+REFRESH_HANDLE_COOKIE_NAME = "rh"
+REFRESH_HANDLE_COOKIE_PATH = "/api/auth/token/"
+REFRESH_HANDLE_WS_COOKIE_NAME = "rh_ws"
+
+# Internal introspection (accounts/introspection.py): {service name: key}, passed as
+# NDTS_INTROSPECTION_KEYS="ems:<key>,other:<key>". Empty disables the endpoint.
+INTROSPECTION_SERVICE_KEYS = dict(
+    item.split(":", 1) for item in os.environ.get("NDTS_INTROSPECTION_KEYS", "").split(",") if ":" in item
+)
+INTROSPECTION_MAX_ITEMS = 500
+INTROSPECTION_ACTIVE_TTL = 30      # seconds consumers may cache an active answer
+INTROSPECTION_UNKNOWN_TTL = 5
+INTROSPECTION_FINAL_TTL = 3600     # revoked / rotated / expired / invalid
+
+# Refresh rotation policy (accounts/rotation_policy.py). AgeBasedRotation rotates only
+# tokens older than MIN_AGE or close to expiry; other refreshes just mint an access token.
+REFRESH_ROTATION_POLICY = os.environ.get("NDTS_ROTATION_POLICY", "accounts.rotation_policy.AlwaysRotate")
+REFRESH_ROTATION_MIN_AGE_SECONDS = 900
+REFRESH_ROTATION_NEAR_EXPIRY_SECONDS = 60 * 60 * 24
 
 # Session inactivity / touch throttling
 SESSION_INACTIVITY_MINUTES = 20
@@ -199,9 +378,20 @@ CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
         "LOCATION": "dev-locmem",
+        # room for warmed session / user entries; LocMemCache culls a third when full
+        "OPTIONS": {"MAX_ENTRIES": int(os.environ.get("NDTS_CACHE_MAX_ENTRIES", "100000"))},
     }
 }
 
+# Cache warm-up (accounts/warmup.py): each worker warms rt:/user: entries for recently
+# active sessions in a background thread on its first request. Budgets stop it early.
+CACHE_WARMUP_ON_BOOT = os.environ.get("NDTS_CACHE_WARMUP", "0") == "1"
+CACHE_WARMUP_WINDOW_HOURS = 24
+CACHE_WARMUP_MAX_SECONDS = 30
+CACHE_WARMUP_MAX_BYTES = 64 * 1024 * 1024
+CACHE_WARMUP_MAX_ENTRIES = 200_000
+CACHE_WARMUP_CHUNK_SIZE = 2000
+
 # # Cookie security
 # SESSION_COOKIE_SECURE = True
 # CSRF_COOKIE_SECURE = True
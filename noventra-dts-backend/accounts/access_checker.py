@@ -5,6 +5,7 @@ from django.core.exceptions import PermissionDenied
 from django.shortcuts import get_object_or_404
 
 from apps.accounts.models import User
+from apps.accounts.tracing import traced
 # domain models (adjust imports if your app names differ)
 from apps.projects.models import Project, ProjectTeamAccess, ProjectMember
 from apps.teams.models import Team
@@ -17,26 +18,32 @@ CACHE_TTL_SHORT = 60 * 5     # 5 minutes by default (tunable)
 
 
 # ---------- role helpers ----------
+@traced()
 def is_super_admin(user: Optional[User]) -> bool:
     return bool(user and getattr(user, "is_authenticated", False) and user.role == "SUPER_ADMIN")
 
 
+@traced()
 def is_admin(user: Optional[User]) -> bool:
     return bool(user and getattr(user, "is_authenticated", False) and user.role == "ADMIN")
 
 
+@traced()
 def is_hr(user: Optional[User]) -> bool:
     return bool(user and getattr(user, "is_authenticated", False) and user.role == "HR")
 
 
+@traced()
 def is_team_lead(user: Optional[User]) -> bool:
     return bool(user and getattr(user, "is_authenticated", False) and user.role == "TEAM_LEAD")
 
 
+@traced()
 def is_employee(user: Optional[User]) -> bool:
     return bool(user and getattr(user, "is_authenticated", False) and user.role == "EMPLOYEE")
 
 
+@traced()
 def is_client(user: Optional[User]) -> bool:
     return bool(user and getattr(user, "is_authenticated", False) and user.role == "CLIENT")
 
@@ -46,6 +53,7 @@ def _team_cache_key(team_id: str, user_id: str) -> str:
     return f"{CACHE_PREFIX_TEAM_MEMBER}{team_id}:{user_id}"
 
 
+@traced()
 def is_user_in_team(user: User, team: Optional[Team] = None, team_id: Optional[str] = None, cache_client=cache, ttl: int = CACHE_TTL_SHORT) -> bool:
     """
     Returns True if user is a member of the given team.
@@ -74,6 +82,7 @@ def is_user_in_team(user: User, team: Optional[Team] = None, team_id: Optional[s
     return exists
 
 
+@traced()
 def is_team_lead_of_team(user: User, team: Optional[Team] = None, team_id: Optional[str] = None) -> bool:
     """
     Checks whether the user is the lead of the team. Accepts team object or team_id.
@@ -90,6 +99,7 @@ def _proj_member_cache_key(project_id: str, user_id: str) -> str:
     return f"{CACHE_PREFIX_PROJECT_MEMBER}{project_id}:{user_id}"
 
 
+@traced()
 def is_user_project_member(
     user: User,
     project: Optional[Project] = None,
@@ -152,6 +162,7 @@ def is_user_project_member(
     return in_team
 
 
+@traced()
 def is_user_project_admin(user: User, project: Optional[Project] = None, project_id: Optional[str] = None, cache_client=cache, ttl: int = CACHE_TTL_SHORT) -> bool:
     """
     True if user is Super Admin or Admin or a team lead for a team assigned to the project.
@@ -176,6 +187,7 @@ def is_user_project_admin(user: User, project: Optional[Project] = None, project
 
 
 # ---------- ticket scoping ----------
+@traced()
 def can_view_ticket(user: User, ticket: Optional[Ticket] = None, ticket_id: Optional[str] = None, *, cache_client=cache, ttl: int = CACHE_TTL_SHORT) -> bool:
     """
     Determine if a user can view a ticket.
@@ -218,6 +230,7 @@ def can_view_ticket(user: User, ticket: Optional[Ticket] = None, ticket_id: Opti
     return False
 
 
+@traced()
 def can_manage_ticket(user: User, ticket: Optional[Ticket] = None, ticket_id: Optional[str] = None) -> bool:
     """
     Who can change status / assign a ticket:
@@ -249,6 +262,7 @@ def can_manage_ticket(user: User, ticket: Optional[Ticket] = None, ticket_id: Op
 
 
 # ---------- employee management ----------
+@traced()
 def can_manage_employee(requester: User, target_user: User) -> bool:
     """
     HR/Admin/Super Admin can manage employees. Users can edit their own profile.
@@ -259,6 +273,7 @@ def can_manage_employee(requester: User, target_user: User) -> bool:
 
 
 # ---------- generic helpers ----------
+@traced()
 def require_project_access(user: User, project_id: str, cache_client=cache, ttl: int = CACHE_TTL_SHORT) -> Project:
     """
     Ensures the user has access to the project; raises PermissionDenied if not.
@@ -1,12 +1,107 @@
+import uuid
+
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.views.main import PAGE_VAR
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models.functions import Lower
+from django.utils.functional import cached_property
+
 from accounts.models import User, RefreshToken, InviteToken, EmailVerificationToken, PasswordResetToken
+from accounts.tokens import invalidate_sessions_for_users, revoke_refresh_tokens
+from accounts.utils import audit_log
+
+# Above this many rows the changelist stops counting exactly
+ADMIN_COUNT_CAP = int(getattr(settings, "ADMIN_COUNT_CAP", 10000))
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Avoids COUNT(*) over large tables: unfiltered changelists on Postgres use the planner
+    estimate from pg_class; everything else counts at most count_cap + 1 rows, where
+    count_cap is ADMIN_COUNT_CAP or count_floor, whichever is larger.
+    """
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True, count_floor: int = 0):
+        super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self.count_cap = max(ADMIN_COUNT_CAP, count_floor)
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        connection = connections[qs.db]
+        if connection.vendor == "postgresql" and not qs.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT reltuples FROM pg_class WHERE relname = %s", [qs.model._meta.db_table])
+                row = cursor.fetchone()
+            if row and row[0] > self.count_cap:
+                return int(row[0])
+        return qs[:self.count_cap + 1].count()
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist with a capped count that still reaches every page."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        # count one page past the requested one, so "next" stays reachable beyond the cap
+        try:
+            page = max(int(request.GET.get(PAGE_VAR, 1)), 1)
+        except ValueError:
+            page = 1
+        return self.paginator(queryset, per_page, orphans, allow_empty_first_page, count_floor=(page + 1) * per_page)
+
+
+def _email_prefix_search(queryset, search_term, email_field):
+    # prefix-only match on LOWER(email): LIKE 'term%' is served by the text_pattern_ops
+    # expression index on Postgres (migration 0011); SQLite scans
+    term = search_term.strip().lower()
+    if not term:
+        return queryset
+    return queryset.annotate(email_search=Lower(email_field)).filter(email_search__startswith=term)
+
 
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(LargeTableAdmin):
     list_display = ("email","full_name","role","is_active","is_staff","created_at")
-    search_fields = ("email","full_name","role")
+    list_filter = ("role", "is_active")
+    search_fields = ("email",)
+    search_help_text = "Email prefix"
+    actions = ["revoke_all_sessions"]
+
+    def get_search_results(self, request, queryset, search_term):
+        return _email_prefix_search(queryset, search_term, "email"), False
+
+    @admin.action(description="Revoke all sessions of selected users")
+    def revoke_all_sessions(self, request, queryset):
+        count = invalidate_sessions_for_users(queryset.values_list("pk", flat=True), reason="admin_revoked")
+        audit_log(request.user, "ADMIN_REVOKE", entity_type="refresh", meta={"tokens": count})
+        self.message_user(request, f"Revoked {count} session(s).")
+
 
 @admin.register(RefreshToken)
-class RefreshTokenAdmin(admin.ModelAdmin):
+class RefreshTokenAdmin(LargeTableAdmin):
     list_display = ("jti","user","created_at","expires_at","revoked")
-    search_fields = ("jti","user__email")
+    list_select_related = ("user",)
+    list_filter = ("revoked",)
+    date_hierarchy = "created_at"
+    search_fields = ("jti", "user__email")
+    search_help_text = "Exact jti or user email prefix"
+    raw_id_fields = ("user",)
+    actions = ["revoke_selected_sessions"]
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        try:
+            return queryset.filter(jti=uuid.UUID(term)), False
+        except ValueError:
+            return _email_prefix_search(queryset, term, "user__email"), False
+
+    @admin.action(description="Revoke selected sessions")
+    def revoke_selected_sessions(self, request, queryset):
+        count = revoke_refresh_tokens(queryset, reason="admin_revoked")
+        audit_log(request.user, "ADMIN_REVOKE", entity_type="refresh", meta={"tokens": count})
+        self.message_user(request, f"Revoked {count} session(s).")
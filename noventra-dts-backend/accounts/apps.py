@@ -8,5 +8,12 @@ class AccountsConfig(AppConfig):
     def ready(self):
         # import signals
         import accounts.signals 
+        import accounts.sqlite
+        import accounts.dbpool
+        from accounts.warmup import install_boot_warmup
+        install_boot_warmup()
+        # cache / SQL spans for commands and threads too, not only requests
+        from accounts.tracing import install as install_tracing
+        install_tracing()
 
 
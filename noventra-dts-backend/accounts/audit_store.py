@@ -0,0 +1,326 @@
+# backend/apps/accounts/audit_store.py
+"""
+Append-only, time-segmented audit event store.
+
+Layout under settings.AUDIT_STORE_DIR:
+
+  <segment>/                     one directory per AUDIT_SEGMENT_HOURS window, named by UTC start
+    <writer>.blk                 zlib-compressed NDJSON blocks: header (length, count) + payload
+    <writer>.entity.idx          16-byte records (key hash, block offset) per distinct key per block
+    <writer>.actor.idx           same, keyed on actor id
+    *.sidx + SEALED              sorted copies of the .idx files written by seal_segments()
+
+Every process writes its own <writer> files, so there is no cross-process locking.
+Events are buffered in memory and flushed as one block every AUDIT_BLOCK_EVENTS events or
+AUDIT_FLUSH_SECONDS seconds; keep the flush interval well under AUDIT_SEAL_GRACE_SECONDS.
+
+Lookups by (entity_type, entity_id) or actor binary-search the sorted index of sealed
+segments (a linear scan of the small unsorted index for the open one) and decompress only
+the matching blocks. Retention deletes whole segment directories.
+"""
+import atexit
+import bisect
+import hashlib
+import logging
+import os
+import shutil
+import struct
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+
+from .renderers import json_dumps, json_loads
+
+logger = logging.getLogger(__name__)
+
+AUDIT_STORE_DIR = Path(getattr(settings, "AUDIT_STORE_DIR", Path(settings.BASE_DIR) / "var" / "audit"))
+AUDIT_SEGMENT_HOURS = int(getattr(settings, "AUDIT_SEGMENT_HOURS", 24))
+AUDIT_BLOCK_EVENTS = int(getattr(settings, "AUDIT_BLOCK_EVENTS", 512))
+AUDIT_FLUSH_SECONDS = float(getattr(settings, "AUDIT_FLUSH_SECONDS", 5))
+AUDIT_SEAL_GRACE_SECONDS = int(getattr(settings, "AUDIT_SEAL_GRACE_SECONDS", 3600))
+AUDIT_RETENTION_DAYS = int(getattr(settings, "AUDIT_RETENTION_DAYS", 365))
+
+_BLOCK_HEADER = struct.Struct(">II")   # compressed length, event count
+_INDEX_RECORD = struct.Struct(">QQ")   # key hash, block offset
+_SEGMENT_FORMAT = "%Y%m%dT%H%M"
+_SEALED_MARKER = "SEALED"
+
+
+def _key_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+def entity_key(entity_type, entity_id) -> str:
+    return f"{entity_type or ''}:{entity_id or ''}"
+
+
+def _segment_start(ts: float, segment_seconds: int) -> int:
+    return int(ts // segment_seconds * segment_seconds)
+
+
+def _segment_name(start: int) -> str:
+    return datetime.fromtimestamp(start, dt_timezone.utc).strftime(_SEGMENT_FORMAT)
+
+
+def _segment_ts(name: str) -> Optional[int]:
+    try:
+        return int(datetime.strptime(name, _SEGMENT_FORMAT).replace(tzinfo=dt_timezone.utc).timestamp())
+    except ValueError:
+        return None
+
+
+class _SortedIndex:
+    """Sequence view over a sorted .sidx file so bisect can search it without unpacking."""
+    def __init__(self, data: bytes):
+        self._data = data
+
+    def __len__(self):
+        return len(self._data) // _INDEX_RECORD.size
+
+    def __getitem__(self, i):
+        return _INDEX_RECORD.unpack_from(self._data, i * _INDEX_RECORD.size)
+
+    def offsets(self, key_hash: int) -> List[int]:
+        found = []
+        i = bisect.bisect_left(self, key_hash, key=lambda rec: rec[0])
+        while i < len(self):
+            h, offset = self[i]
+            if h != key_hash:
+                break
+            found.append(offset)
+            i += 1
+        return found
+
+
+def _scan_index(data: bytes, key_hash: int) -> List[int]:
+    return sorted({offset for h, offset in _INDEX_RECORD.iter_unpack(data) if h == key_hash})
+
+
+class AuditStore:
+    def __init__(self, root=AUDIT_STORE_DIR, segment_hours: int = AUDIT_SEGMENT_HOURS,
+                 block_events: int = AUDIT_BLOCK_EVENTS, flush_seconds: float = AUDIT_FLUSH_SECONDS):
+        self.root = Path(root)
+        self.segment_seconds = segment_hours * 3600
+        self.block_events = block_events
+        self.flush_seconds = flush_seconds
+        self._reset()
+
+    def _reset(self) -> None:
+        # also called in a forked child: each process needs its own writer files and flusher
+        self._pid = os.getpid()
+        self._writer_id = f"{self._pid}-{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._buffer: List[dict] = []
+        self._buffer_segment: Optional[int] = None
+        self._flusher: Optional[threading.Thread] = None
+
+    # ---------------------------
+    # Ingest
+    # ---------------------------
+    def append(self, actor_id, action, entity_type=None, entity_id=None, meta=None, ts: Optional[float] = None) -> None:
+        ts = time.time() if ts is None else ts
+        event = {
+            "ts": ts,
+            "actor": str(actor_id) if actor_id is not None else None,
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": str(entity_id) if entity_id is not None else None,
+            "meta": meta or {},
+        }
+        segment = _segment_start(ts, self.segment_seconds)
+        if self._pid != os.getpid():
+            self._reset()
+        with self._lock:
+            if self._buffer_segment is not None and segment != self._buffer_segment:
+                self._flush_locked()
+            self._buffer_segment = segment
+            self._buffer.append(event)
+            if len(self._buffer) >= self.block_events:
+                self._flush_locked()
+        self._ensure_flusher()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._buffer:
+            return
+        events, segment = self._buffer, self._buffer_segment
+        self._buffer, self._buffer_segment = [], None
+
+        seg_dir = self.root / _segment_name(segment)
+        seg_dir.mkdir(parents=True, exist_ok=True)
+        payload = zlib.compress(b"\n".join(json_dumps(e) for e in events), 6)
+        base = seg_dir / self._writer_id
+        with open(f"{base}.blk", "ab") as fh:
+            offset = fh.tell()
+            fh.write(_BLOCK_HEADER.pack(len(payload), len(events)))
+            fh.write(payload)
+
+        keys = {
+            "entity": {entity_key(e["entity_type"], e["entity_id"]) for e in events if e["entity_type"] or e["entity_id"]},
+            "actor": {e["actor"] for e in events if e["actor"]},
+        }
+        for name, values in keys.items():
+            with open(f"{base}.{name}.idx", "ab") as fh:
+                fh.write(b"".join(_INDEX_RECORD.pack(_key_hash(v), offset) for v in values))
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is not None or self.flush_seconds <= 0:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, name="audit-flush", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            time.sleep(self.flush_seconds)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("audit store: periodic flush failed")
+
+    # ---------------------------
+    # Query
+    # ---------------------------
+    def segments(self, since: Optional[float] = None, until: Optional[float] = None) -> List[Tuple[int, Path]]:
+        if not self.root.exists():
+            return []
+        found = []
+        for path in self.root.iterdir():
+            start = _segment_ts(path.name) if path.is_dir() else None
+            if start is None:
+                continue
+            if since is not None and start + self.segment_seconds <= since:
+                continue
+            if until is not None and start > until:
+                continue
+            found.append((start, path))
+        return sorted(found)
+
+    def iter_events(self, entity_type=None, entity_id=None, actor_id=None,
+                    since: Optional[float] = None, until: Optional[float] = None) -> Iterator[dict]:
+        """
+        Stream matching events segment by segment (oldest segment first). With a full entity
+        filter (type and id) or an actor filter only indexed blocks are read; otherwise,
+        including a lone entity_type or entity_id, every block in range is scanned.
+        """
+        if entity_type is not None and entity_id is not None:
+            index, key = "entity", entity_key(entity_type, entity_id)
+        elif actor_id is not None:
+            index, key = "actor", str(actor_id)
+        else:
+            index = key = None
+
+        for _, seg_dir in self.segments(since, until):
+            sealed = (seg_dir / _SEALED_MARKER).exists()
+            for blk in sorted(seg_dir.glob("*.blk")):
+                base = str(blk)[:-len(".blk")]
+                offsets = None
+                if index is not None:
+                    offsets = self._lookup(base, index, _key_hash(key), sealed)
+                    if not offsets:
+                        continue
+                for event in self._read_blocks(blk, offsets):
+                    if since is not None and event["ts"] < since:
+                        continue
+                    if until is not None and event["ts"] > until:
+                        continue
+                    if entity_type is not None and event["entity_type"] != entity_type:
+                        continue
+                    if entity_id is not None and event["entity_id"] != str(entity_id):
+                        continue
+                    if actor_id is not None and event["actor"] != str(actor_id):
+                        continue
+                    yield event
+
+    def _lookup(self, base: str, index: str, key_hash: int, sealed: bool) -> List[int]:
+        sorted_path = Path(f"{base}.{index}.sidx")
+        if sealed and sorted_path.exists():
+            return _SortedIndex(sorted_path.read_bytes()).offsets(key_hash)
+        path = Path(f"{base}.{index}.idx")
+        return _scan_index(path.read_bytes(), key_hash) if path.exists() else []
+
+    @staticmethod
+    def _read_blocks(blk: Path, offsets: Optional[List[int]]) -> Iterator[dict]:
+        with open(blk, "rb") as fh:
+            def read_block():
+                header = fh.read(_BLOCK_HEADER.size)
+                if len(header) < _BLOCK_HEADER.size:
+                    return None
+                length, _ = _BLOCK_HEADER.unpack(header)
+                payload = fh.read(length)
+                if len(payload) < length:
+                    return None  # torn write at the tail; ignore
+                return zlib.decompress(payload).split(b"\n")
+
+            if offsets is None:
+                while True:
+                    lines = read_block()
+                    if lines is None:
+                        return
+                    for line in lines:
+                        yield json_loads(line)
+            else:
+                for offset in offsets:
+                    fh.seek(offset)
+                    for line in read_block() or ():
+                        yield json_loads(line)
+
+    # ---------------------------
+    # Maintenance
+    # ---------------------------
+    def seal_segments(self, now: Optional[float] = None) -> List[str]:
+        """Write sorted indexes for segments closed more than AUDIT_SEAL_GRACE_SECONDS ago."""
+        now = time.time() if now is None else now
+        sealed = []
+        for start, seg_dir in self.segments(until=now):
+            if start + self.segment_seconds + AUDIT_SEAL_GRACE_SECONDS > now:
+                continue
+            if (seg_dir / _SEALED_MARKER).exists():
+                continue
+            for idx in seg_dir.glob("*.idx"):
+                records = sorted(_INDEX_RECORD.iter_unpack(idx.read_bytes()))
+                tmp = idx.with_suffix(".sidx.tmp")
+                tmp.write_bytes(b"".join(_INDEX_RECORD.pack(*r) for r in records))
+                os.replace(tmp, idx.with_suffix(".sidx"))
+            (seg_dir / _SEALED_MARKER).touch()
+            sealed.append(seg_dir.name)
+        return sealed
+
+    def drop_segments_before(self, cutoff: float) -> List[str]:
+        """Retention: delete every segment that ends before cutoff."""
+        dropped = []
+        for start, seg_dir in self.segments(until=cutoff):
+            if start + self.segment_seconds <= cutoff:
+                shutil.rmtree(seg_dir, ignore_errors=True)
+                dropped.append(seg_dir.name)
+        return dropped
+
+    def stats(self) -> Dict[str, int]:
+        segments = self.segments()
+        size = sum(f.stat().st_size for _, d in segments for f in d.iterdir())
+        return {"segments": len(segments), "bytes": size}
+
+
+_store: Optional[AuditStore] = None
+_store_lock = threading.Lock()
+
+
+def get_audit_store() -> AuditStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = AuditStore()
+                atexit.register(_store.flush)
+    return _store
@@ -0,0 +1,134 @@
+# backend/apps/accounts/benchmarks/__init__.py
+"""
+Benchmark harness for the accounts app.
+
+Benchmarks are plain functions registered with @benchmark and run by
+`python manage.py accounts_bench [name ...]` inside bench_environment(): a throwaway
+test database (in-memory for SQLite) and a private LocMem cache, so nothing touches
+the real database or shared cache. Each benchmark starts from random.seed(BENCH_SEED).
+
+Results are JSON; `accounts_bench --baseline old.json` compares median timings with
+compare_results() and reports regressions above a relative threshold.
+"""
+import importlib
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+BENCHMARKS: Dict[str, Callable[[], dict]] = {}
+BENCH_SEED = 1234
+
+# modules that register benchmarks when imported
+BENCHMARK_MODULES = [
+    "accounts.benchmarks.users_batch",
+    "accounts.benchmarks.user_transfer",
+    "accounts.benchmarks.hot_paths",
+    "accounts.benchmarks.serialization",
+    "accounts.benchmarks.token_storage",
+    "accounts.benchmarks.ws_connections",
+    "accounts.benchmarks.audit_store",
+    "accounts.benchmarks.db_connections",
+    "accounts.benchmarks.rotation_policy",
+]
+
+BENCH_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "accounts-bench",
+    }
+}
+
+
+def benchmark(name: str):
+    """Register a benchmark function under name."""
+    def decorator(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return decorator
+
+
+def load_benchmarks() -> Dict[str, Callable[[], dict]]:
+    for module in BENCHMARK_MODULES:
+        importlib.import_module(module)
+    return BENCHMARKS
+
+
+@contextmanager
+def bench_environment():
+    """Create a disposable test database + LocMem cache for the duration of a run."""
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        with override_settings(CACHES=BENCH_CACHES):
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def run_benchmark(name: str) -> dict:
+    """Run one registered benchmark with the fixed seed."""
+    random.seed(BENCH_SEED)
+    return BENCHMARKS[name]()
+
+
+def measure(fn: Callable[[], object], repeat: int = 5, number: int = 1, setup: Optional[Callable[[], object]] = None) -> dict:
+    """
+    Run fn number times per round for repeat rounds; return per-call timings in ms.
+    setup, if given, runs untimed before every round.
+    """
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - started) * 1000 / number)
+    return {
+        "min_ms": round(min(samples), 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "max_ms": round(max(samples), 4),
+        "rounds": repeat,
+        "calls_per_round": number,
+    }
+
+
+def _timings(results: dict, path: str = ""):
+    """Yield (dotted path, median_ms) for every measure() dict nested in results."""
+    for key, value in results.items():
+        if not isinstance(value, dict):
+            continue
+        where = f"{path}.{key}" if path else key
+        if "median_ms" in value:
+            yield where, value["median_ms"]
+        else:
+            yield from _timings(value, where)
+
+
+def compare_results(current: dict, baseline: dict, threshold: float = 0.2) -> List[dict]:
+    """
+    Compare median timings present in both runs. Returns one row per timing, flagged
+    regressed when current is more than threshold (relative) slower than baseline.
+    """
+    base = dict(_timings(baseline))
+    rows = []
+    for where, median in _timings(current):
+        old = base.get(where)
+        if not old:
+            continue
+        change = (median - old) / old
+        rows.append({
+            "timing": where,
+            "baseline_ms": old,
+            "current_ms": median,
+            "change": round(change, 4),
+            "regressed": change > threshold,
+        })
+    return rows
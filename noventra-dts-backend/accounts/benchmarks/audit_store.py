@@ -0,0 +1,67 @@
+# backend/apps/accounts/benchmarks/audit_store.py
+"""
+Audit store ingest and lookup at ACCOUNTS_BENCH_AUDIT_EVENTS events (default 10M).
+
+Events are spread over 30 daily segments, 100k users and 1k actors, like a month of
+logins and rotations. Reports ingest rate, bytes per event on disk, and the latency of
+"all events for entity X" / "all events by actor Y" before and after sealing, next to a
+full scan of one segment for comparison. Runs in a temporary directory.
+"""
+import os
+import tempfile
+import time
+
+from accounts.audit_store import AuditStore
+from . import benchmark, measure
+
+N_EVENTS = int(os.environ.get("ACCOUNTS_BENCH_AUDIT_EVENTS", 10_000_000))
+N_DAYS = 30
+N_ENTITIES = 100_000
+N_ACTORS = 1_000
+ACTIONS = ("LOGIN", "TOKEN_ROTATED", "LOGOUT", "PASSWORD_RESET")
+
+
+@benchmark("audit_store")
+def run() -> dict:
+    with tempfile.TemporaryDirectory() as root:
+        store = AuditStore(root, segment_hours=24, flush_seconds=0)
+        start_ts = time.time() - (N_DAYS + 1) * 86400
+        step = N_DAYS * 86400 / N_EVENTS
+
+        started = time.perf_counter()
+        for i in range(N_EVENTS):
+            store.append(
+                i % N_ACTORS, ACTIONS[i % len(ACTIONS)], "user", i % N_ENTITIES,
+                {"ip": "10.0.0.1"}, ts=start_ts + i * step,
+            )
+        store.flush()
+        ingest_s = time.perf_counter() - started
+
+        entity_id, actor_id = N_ENTITIES // 2, N_ACTORS // 2
+        first_segment = store.segments()[0][0]
+
+        def by_entity():
+            return sum(1 for _ in store.iter_events(entity_type="user", entity_id=entity_id))
+
+        def by_actor():
+            return sum(1 for _ in store.iter_events(actor_id=actor_id))
+
+        def scan_segment():
+            return sum(1 for _ in store.iter_events(since=first_segment, until=first_segment + 86399))
+
+        unsealed = {"by_entity": measure(by_entity, repeat=3), "by_actor": measure(by_actor, repeat=3)}
+        store.seal_segments(now=time.time() + 2 * 86400)
+        sealed = {"by_entity": measure(by_entity, repeat=3), "by_actor": measure(by_actor, repeat=3)}
+
+        stats = store.stats()
+        return {
+            "events": N_EVENTS,
+            "segments": stats["segments"],
+            "ingest_events_per_sec": round(N_EVENTS / ingest_s),
+            "bytes_per_event": round(stats["bytes"] / N_EVENTS, 2),
+            "entity_matches": by_entity(),
+            "actor_matches": by_actor(),
+            "unsealed": unsealed,
+            "sealed": sealed,
+            "full_segment_scan": measure(scan_segment, repeat=1),
+        }
@@ -0,0 +1,128 @@
+# backend/apps/accounts/benchmarks/db_connections.py
+"""
+Per-request database latency under concurrent load for each connection strategy:
+
+  connect_per_request   new connection per request (CONN_MAX_AGE = 0, no pool)
+  persistent            per-thread connection reused, health-checked at request start
+  pooled                psycopg pool checkout/return (Postgres with psycopg[pool] only)
+
+Each of ACCOUNTS_BENCH_DB_THREADS threads runs ACCOUNTS_BENCH_DB_OPS "requests" of one
+SELECT against the test database. The in-memory SQLite test database cannot be reopened,
+so SQLite runs against a temporary file instead; the numbers that matter for deployment
+come from a networked database, where connect cost includes the round trips and auth.
+"""
+import copy
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+
+from django.db import connection
+from django.db.utils import load_backend
+
+from . import benchmark
+
+THREADS = int(os.environ.get("ACCOUNTS_BENCH_DB_THREADS", 8))
+OPS = int(os.environ.get("ACCOUNTS_BENCH_DB_OPS", 200))
+POOL_SIZE = int(os.environ.get("ACCOUNTS_BENCH_DB_POOL_SIZE", 4))
+
+
+def _wrapper(settings_dict, alias):
+    return load_backend(settings_dict["ENGINE"]).DatabaseWrapper(settings_dict, alias)
+
+
+def _query(db):
+    with db.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+
+
+def _connect_per_request(settings_dict):
+    def worker(samples):
+        for _ in range(OPS):
+            started = time.perf_counter()
+            db = _wrapper(settings_dict, "bench_direct")
+            _query(db)
+            db.close()
+            samples.append(time.perf_counter() - started)
+    return worker
+
+
+def _persistent(settings_dict):
+    settings_dict = {**settings_dict, "CONN_MAX_AGE": None, "CONN_HEALTH_CHECKS": True}
+
+    def worker(samples):
+        db = _wrapper(settings_dict, "bench_persistent")
+        for _ in range(OPS):
+            started = time.perf_counter()
+            db.close_if_unusable_or_obsolete()  # what request_started does
+            _query(db)
+            samples.append(time.perf_counter() - started)
+        db.close()
+    return worker
+
+
+def _pooled(settings_dict):
+    options = {**settings_dict.get("OPTIONS", {}), "pool": {"min_size": POOL_SIZE, "max_size": POOL_SIZE, "timeout": 30}}
+    settings_dict = {**settings_dict, "CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False, "OPTIONS": options}
+
+    def worker(samples):
+        db = _wrapper(settings_dict, "bench_pooled")
+        for _ in range(OPS):
+            started = time.perf_counter()
+            _query(db)
+            db.close()  # returns the connection to the pool
+            samples.append(time.perf_counter() - started)
+    return worker
+
+
+def _run(worker) -> dict:
+    per_thread = [[] for _ in range(THREADS)]
+    threads = [threading.Thread(target=worker, args=(samples,)) for samples in per_thread]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    samples = sorted(s * 1000 for chunk in per_thread for s in chunk)
+    quantiles = statistics.quantiles(samples, n=100)
+    return {
+        "p50_ms": round(quantiles[49], 4),
+        "p95_ms": round(quantiles[94], 4),
+        "p99_ms": round(quantiles[98], 4),
+        "max_ms": round(samples[-1], 4),
+        "requests_per_sec": round(len(samples) / elapsed),
+    }
+
+
+@benchmark("db_connections")
+def run() -> dict:
+    settings_dict = copy.deepcopy(connection.settings_dict)
+    settings_dict.get("OPTIONS", {}).pop("pool", None)
+    tmpdir = None
+    if connection.vendor == "sqlite" and connection.is_in_memory_db():
+        tmpdir = tempfile.mkdtemp(prefix="accounts-bench-db-")
+        settings_dict["NAME"] = os.path.join(tmpdir, "bench.sqlite3")
+    try:
+        results = {
+            "threads": THREADS,
+            "requests_per_thread": OPS,
+            "connect_per_request": _run(_connect_per_request(settings_dict)),
+            "persistent": _run(_persistent(settings_dict)),
+        }
+    finally:
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+    if connection.vendor == "postgresql":
+        try:
+            import psycopg_pool  # noqa: F401
+        except ImportError:
+            results["pooled"] = {"skipped": "psycopg_pool not installed"}
+        else:
+            results["pool_size"] = POOL_SIZE
+            results["pooled"] = _run(_pooled(settings_dict))
+            _wrapper({**settings_dict, "OPTIONS": {"pool": True}}, "bench_pooled").close_pool()
+    return results
@@ -0,0 +1,115 @@
+# backend/apps/accounts/benchmarks/hot_paths.py
+"""
+Per-call cost of the accounts hot paths: refresh token create/rotate, throttled
+last_active touch, invalidate_all_user_sessions at 1/10/1000 sessions,
+SessionCookieMiddleware on cache hit and miss, and the access_checker predicates.
+"""
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.utils import timezone
+
+from accounts.middleware import REFRESH_JTI_COOKIE_NAME, SessionCookieMiddleware
+from accounts.models import User, RefreshToken as DBRefreshToken
+from accounts.tokens import (
+    _cache_key,
+    create_stored_refresh_token,
+    invalidate_all_user_sessions,
+    rotate_refresh_token,
+    touch_last_active_throttled,
+)
+from . import benchmark, measure
+
+SESSION_COUNTS = (1, 10, 1000)
+
+
+def _user(email, role="EMPLOYEE"):
+    return User.objects.create(email=email, full_name=email, password=make_password(None), role=role, is_active=True)
+
+
+def _refresh_tokens(user) -> dict:
+    holder = {"db_rt": create_stored_refresh_token(user)[3]}
+
+    def rotate():
+        holder["db_rt"] = rotate_refresh_token(holder["db_rt"], user)[3]
+
+    _, _, jti, _ = create_stored_refresh_token(user)
+    return {
+        "create_stored_refresh_token": measure(lambda: create_stored_refresh_token(user), repeat=5, number=50),
+        "rotate_refresh_token": measure(rotate, repeat=5, number=50),
+        "touch_last_active_throttled_hit": measure(lambda: touch_last_active_throttled(jti), repeat=5, number=500),
+        # throttle_seconds=0 expires the throttle key immediately, so every call writes
+        "touch_last_active_throttled_miss": measure(lambda: touch_last_active_throttled(jti, throttle_seconds=0), repeat=5, number=50),
+    }
+
+
+def _invalidate_all(user) -> dict:
+    results = {}
+    for n in SESSION_COUNTS:
+        def setup(n=n):
+            # raw DELETE: the ORM cascade would query the unmanaged Session view
+            stale = DBRefreshToken.objects.filter(user=user)
+            stale._raw_delete(stale.db)
+            expires_at = timezone.now() + timedelta(days=30)
+            DBRefreshToken.objects.bulk_create(
+                [DBRefreshToken(jti=uuid.uuid4(), user=user, expires_at=expires_at) for _ in range(n)],
+                batch_size=1000,
+            )
+        results[f"sessions_{n}"] = measure(lambda: invalidate_all_user_sessions(user), repeat=5, setup=setup)
+    return results
+
+
+def _middleware(user) -> dict:
+    _, _, jti, _ = create_stored_refresh_token(user)
+    middleware = SessionCookieMiddleware(lambda request: HttpResponse())
+    factory = RequestFactory()
+
+    def call():
+        request = factory.get("/api/auth/me/")
+        request.COOKIES[REFRESH_JTI_COOKIE_NAME] = jti
+        middleware(request)
+
+    call()  # prime the cache + touch throttle so the hit path does neither
+    return {
+        "hit": measure(call, repeat=5, number=500),
+        "miss": measure(call, repeat=50, setup=lambda: cache.delete(_cache_key(jti))),
+    }
+
+
+def _access_checker() -> dict:
+    try:
+        from accounts import access_checker as ac
+    except ImportError as exc:
+        # the project/team/ticket apps it depends on are not part of this tree
+        return {"skipped": f"accounts.access_checker not importable: {exc}"}
+
+    admin = _user("bench-ac-admin@example.com", role="ADMIN")
+    employee = _user("bench-ac-emp@example.com")
+    predicates = {
+        "is_super_admin": lambda: ac.is_super_admin(employee),
+        "is_admin": lambda: ac.is_admin(admin),
+        "is_hr": lambda: ac.is_hr(employee),
+        "is_team_lead": lambda: ac.is_team_lead(employee),
+        "is_employee": lambda: ac.is_employee(employee),
+        "is_client": lambda: ac.is_client(employee),
+        "can_manage_employee": lambda: ac.can_manage_employee(employee, admin),
+        "is_user_in_team_missing": lambda: ac.is_user_in_team(employee),
+        "is_user_project_member_missing": lambda: ac.is_user_project_member(employee),
+        "is_user_project_admin_admin": lambda: ac.is_user_project_admin(admin, project_id=uuid.uuid4()),
+        "can_manage_ticket_admin": lambda: ac.can_manage_ticket(admin),
+    }
+    return {name: measure(fn, repeat=5, number=10_000) for name, fn in predicates.items()}
+
+
+@benchmark("hot_paths")
+def run() -> dict:
+    return {
+        "refresh_tokens": _refresh_tokens(_user("bench-rt@example.com")),
+        "invalidate_all_user_sessions": _invalidate_all(_user("bench-inv@example.com")),
+        "session_cookie_middleware": _middleware(_user("bench-mw@example.com")),
+        "access_checker": _access_checker(),
+    }
@@ -0,0 +1,176 @@
+# backend/apps/accounts/benchmarks/rotation_policy.py
+"""
+Database writes per refresh under each rotation policy, measured by driving
+TokenRefreshRotateView (test Client, real rows) through one simulated day of refresh
+traffic. Every policy replays the same seeded timeline with its own users:
+
+  - each client logs in (LoginView) a minute before its first refresh, then works in 1-3
+    active blocks; while active it refreshes when the access token expires (15 min, with
+    jitter)
+  - page reloads drop the in-memory access token and refresh immediately
+  - 401 storms: several tabs refresh within a couple of seconds; they share the cookie
+    jar, so each call presents whatever the previous response set
+
+The clock (django.utils.timezone.now and LocMem cache expiry, so the last_active touch
+throttle ages too) is moved to each event's time. Writes are INSERT/UPDATE/DELETE
+statements executed while the refresh request runs; logins are not counted. A refresh that
+fails (e.g. reuse detection) logs the client in again and is reported under "failed".
+Sizes: ACCOUNTS_BENCH_ROTATION_CLIENTS (default 100).
+"""
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from accounts.rotation_policy import AgeBasedRotation, AlwaysRotate
+
+from . import BENCH_SEED, benchmark, measure
+
+CLIENTS = int(os.environ.get("ACCOUNTS_BENCH_ROTATION_CLIENTS", 100))
+ACCESS_LIFETIME = 15 * 60
+REFRESH_LIFETIME = 30 * 86400
+RELOADS_PER_HOUR = 4.0
+STORM_PROBABILITY = 0.15      # chance a refresh cycle hits a 401 storm
+STORM_SIZE = (2, 6)           # tabs refreshing at once
+PASSWORD = "bench-rotation-pass"
+REFRESH_HEADERS = {"X-CSRF-REFRESH": "1"}
+
+POLICIES = {
+    "always": AlwaysRotate(),
+    "age_5m": AgeBasedRotation(min_age_seconds=300),
+    "age_15m": AgeBasedRotation(min_age_seconds=900),
+    "age_1h": AgeBasedRotation(min_age_seconds=3600),
+}
+
+
+def _timeline(rng: random.Random):
+    """[(t seconds, client, kind)] sorted by time: one simulated day of logins and refreshes."""
+    events = []
+    for client in range(CLIENTS):
+        first = None
+        for _ in range(rng.randint(1, 3)):
+            t = rng.uniform(0, 20 * 3600)
+            end = t + rng.uniform(0.5, 4) * 3600
+            while t < end:
+                first = t if first is None else min(first, t)
+                events.append((t, client, "refresh"))
+                if rng.random() < STORM_PROBABILITY:
+                    events.extend((t + rng.uniform(0, 2), client, "refresh") for _ in range(rng.randint(*STORM_SIZE) - 1))
+                # next refresh: access expiry, or earlier if the page is reloaded
+                next_expiry = ACCESS_LIFETIME * rng.uniform(0.9, 1.0)
+                next_reload = rng.expovariate(RELOADS_PER_HOUR / 3600)
+                t += min(next_expiry, next_reload)
+        events.append((first - 60, client, "login"))
+    events.sort()
+    return events
+
+
+class _SimClock:
+    """Patches timezone.now and the LocMem cache clock to a settable simulated time."""
+
+    def __init__(self, start: datetime):
+        self.now = start
+        clock = SimpleNamespace(time=lambda: self.now.timestamp())
+        self._patches = [
+            mock.patch("django.utils.timezone.now", lambda: self.now),
+            # timeouts are computed in base, expiry is checked in locmem
+            mock.patch("django.core.cache.backends.base.time", clock),
+            mock.patch("django.core.cache.backends.locmem.time", clock),
+        ]
+
+    def __enter__(self):
+        for p in self._patches:
+            p.start()
+        return self
+
+    def __exit__(self, *exc):
+        for p in reversed(self._patches):
+            p.stop()
+
+
+def _replay(name, policy, events, day_start) -> dict:
+    users = User.objects.bulk_create([
+        User(email=f"rotation-{name}-{i}@bench.local", full_name=f"Rotation {i}",
+             password=make_password(PASSWORD), is_active=True)
+        for i in range(CLIENTS)
+    ])
+    writes = {"n": 0}
+
+    def count_writes(execute, sql, params, many, context):
+        if sql.lstrip()[:6].upper() in ("INSERT", "UPDATE", "DELETE"):
+            writes["n"] += 1
+        return execute(sql, params, many, context)
+
+    def login(client, user):
+        client.post(reverse("auth-login"), {"email": user.email, "password": PASSWORD}, content_type="application/json")
+
+    clients = {}
+    rotations = access_only = failed = 0
+    timings = []
+    cache.clear()
+    with _SimClock(day_start) as clock, mock.patch("accounts.views.get_rotation_policy", return_value=policy):
+        for t, client_id, kind in events:
+            clock.now = day_start + timedelta(seconds=t)
+            if kind == "login":
+                clients[client_id] = Client()
+                login(clients[client_id], users[client_id])
+                continue
+            client = clients[client_id]
+            started = time.perf_counter()
+            with connection.execute_wrapper(count_writes):
+                resp = client.post(reverse("token-refresh-rotate"), headers=REFRESH_HEADERS)
+            timings.append((time.perf_counter() - started) * 1000)
+            if resp.status_code != 200:
+                failed += 1
+                login(client, users[client_id])
+            elif resp.cookies:
+                rotations += 1
+            else:
+                access_only += 1
+    refreshes = len(timings)
+    return {
+        "refreshes": refreshes,
+        "rotations": rotations,
+        "access_only": access_only,
+        "failed": failed,
+        "writes": writes["n"],
+        "writes_per_refresh": round(writes["n"] / refreshes, 4) if refreshes else 0,
+        "refresh_ms_p50": round(statistics.median(timings), 3) if timings else None,
+    }
+
+
+@benchmark("rotation_policy")
+def run() -> dict:
+    events = _timeline(random.Random(BENCH_SEED))
+    # simulated day from now on, so JWT refresh cookies (real-clock exp) stay valid
+    day_start = timezone.now()
+    results = {"clients": CLIENTS, "refreshes": sum(1 for e in events if e[2] == "refresh"), "policies": {}}
+    baseline = None
+    # hashing cost is irrelevant here and would dominate the logins
+    with override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"]):
+        for name, policy in POLICIES.items():
+            stats = _replay(name, policy, events, day_start)
+            if baseline is None:
+                baseline = stats["writes"]
+            stats["write_reduction"] = round(1 - stats["writes"] / baseline, 4) if baseline else 0
+            results["policies"][name] = stats
+
+    now = day_start + timedelta(hours=1)
+    created, expires = day_start, day_start + timedelta(seconds=REFRESH_LIFETIME)
+    results["decide"] = {
+        name: measure(lambda p=policy: p.decide(created, expires, now), repeat=5, number=100_000)
+        for name, policy in POLICIES.items()
+    }
+    return results
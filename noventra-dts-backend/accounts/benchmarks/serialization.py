@@ -0,0 +1,39 @@
+# backend/apps/accounts/benchmarks/serialization.py
+"""Cost of serializing + rendering 1k users: ModelSerializer + JSONRenderer vs compiled values() path."""
+from django.contrib.auth.hashers import make_password
+from rest_framework.renderers import JSONRenderer
+
+from accounts.models import User
+from accounts.renderers import JSON_BACKEND, FastJSONRenderer
+from accounts.serializers import UserSerializer, compiled_user_serializer
+from . import benchmark, measure
+
+N_USERS = 1000
+
+
+@benchmark("serialization")
+def run() -> dict:
+    password = make_password(None)
+    User.objects.bulk_create([
+        User(email=f"ser{i}@example.com", full_name=f"Serial {i}", password=password, is_active=True)
+        for i in range(N_USERS)
+    ])
+    # load once so the timings below cover serialization/rendering only
+    instances = list(User.objects.all())
+    rows = list(User.objects.values(*compiled_user_serializer.columns))
+
+    drf_renderer = JSONRenderer()
+    fast_renderer = FastJSONRenderer()
+
+    return {
+        "users": N_USERS,
+        "json_backend": JSON_BACKEND,
+        "model_serializer_drf_renderer": measure(lambda: drf_renderer.render(UserSerializer(instances, many=True).data), repeat=7),
+        "model_serializer_fast_renderer": measure(lambda: fast_renderer.render(UserSerializer(instances, many=True).data), repeat=7),
+        "compiled_values_to_bytes": measure(lambda: compiled_user_serializer.render(rows), repeat=7),
+        # end-to-end including the query
+        "queryset_model_serializer": measure(lambda: drf_renderer.render(UserSerializer(User.objects.all(), many=True).data), repeat=7),
+        "queryset_compiled": measure(
+            lambda: compiled_user_serializer.render(User.objects.values(*compiled_user_serializer.columns)), repeat=7
+        ),
+    }
@@ -0,0 +1,420 @@
+# backend/apps/accounts/benchmarks/stress.py
+"""
+Concurrency stress harness for the token flows (run via `manage.py accounts_stress`).
+
+Each flow builds fixtures in the parent, then fires groups of contending "attempts"
+(same refresh token, same invite, same reset token, ...) from threads and optionally
+forked processes. Results are checked against flow invariants:
+
+  refresh        one winner per contended refresh token, no lost rotations
+  invite         exactly one successful accept per invite, one user per email
+  password_reset exactly one successful confirm per token
+  revoke_all     no active token older than the last invalidate_all_user_sessions call
+  login_refresh  (no invariants) login + refresh throughput, e.g. to compare SQLite profiles
+
+Per flow it reports throughput, latency percentiles, error rates and the time spent in
+write statements (a proxy for lock waits: SQLite busy_timeout / Postgres row locks).
+"""
+import multiprocessing
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User, RefreshToken as DBRefreshToken
+from accounts.tokens import (
+    create_stored_refresh_token,
+    create_invite_token,
+    create_password_reset,
+    invalidate_all_user_sessions,
+)
+
+REFRESH_TOKEN_COOKIE_NAME = getattr(settings, "REFRESH_TOKEN_COOKIE_NAME", "refresh_token")
+REFRESH_JTI_COOKIE_NAME = getattr(settings, "REFRESH_JTI_COOKIE_NAME", "refresh_jti")
+REFRESH_REQUIRED_HEADER_NAME = getattr(settings, "REFRESH_REQUIRED_HEADER_NAME", "X-CSRF-REFRESH")
+STRESS_PASSWORD = "Stress-Test-Passw0rd!"
+
+FLOWS: Dict[str, Callable] = {}
+
+# reported even when they hold, so a clean run still lists what was checked
+FLOW_INVARIANTS = {
+    "refresh": ("one_winner_per_token", "no_lost_rotations"),
+    "invite": ("one_winner_per_invite", "one_user_per_invite"),
+    "password_reset": ("one_winner_per_reset",),
+    "revoke_all": ("no_active_tokens_after_revoke_all",),
+    "login_refresh": (),
+}
+
+_WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE", "BEGIN", "SAVEPOINT", "COMMIT", "RELEASE")
+
+
+def flow(name: str):
+    def decorator(fn):
+        FLOWS[name] = fn
+        return fn
+    return decorator
+
+
+# ---------------------------
+# Environment
+# ---------------------------
+@contextmanager
+def stress_environment(fast_hasher: bool = True, sqlite_profile: bool = True):
+    """
+    Throwaway test database on the default alias. SQLite uses a temp file so forked
+    processes share it, with the production profile (WAL, SQLITE_BUSY_TIMEOUT, BEGIN IMMEDIATE, ...)
+    unless sqlite_profile is False; other backends use their normal test database.
+    """
+    setup_test_environment()
+    tmpdir = None
+    old_options = dict(connection.settings_dict.get("OPTIONS") or {})
+    overrides = {}
+    if connection.vendor == "sqlite":
+        tmpdir = tempfile.mkdtemp(prefix="accounts-stress-")
+        connection.settings_dict.setdefault("TEST", {})["NAME"] = os.path.join(tmpdir, "stress.sqlite3")
+        options = {k: v for k, v in old_options.items() if k not in ("transaction_mode", "timeout")}
+        if sqlite_profile:
+            options.update(transaction_mode="IMMEDIATE", timeout=getattr(settings, "SQLITE_BUSY_TIMEOUT", 5))
+        connection.settings_dict["OPTIONS"] = options
+        overrides.update(SQLITE_PROFILE="production" if sqlite_profile else "", SQLITE_PRAGMAS=None)
+    if fast_hasher:
+        # hashing cost would otherwise dominate login/accept/confirm timings
+        overrides["PASSWORD_HASHERS"] = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+    old_name = connection.settings_dict["NAME"]
+    try:
+        with override_settings(**overrides):
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            yield
+    finally:
+        connections.close_all()
+        connection.settings_dict["OPTIONS"] = old_options
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+# ---------------------------
+# Attempt execution
+# ---------------------------
+def _timed(fn):
+    started = time.perf_counter()
+    try:
+        status = fn()
+    except Exception as exc:
+        return ("error:" + type(exc).__name__, (time.perf_counter() - started) * 1000)
+    return (status, (time.perf_counter() - started) * 1000)
+
+
+def _run_attempt(attempt):
+    """Run one attempt in the current thread; returns (group, samples, value, write_wait_ms)."""
+    group, op_name, args = attempt
+    write_wait = [0.0]
+
+    def wrapper(execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(_WRITE_PREFIXES):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            write_wait[0] += (time.perf_counter() - started) * 1000
+
+    try:
+        with connection.execute_wrapper(wrapper):
+            samples, value = OPS[op_name](*args)
+    finally:
+        connection.close()
+    return group, samples, value, write_wait[0]
+
+
+def _run_threads(attempts, threads):
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(_run_attempt, attempts))
+
+
+def _process_entry(payload):
+    attempts, threads = payload
+    return _run_threads(attempts, threads)
+
+
+def execute_attempts(attempts, threads: int, processes: int):
+    """Fan attempts out over processes x threads; contending attempts are adjacent in the list."""
+    if processes <= 1:
+        return _run_threads(attempts, threads)
+    # children must open their own DB connections
+    connections.close_all()
+    chunks = [attempts[i::processes] for i in range(processes)]
+    ctx = multiprocessing.get_context("fork")
+    with ctx.Pool(processes) as pool:
+        parts = pool.map(_process_entry, [(chunk, threads) for chunk in chunks])
+    return [r for part in parts for r in part]
+
+
+# ---------------------------
+# Operations (module level so forked workers can resolve them by name)
+# ---------------------------
+def op_refresh(refresh_str):
+    client = Client()
+    client.cookies[REFRESH_TOKEN_COOKIE_NAME] = refresh_str
+    holder = {}
+
+    def call():
+        resp = client.post(reverse("token-refresh-rotate"), headers={REFRESH_REQUIRED_HEADER_NAME: "1"})
+        if resp.status_code == 200:
+            holder["refresh"] = resp.cookies[REFRESH_TOKEN_COOKIE_NAME].value
+            holder["jti"] = resp.cookies[REFRESH_JTI_COOKIE_NAME].value
+        return resp.status_code
+
+    return [_timed(call)], holder or None
+
+
+def op_accept_invite(token, email):
+    client = Client()
+
+    def call():
+        return client.post(
+            reverse("invite-accept"),
+            {"token": token, "full_name": "Stress User", "password": STRESS_PASSWORD},
+            content_type="application/json",
+        ).status_code
+
+    return [_timed(call)], None
+
+
+def op_confirm_reset(token):
+    client = Client()
+
+    def call():
+        return client.post(
+            reverse("password-reset-confirm"),
+            {"token": token, "password": STRESS_PASSWORD},
+            content_type="application/json",
+        ).status_code
+
+    return [_timed(call)], None
+
+
+def op_refresh_chain(user_id, refreshes):
+    """Keep one session alive for `refreshes` rotations, logging in again when revoked."""
+    user = User.objects.get(pk=user_id)
+    _, refresh_str, _, _ = create_stored_refresh_token(user)
+    samples = []
+    for _ in range(refreshes):
+        op_samples, value = op_refresh(refresh_str)
+        samples.extend(op_samples)
+        if value:
+            refresh_str = value["refresh"]
+        else:
+            _, refresh_str, _, _ = create_stored_refresh_token(user)
+    return samples, None
+
+
+def op_revoke_all(user_id, rounds, pause_s):
+    user = User.objects.get(pk=user_id)
+
+    def call():
+        invalidate_all_user_sessions(user, reason="stress")
+        return 200
+
+    samples = []
+    last_start = None
+    for _ in range(rounds):
+        time.sleep(pause_s)
+        last_start = timezone.now()
+        samples.append(_timed(call))
+    return samples, last_start.isoformat()
+
+
+def op_login_refresh(email, refreshes):
+    client = Client()
+    samples = []
+
+    def login():
+        return client.post(
+            reverse("auth-login"), {"email": email, "password": STRESS_PASSWORD}, content_type="application/json"
+        ).status_code
+
+    samples.append(_timed(login))
+    refresh = client.cookies.get(REFRESH_TOKEN_COOKIE_NAME)
+    refresh_str = refresh.value if refresh else None
+    for _ in range(refreshes if refresh_str else 0):
+        op_samples, value = op_refresh(refresh_str)
+        samples.extend(op_samples)
+        if not value:
+            break
+        refresh_str = value["refresh"]
+    return samples, None
+
+
+OPS = {
+    "refresh": op_refresh,
+    "accept_invite": op_accept_invite,
+    "confirm_reset": op_confirm_reset,
+    "refresh_chain": op_refresh_chain,
+    "revoke_all": op_revoke_all,
+    "login_refresh": op_login_refresh,
+}
+
+
+# ---------------------------
+# Fixtures + flows
+# ---------------------------
+def _make_users(n, prefix):
+    password = make_password(STRESS_PASSWORD)
+    return User.objects.bulk_create([
+        User(email=f"{prefix}{i}@stress.local", full_name=f"Stress {i}", password=password, is_active=True)
+        for i in range(n)
+    ])
+
+
+@flow("refresh")
+def flow_refresh(opts):
+    users = _make_users(opts["groups"], "refresh")
+    tokens = {str(u.pk): create_stored_refresh_token(u)[1] for u in users}
+    results, violations = [], defaultdict(list)
+    for _ in range(opts["rounds"]):
+        attempts = [(uid, "refresh", (tok,)) for uid, tok in tokens.items() for _ in range(opts["contention"])]
+        round_results = execute_attempts(attempts, opts["threads"], opts["processes"])
+        results.extend(round_results)
+
+        winners = defaultdict(list)
+        for group, _, value, _ in round_results:
+            if value:
+                winners[group].append(value)
+        for uid, wins in winners.items():
+            if len(wins) > 1:
+                violations["one_winner_per_token"].append({"user": uid, "winners": len(wins)})
+            referenced = set(
+                DBRefreshToken.objects.filter(replaced_by_jti__in=[w["jti"] for w in wins])
+                .values_list("replaced_by_jti", flat=True)
+            )
+            lost = [w["jti"] for w in wins if all(r.hex != w["jti"] for r in referenced)]
+            if lost:
+                violations["no_lost_rotations"].append({"user": uid, "lost_jtis": lost})
+            tokens[uid] = wins[0]["refresh"]
+        # users with no winner keep retrying the same (now revoked) token, which is fine
+    return results, violations
+
+
+@flow("invite")
+def flow_invite(opts):
+    invites = [create_invite_token(f"invitee{i}@stress.local") for i in range(opts["groups"])]
+    attempts = [(inv.email, "accept_invite", (inv.token, inv.email)) for inv in invites for _ in range(opts["contention"])]
+    results = execute_attempts(attempts, opts["threads"], opts["processes"])
+
+    violations = defaultdict(list)
+    wins = Counter(group for group, samples, _, _ in results if samples[0][0] == 201)
+    for inv in invites:
+        if wins[inv.email] != 1:
+            violations["one_winner_per_invite"].append({"email": inv.email, "winners": wins[inv.email]})
+        users = User.objects.filter_by_email(inv.email).count()
+        if users != 1:
+            violations["one_user_per_invite"].append({"email": inv.email, "users": users})
+    return results, violations
+
+
+@flow("password_reset")
+def flow_password_reset(opts):
+    users = _make_users(opts["groups"], "reset")
+    resets = [create_password_reset(u) for u in users]
+    attempts = [(str(r.id), "confirm_reset", (r.token,)) for r in resets for _ in range(opts["contention"])]
+    results = execute_attempts(attempts, opts["threads"], opts["processes"])
+
+    violations = defaultdict(list)
+    wins = Counter(group for group, samples, _, _ in results if samples[0][0] == 200)
+    for r in resets:
+        if wins[str(r.id)] != 1:
+            violations["one_winner_per_reset"].append({"reset": str(r.id), "winners": wins[str(r.id)]})
+    return results, violations
+
+
+@flow("revoke_all")
+def flow_revoke_all(opts):
+    users = _make_users(opts["groups"], "revoke")
+    attempts = []
+    for u in users:
+        uid = str(u.pk)
+        attempts.extend((uid, "refresh_chain", (uid, opts["rounds"] * 5)) for _ in range(max(opts["contention"] - 1, 1)))
+        attempts.append((uid, "revoke_all", (uid, opts["rounds"], 0.005)))
+    results = execute_attempts(attempts, opts["threads"], opts["processes"])
+
+    violations = defaultdict(list)
+    last_revoke = {}
+    for group, _, value, _ in results:
+        if value:
+            last_revoke[group] = max(last_revoke.get(group, value), value)
+    for uid, started in last_revoke.items():
+        cutoff = datetime.fromisoformat(started)
+        orphans = DBRefreshToken.objects.filter(user_id=uid, revoked=False, created_at__lt=cutoff).count()
+        if orphans:
+            violations["no_active_tokens_after_revoke_all"].append({"user": uid, "orphans": orphans})
+    return results, violations
+
+
+@flow("login_refresh")
+def flow_login_refresh(opts):
+    users = _make_users(opts["groups"], "login")
+    attempts = [(str(u.pk), "login_refresh", (u.email, opts["rounds"])) for u in users for _ in range(opts["contention"])]
+    return execute_attempts(attempts, opts["threads"], opts["processes"]), defaultdict(list)
+
+
+# ---------------------------
+# Reporting
+# ---------------------------
+def _percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * pct))], 3)
+
+
+def summarize(name, results, violations, elapsed_s) -> dict:
+    samples = [s for _, group_samples, _, _ in results for s in group_samples]
+    statuses = Counter(str(status) for status, _ in samples)
+    latencies = [lat for _, lat in samples]
+    errors = sum(n for status, n in statuses.items() if status.startswith("error") or status.startswith("5"))
+    write_wait = [w for _, _, _, w in results]
+    return {
+        "ops": len(samples),
+        "duration_s": round(elapsed_s, 3),
+        "throughput_ops_s": round(len(samples) / elapsed_s, 1) if elapsed_s else None,
+        "statuses": dict(statuses),
+        "error_rate": round(errors / len(samples), 4) if samples else 0,
+        "latency_ms": {
+            "p50": _percentile(latencies, 0.50),
+            "p99": _percentile(latencies, 0.99),
+            "mean": round(statistics.fmean(latencies), 3) if latencies else None,
+        },
+        "write_wait_ms": {
+            "total": round(sum(write_wait), 3),
+            "per_op": round(sum(write_wait) / len(samples), 3) if samples else None,
+        },
+        "invariants": {
+            inv: {"ok": not violations.get(inv), "violations": violations.get(inv, [])[:20]}
+            for inv in sorted(set(violations) | set(FLOW_INVARIANTS.get(name, ())))
+        },
+    }
+
+
+def run_flows(names: List[str], opts: dict) -> dict:
+    report = {"vendor": connection.vendor, "options": opts, "flows": {}}
+    for name in names:
+        started = time.perf_counter()
+        results, violations = FLOWS[name](opts)
+        report["flows"][name] = summarize(name, results, violations, time.perf_counter() - started)
+    return report
@@ -0,0 +1,91 @@
+# backend/apps/accounts/benchmarks/token_storage.py
+"""
+Index size and point-lookup latency for jti storage: legacy varchar(255) unique + extra
+index vs the UUID column with a single unique index. On SQLite Django stores UUIDField as
+char(32), the same 32 hex characters as before, so there the only size gain is the dropped
+duplicate index; Postgres gets the native 16-byte uuid type.
+Row count via ACCOUNTS_BENCH_TOKEN_ROWS (default 1,000,000).
+"""
+import os
+import random
+import time
+import uuid
+
+from django.db import connection, models
+
+from . import benchmark
+
+ROWS = int(os.environ.get("ACCOUNTS_BENCH_TOKEN_ROWS", 1_000_000))
+LOOKUPS = 10_000
+INSERT_BATCH = 10_000
+
+
+def _index_sizes(table):
+    """{index_name: bytes} where the backend can report it, else {}."""
+    with connection.cursor() as cur:
+        if connection.vendor == "postgresql":
+            cur.execute(
+                "SELECT indexrelid::regclass::text, pg_relation_size(indexrelid) FROM pg_index WHERE indrelid = %s::regclass",
+                [table],
+            )
+            return dict(cur.fetchall())
+        if connection.vendor == "sqlite":
+            try:
+                cur.execute(
+                    "SELECT name, SUM(pgsize) FROM dbstat WHERE name IN "
+                    "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s) GROUP BY name",
+                    [table],
+                )
+                return dict(cur.fetchall())
+            except Exception:
+                # SQLite built without SQLITE_ENABLE_DBSTAT_VTAB
+                return {}
+    return {}
+
+
+def _load(table, column_type, values, extra_index):
+    qn = connection.ops.quote_name
+    with connection.cursor() as cur:
+        cur.execute(f"CREATE TABLE {qn(table)} (id integer PRIMARY KEY, jti {column_type} NOT NULL UNIQUE)")
+        if extra_index:
+            cur.execute(f"CREATE INDEX {qn(table + '_jti')} ON {qn(table)} (jti)")
+        for start in range(0, len(values), INSERT_BATCH):
+            chunk = values[start:start + INSERT_BATCH]
+            cur.executemany(
+                f"INSERT INTO {qn(table)} (id, jti) VALUES (%s, %s)",
+                [(start + i, v) for i, v in enumerate(chunk)],
+            )
+
+
+def _lookup_us(table, probes):
+    qn = connection.ops.quote_name
+    with connection.cursor() as cur:
+        started = time.perf_counter()
+        for p in probes:
+            cur.execute(f"SELECT id FROM {qn(table)} WHERE jti = %s", [p])
+            cur.fetchone()
+        return round((time.perf_counter() - started) * 1_000_000 / len(probes), 2)
+
+
+@benchmark("token_storage")
+def run() -> dict:
+    rng = random.Random(1234)
+    ids = [uuid.UUID(int=rng.getrandbits(128), version=4) for _ in range(ROWS)]
+    uuid_field = models.UUIDField()
+    uuid_type = uuid_field.db_type(connection)
+
+    legacy_values = [u.hex for u in ids]
+    new_values = [uuid_field.get_db_prep_value(u, connection) for u in ids]
+    _load("bench_legacy_rt", "varchar(255)", legacy_values, extra_index=True)
+    _load("bench_uuid_rt", uuid_type, new_values, extra_index=False)
+
+    sample = rng.sample(range(ROWS), min(LOOKUPS, ROWS))
+    result = {"rows": ROWS, "vendor": connection.vendor, "uuid_column_type": uuid_type}
+    for label, table, values in (("before", "bench_legacy_rt", legacy_values), ("after", "bench_uuid_rt", new_values)):
+        sizes = _index_sizes(table)
+        result[label] = {
+            "index_bytes": sizes,
+            "index_bytes_total": sum(sizes.values()) if sizes else None,
+            "lookup_us": _lookup_us(table, [values[i] for i in sample]),
+        }
+    return result
@@ -0,0 +1,71 @@
+# backend/apps/accounts/benchmarks/user_transfer.py
+"""
+Rows/sec for the streaming user export and the batched import (accounts/transfer.py).
+
+  - export: iter_export over EXPORT_USERS rows, CSV and NDJSON, default fields
+  - import: new users through import_users without passwords (IMPORT_ROWS), and with
+    passwords hashed by the configured hasher (IMPORT_HASHED_ROWS), serial and with the
+    hashing thread pool. Hashed imports are bound by the hasher, so the pool only helps
+    with as many cores as IMPORT_HASH_WORKERS.
+Sizes: ACCOUNTS_BENCH_EXPORT_USERS (default 20000), ACCOUNTS_BENCH_IMPORT_ROWS (default 2000),
+ACCOUNTS_BENCH_IMPORT_HASHED_ROWS (default 40).
+"""
+import os
+import time
+
+from django.contrib.auth.hashers import make_password
+
+from accounts.models import User
+from accounts.transfer import EXPORT_DEFAULT_FIELDS, IMPORT_HASH_WORKERS, import_users, iter_export
+
+from . import benchmark
+
+EXPORT_USERS = int(os.environ.get("ACCOUNTS_BENCH_EXPORT_USERS", 20000))
+IMPORT_ROWS = int(os.environ.get("ACCOUNTS_BENCH_IMPORT_ROWS", 2000))
+IMPORT_HASHED_ROWS = int(os.environ.get("ACCOUNTS_BENCH_IMPORT_HASHED_ROWS", 40))
+
+
+def _rate(rows: int, seconds: float) -> dict:
+    return {"rows": rows, "seconds": round(seconds, 3), "rows_per_sec": round(rows / seconds, 1) if seconds else None}
+
+
+def _export(fmt: str) -> dict:
+    started = time.perf_counter()
+    lines = sum(1 for _ in iter_export(EXPORT_DEFAULT_FIELDS, fmt))
+    return _rate(lines - (1 if fmt == "csv" else 0), time.perf_counter() - started)
+
+
+def _import(tag: str, with_passwords: bool, workers: int) -> dict:
+    count = IMPORT_HASHED_ROWS if with_passwords else IMPORT_ROWS
+    rows = [
+        {"email": f"import-{tag}-{i}@bench.local", "full_name": f"Import {i}", "role": "EMPLOYEE",
+         "password": f"bench-pass-{i}" if with_passwords else ""}
+        for i in range(count)
+    ]
+    started = time.perf_counter()
+    created = 0
+    for event in import_users(rows, workers=workers):
+        if "progress" in event:
+            created = event["progress"]["created"]
+    result = _rate(count, time.perf_counter() - started)
+    result["created"] = created
+    return result
+
+
+@benchmark("user_transfer")
+def run() -> dict:
+    password = make_password(None)
+    User.objects.bulk_create(
+        [User(email=f"export{i}@bench.local", full_name=f"Export {i}", password=password, is_active=True)
+         for i in range(EXPORT_USERS)],
+        batch_size=2000,
+    )
+    return {
+        "export_users": EXPORT_USERS,
+        "export": {"csv": _export("csv"), "ndjson": _export("ndjson")},
+        "import": {
+            "no_passwords": _import("nopw", False, 1),
+            "passwords_serial": _import("serial", True, 1),
+            f"passwords_pool_{IMPORT_HASH_WORKERS}": _import("pool", True, IMPORT_HASH_WORKERS),
+        },
+    }
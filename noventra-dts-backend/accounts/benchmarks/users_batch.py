@@ -0,0 +1,49 @@
+# backend/apps/accounts/benchmarks/users_batch.py
+"""100 single GET /users/<id>/ calls vs one GET /users/batch/ call, cold and warm cache."""
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from . import benchmark, measure
+
+N_USERS = 100
+
+
+def _fixture():
+    password = make_password(None)
+    users = User.objects.bulk_create([
+        User(email=f"bench{i}@example.com", full_name=f"Bench {i}", password=password, is_active=True)
+        for i in range(N_USERS)
+    ])
+    client = APIClient()
+    client.force_authenticate(users[0])
+    return client, [str(u.pk) for u in users]
+
+
+@benchmark("users_batch")
+def run() -> dict:
+    client, ids = _fixture()
+    batch_url = reverse("user-batch") + "?ids=" + ",".join(ids)
+
+    def singles():
+        for i in ids:
+            client.get(reverse("user-detail", kwargs={"user_id": i}))
+
+    def batch():
+        client.get(batch_url)
+
+    def cold(fn):
+        def run_cold():
+            cache.clear()
+            fn()
+        return run_cold
+
+    return {
+        "users": N_USERS,
+        "single_gets_cold": measure(cold(singles), repeat=5),
+        "single_gets_warm": measure(singles, repeat=5),
+        "batch_get_cold": measure(cold(batch), repeat=5),
+        "batch_get_warm": measure(batch, repeat=5),
+    }
@@ -0,0 +1,102 @@
+# backend/apps/accounts/benchmarks/ws_connections.py
+"""
+Idle /ws/auth/events/ connections held by one worker process.
+
+Connections are driven in-process through the ASGI app with in-memory receive/send
+channels, so the numbers cover the app's own per-socket cost (task, queue, broker
+subscription) but not the server's transport buffers (uvicorn/daphne add their own).
+Reports memory per connection (tracemalloc), connect time, and fan-out latency of one
+event delivered to every open socket of a user.
+"""
+import asyncio
+import os
+import time
+import tracemalloc
+
+from django.contrib.auth.hashers import make_password
+
+from accounts.events import EVENT_PROFILE_CHANGED, get_broker, publish_event
+from accounts.models import User
+from accounts.tokens import create_stored_refresh_token
+from accounts.ws import WS_EVENTS_PATH, auth_events_app
+from . import benchmark
+
+N_CONNECTIONS = int(os.environ.get("ACCOUNTS_BENCH_WS_CONNECTIONS", 2000))
+N_USERS = 20
+
+
+class _Socket:
+    """One in-memory client: receive() feeds the app, send() records what it sent."""
+    def __init__(self, cookie: str):
+        self.scope = {
+            "type": "websocket",
+            "path": WS_EVENTS_PATH,
+            "headers": [(b"cookie", cookie.encode())],
+        }
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.inbox.put_nowait({"type": "websocket.connect"})
+        self.accepted = asyncio.Event()
+        self.received = asyncio.Event()
+
+    async def receive(self):
+        return await self.inbox.get()
+
+    async def send(self, message):
+        if message["type"] == "websocket.accept":
+            self.accepted.set()
+        elif message["type"] == "websocket.send":
+            self.received.set()
+
+
+async def _run(cookies):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+
+    started = time.perf_counter()
+    sockets = [_Socket(cookies[i % len(cookies)][1]) for i in range(N_CONNECTIONS)]
+    tasks = [asyncio.ensure_future(auth_events_app(s.scope, s.receive, s.send)) for s in sockets]
+    await asyncio.gather(*(s.accepted.wait() for s in sockets))
+    connect_ms = (time.perf_counter() - started) * 1000
+
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+    # fan-out: one event per user reaches all of that user's sockets
+    started = time.perf_counter()
+    for user_id, _ in cookies:
+        publish_event(user_id, EVENT_PROFILE_CHANGED, fields=["full_name"], is_active=True)
+    await asyncio.gather(*(s.received.wait() for s in sockets))
+    fanout_ms = (time.perf_counter() - started) * 1000
+
+    subscribers = get_broker().subscriber_count()
+    for s in sockets:
+        s.inbox.put_nowait({"type": "websocket.disconnect", "code": 1000})
+    await asyncio.gather(*tasks)
+
+    per_connection = allocated / N_CONNECTIONS
+    return {
+        "connections": N_CONNECTIONS,
+        "users": len(cookies),
+        "subscribers_while_open": subscribers,
+        "subscribers_after_close": get_broker().subscriber_count(),
+        "connect_all_ms": round(connect_ms, 2),
+        "bytes_per_connection": round(per_connection),
+        "idle_connections_per_gb": int((1 << 30) / per_connection) if per_connection else None,
+        "fanout_all_ms": round(fanout_ms, 2),
+    }
+
+
+@benchmark("ws_connections")
+def run() -> dict:
+    password = make_password(None)
+    users = User.objects.bulk_create([
+        User(email=f"ws{i}@example.com", full_name=f"Ws {i}", password=password, is_active=True)
+        for i in range(N_USERS)
+    ])
+    cookies = []
+    for user in users:
+        # primes the rt: cache entry, so connects resolve the session without a DB query
+        _, _, jti, _ = create_stored_refresh_token(user)
+        cookies.append((str(user.pk), f"refresh_jti={jti}"))
+    return asyncio.run(_run(cookies))
@@ -0,0 +1,132 @@
+# backend/apps/accounts/db_router.py
+"""
+Primary / read-replica routing for read-only auth endpoints.
+
+Reads go to the primary unless code opts in with `with read_from(replica_for(user_id)):`.
+So anything not explicitly routed, in particular the revocation and replay checks in
+TokenRefreshRotateView and SessionCookieMiddleware's cache-miss lookup, always reads the
+primary. Only display reads (/me/, user detail, session list) opt in.
+
+Read-your-writes: every write that changes what a user can see (login, rotation,
+revocation, logout, profile save) calls pin_to_primary(user_id). For REPLICA_PIN_SECONDS
+after that, replica_for() returns the primary for that user. Keep the window above the
+worst replication lag you tolerate. Pins live in the default cache, so they only cover
+other workers when that cache is shared (Redis / Memcached, not LocMem).
+
+Replica aliases are listed in settings.DATABASE_REPLICAS (see Ndts/settings.py).
+
+RefreshTokenShardRouter (listed first) sends RefreshToken rows to their user's shard
+(accounts/sharding.py) when an instance hint identifies the user.
+"""
+import contextvars
+import random
+from contextlib import contextmanager
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from .sharding import is_sharded, shard_for_user
+
+REPLICA_ALIASES = list(getattr(settings, "DATABASE_REPLICAS", []))
+REPLICA_PIN_SECONDS = int(getattr(settings, "REPLICA_PIN_SECONDS", 5))
+CACHE_PREFIX_PIN = "dbpin:"
+
+_read_db: contextvars.ContextVar = contextvars.ContextVar("accounts_read_db", default=None)
+
+
+def _pin_key(user_id) -> str:
+    return f"{CACHE_PREFIX_PIN}{user_id}"
+
+
+def pin_to_primary(user_ids: Iterable) -> None:
+    """Send this user's routed reads to the primary for REPLICA_PIN_SECONDS."""
+    if not REPLICA_ALIASES:
+        return
+    cache.set_many({_pin_key(u): 1 for u in user_ids}, timeout=REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id) -> bool:
+    return bool(REPLICA_ALIASES) and cache.get(_pin_key(user_id)) is not None
+
+
+def replica_for(user_id=None) -> str:
+    """Alias to read user_id's data from: a random replica, or the primary while pinned."""
+    if not REPLICA_ALIASES or (user_id is not None and is_pinned(user_id)):
+        return DEFAULT_DB_ALIAS
+    return random.choice(REPLICA_ALIASES)
+
+
+def current_read_db() -> Optional[str]:
+    return _read_db.get()
+
+
+@contextmanager
+def read_from(alias: Optional[str]):
+    token = _read_db.set(alias)
+    try:
+        yield alias
+    finally:
+        _read_db.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """Reads follow read_from(); writes, relations and migrations stay on the primary."""
+
+    def db_for_read(self, model, **hints):
+        return _read_db.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in REPLICA_ALIASES
+
+
+def _is_refresh_token(model) -> bool:
+    return model._meta.label == "accounts.RefreshToken"
+
+
+class RefreshTokenShardRouter:
+    """
+    RefreshToken reads/writes with an instance hint go to the user's shard; related objects
+    reached from a shard row (rt.user) go back to the primary/replica. Queries without a
+    hint fall through: use RefreshToken.objects.for_user() / for_jti() to pick the shard.
+    """
+
+    def _route(self, model, hints):
+        if not is_sharded():
+            return None
+        instance = hints.get("instance")
+        if instance is None:
+            return None
+        if _is_refresh_token(model):
+            if _is_refresh_token(type(instance)):
+                # a loaded row stays where it was found (it may predate a rebalance)
+                if instance._state.db:
+                    return instance._state.db
+                user_id = instance.user_id
+            else:
+                user_id = instance.pk
+            return shard_for_user(user_id) if user_id is not None else None
+        if _is_refresh_token(type(instance)):
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def db_for_read(self, model, **hints):
+        route = self._route(model, hints)
+        if route == DEFAULT_DB_ALIAS and not _is_refresh_token(model):
+            return current_read_db() or DEFAULT_DB_ALIAS
+        return route
+
+    def db_for_write(self, model, **hints):
+        return self._route(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if _is_refresh_token(type(obj1)) or _is_refresh_token(type(obj2)):
+            return True
+        return None
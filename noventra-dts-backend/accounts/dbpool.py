@@ -0,0 +1,105 @@
+# backend/apps/accounts/dbpool.py
+"""
+Connection reuse metrics and health checks.
+
+Ndts/settings.py configures reuse per backend:
+  - SQLite / non-pooled Postgres: persistent connections (CONN_MAX_AGE) with
+    CONN_HEALTH_CHECKS, one connection per worker thread.
+  - Postgres with NDTS_DB_POOL=1: Django's psycopg pool (OPTIONS["pool"]), a bounded
+    per-process pool whose checkout blocks for at most pool "timeout" seconds. This is the
+    setup for threaded and ASGI servers, where per-thread connections are not reused.
+
+Persistent connections are on by default (CONN_MAX_AGE = 60) for WSGI and commands. They
+are off when pooled and under ASGI (Ndts/asgi.py sets NDTS_ASGI=1 before settings load),
+since Django recommends disabling them where each request may run on a different thread.
+NDTS_DB_CONN_MAX_AGE overrides the value in every case except pooling.
+
+pool_metrics() reports, per alias: connections created by this process, and for pooled
+aliases the pool's size, in-use and waiting counts (psycopg_pool get_stats()).
+check_databases_cached() backs the public health endpoint: at most one probe of every
+alias per DB_HEALTH_CHECK_CACHE_SECONDS per process, however often it is polled.
+"""
+import threading
+import time
+from collections import Counter
+from typing import Dict
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+DB_HEALTH_CHECK_CACHE_SECONDS = float(getattr(settings, "DB_HEALTH_CHECK_CACHE_SECONDS", 5))
+
+_created: Counter = Counter()
+_created_lock = threading.Lock()
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    with _created_lock:
+        _created[connection.alias] += 1
+
+
+def _pool(connection):
+    # postgresql DatabaseWrapper.pool is None unless OPTIONS["pool"] is set
+    return getattr(connection, "pool", None) if connection.vendor == "postgresql" else None
+
+
+def pool_metrics() -> Dict[str, dict]:
+    metrics = {}
+    for alias in connections:
+        connection = connections[alias]
+        item = {
+            "vendor": connection.vendor,
+            "created": _created[alias],
+            "conn_max_age": connection.settings_dict.get("CONN_MAX_AGE"),
+            "health_checks": connection.settings_dict.get("CONN_HEALTH_CHECKS"),
+            "pooled": False,
+        }
+        pool = _pool(connection)
+        if pool is not None:
+            stats = pool.get_stats()
+            size = stats.get("pool_size", 0)
+            item.update(
+                pooled=True,
+                min_size=pool.min_size,
+                max_size=pool.max_size,
+                size=size,
+                in_use=size - stats.get("pool_available", 0),
+                waiting=stats.get("requests_waiting", 0),
+                pool_connections_created=stats.get("connections_num", 0),
+                checkout_timeouts=stats.get("requests_errors", 0),
+            )
+        metrics[alias] = item
+    return metrics
+
+
+def check_databases() -> Dict[str, dict]:
+    """Run SELECT 1 on every alias; {alias: {"ok": bool, "ms": float, "error": str?}}."""
+    results = {}
+    for alias in connections:
+        started = time.perf_counter()
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            results[alias] = {"ok": True, "ms": round((time.perf_counter() - started) * 1000, 3)}
+        except Exception as exc:
+            results[alias] = {"ok": False, "ms": round((time.perf_counter() - started) * 1000, 3), "error": str(exc)}
+    return results
+
+
+_last_check = (0.0, None)
+_check_lock = threading.Lock()
+
+
+def check_databases_cached() -> Dict[str, dict]:
+    """check_databases(), reused for DB_HEALTH_CHECK_CACHE_SECONDS; concurrent callers share one probe."""
+    global _last_check
+    with _check_lock:
+        checked_at, checks = _last_check
+        if checks is None or time.monotonic() - checked_at >= DB_HEALTH_CHECK_CACHE_SECONDS:
+            checks = check_databases()
+            _last_check = (time.monotonic(), checks)
+        return checks
@@ -0,0 +1,160 @@
+# backend/apps/accounts/events.py
+"""
+Per-user event fan-out for the session push channel (see accounts/ws.py).
+
+Publishers are the sync token/user helpers (revocation, profile changes); subscribers are
+WebSocket connections running on an asyncio loop. The broker is pluggable through
+settings.ACCOUNTS_EVENT_BROKER:
+
+  "accounts.events.InProcessBroker"  (default) single process, no dependencies
+  "accounts.events.RedisBroker"      cross-process fan-out over Redis pub/sub
+                                     (needs the `redis` package and ACCOUNTS_EVENT_REDIS_URL)
+
+Revocations are usually published by WSGI workers while sockets live in the ASGI process,
+so an in-process broker would drop them silently. Ndts/asgi.py calls
+require_cross_process_broker() on the first WebSocket and refuses sockets (logging an
+error, HTTP is still served) unless the broker is cross-process or
+ACCOUNTS_EVENT_BROKER_ALLOW_IN_PROCESS is set (one process serving both).
+"""
+import json
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+EVENT_SESSION_REVOKED = "session_revoked"
+EVENT_SESSION_ROTATED = "session_rotated"
+EVENT_PROFILE_CHANGED = "profile_changed"
+
+
+class InProcessBroker:
+    """
+    Subscriptions live in this process. Callbacks are invoked on the subscriber's event
+    loop via call_soon_threadsafe, so publishing from sync (threaded) code is safe.
+    """
+    cross_process = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subs: Dict[str, Dict[int, tuple]] = defaultdict(dict)
+        self._next_id = 0
+
+    def subscribe(self, user_id: str, loop, callback: Callable[[dict], None]) -> Callable[[], None]:
+        with self._lock:
+            self._next_id += 1
+            sub_id = self._next_id
+            self._subs[user_id][sub_id] = (loop, callback)
+
+        def unsubscribe():
+            with self._lock:
+                subs = self._subs.get(user_id)
+                if subs is not None:
+                    subs.pop(sub_id, None)
+                    if not subs:
+                        del self._subs[user_id]
+        return unsubscribe
+
+    def publish(self, user_id: str, event: dict) -> None:
+        self._deliver(user_id, event)
+
+    def _deliver(self, user_id: str, event: dict) -> None:
+        with self._lock:
+            targets = list(self._subs.get(user_id, {}).values())
+        for loop, callback in targets:
+            try:
+                loop.call_soon_threadsafe(callback, event)
+            except RuntimeError:
+                # loop already closed; the connection is going away
+                pass
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._subs.values())
+
+
+class RedisBroker(InProcessBroker):
+    """
+    Publishes to Redis channel "<prefix><user_id>"; one listener thread per process
+    pattern-subscribes and hands messages to the local subscribers.
+    """
+    cross_process = True
+
+    def __init__(self):
+        super().__init__()
+        import redis  # optional dependency
+
+        self._prefix = getattr(settings, "ACCOUNTS_EVENT_REDIS_PREFIX", "accounts:events:")
+        self._redis = redis.Redis.from_url(getattr(settings, "ACCOUNTS_EVENT_REDIS_URL", "redis://localhost:6379/0"))
+        self._listener: Optional[threading.Thread] = None
+
+    def subscribe(self, user_id, loop, callback):
+        self._ensure_listener()
+        return super().subscribe(user_id, loop, callback)
+
+    def publish(self, user_id, event):
+        self._redis.publish(f"{self._prefix}{user_id}", json.dumps(event))
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._listener = threading.Thread(target=self._listen, name="accounts-events", daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(f"{self._prefix}*")
+        for message in pubsub.listen():
+            try:
+                channel = message["channel"].decode()
+                self._deliver(channel[len(self._prefix):], json.loads(message["data"]))
+            except Exception:
+                logger.exception("accounts events: bad message")
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, "ACCOUNTS_EVENT_BROKER", "accounts.events.InProcessBroker")
+                _broker = import_string(path)()
+    return _broker
+
+
+def require_cross_process_broker() -> None:
+    """Raise ImproperlyConfigured when the broker can't reach sockets in another process."""
+    path = getattr(settings, "ACCOUNTS_EVENT_BROKER", "accounts.events.InProcessBroker")
+    if getattr(settings, "ACCOUNTS_EVENT_BROKER_ALLOW_IN_PROCESS", False):
+        return
+    if not getattr(import_string(path), "cross_process", False):
+        raise ImproperlyConfigured(
+            f"ACCOUNTS_EVENT_BROKER={path} only delivers events published in this process, so "
+            "revocations from WSGI workers never reach these WebSockets. Use "
+            "accounts.events.RedisBroker, or set ACCOUNTS_EVENT_BROKER_ALLOW_IN_PROCESS "
+            "(NDTS_EVENT_BROKER_ALLOW_IN_PROCESS=1) when this ASGI process serves all traffic."
+        )
+
+
+def publish_event(user_id, event_type: str, **payload: Any) -> None:
+    """Fire-and-forget: push failures must never break the auth flow that triggered them."""
+    try:
+        get_broker().publish(str(user_id), {"type": event_type, **payload})
+    except Exception:
+        logger.exception("accounts events: publish failed")
+
+
+def publish_sessions_revoked(user_jtis: Dict[str, Iterable[str]], reason: str) -> None:
+    """user_jtis: {user_id: [jti hex, ...]}"""
+    for user_id, jtis in user_jtis.items():
+        publish_event(user_id, EVENT_SESSION_REVOKED, jtis=list(jtis), reason=reason)
@@ -0,0 +1,97 @@
+# backend/apps/accounts/instrumentation.py
+"""
+One set of cache / SQL hooks shared by tracing (accounts/tracing.py) and request profiling
+(accounts/profiling.py), so the cache backend classes are patched once and each connection
+carries a single execute wrapper, however many consumers are enabled.
+
+Consumers register interceptors, called outermost-first in registration order:
+
+    def cache_interceptor(name, args, kwargs, call):      # name: "get", "set_many", ...
+        return call()                                       # runs the next one / the backend
+
+    def sql_interceptor(execute, sql, params, many, context):   # Django execute_wrapper signature
+        return execute(sql, params, many, context)
+
+Interceptors must be cheap when they have nothing to record (a ContextVar check), since
+they run for every cache call and query of the process. Nothing is patched until the first
+interceptor is added.
+"""
+import functools
+import threading
+from typing import Callable, List
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+CACHE_METHODS = ("get", "set", "add", "delete", "get_many", "set_many", "delete_many", "incr", "decr", "touch")
+
+_cache_interceptors: List[Callable] = []
+_sql_interceptors: List[Callable] = []
+_lock = threading.Lock()
+
+
+# ---------------------------
+# Cache
+# ---------------------------
+def _wrap_cache_method(cls, name):
+    original = getattr(cls, name)
+
+    @functools.wraps(original)
+    def wrapper(self, *args, **kwargs):
+        if not _cache_interceptors:
+            return original(self, *args, **kwargs)
+        call = functools.partial(original, self, *args, **kwargs)
+        for interceptor in reversed(_cache_interceptors):
+            call = functools.partial(interceptor, name, args, kwargs, call)
+        return call()
+
+    wrapper._accounts_instrumented = True
+    setattr(cls, name, wrapper)
+
+
+def _install_cache_hooks():
+    for alias in settings.CACHES:
+        cls = type(caches[alias])
+        for name in CACHE_METHODS:
+            if hasattr(cls, name) and not getattr(getattr(cls, name), "_accounts_instrumented", False):
+                _wrap_cache_method(cls, name)
+
+
+def add_cache_interceptor(interceptor: Callable) -> None:
+    with _lock:
+        if interceptor in _cache_interceptors:
+            return
+        _install_cache_hooks()
+        _cache_interceptors.append(interceptor)
+
+
+# ---------------------------
+# SQL
+# ---------------------------
+def _sql_hook(execute, sql, params, many, context):
+    call = execute
+    for interceptor in reversed(_sql_interceptors):
+        call = functools.partial(interceptor, call)
+    return call(sql, params, many, context)
+
+
+def _add_sql_hook(connection):
+    if _sql_hook not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sql_hook)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _add_sql_hook(connection)
+
+
+def add_sql_interceptor(interceptor: Callable) -> None:
+    with _lock:
+        if interceptor in _sql_interceptors:
+            return
+        if not _sql_interceptors:
+            connection_created.connect(_on_connection_created, dispatch_uid="accounts_instrumentation_sql")
+        _sql_interceptors.append(interceptor)
+    for connection in connections.all(initialized_only=True):
+        _add_sql_hook(connection)
@@ -0,0 +1,115 @@
+# backend/apps/accounts/introspection.py
+"""
+Batch session / access-token introspection for sibling services.
+
+  POST /api/auth/introspect/
+  Authorization: Service <key>
+  {"jtis": ["<refresh jti>", ...], "tokens": ["<access JWT>", ...]}
+
+Keys are configured per calling service in INTROSPECTION_SERVICE_KEYS ({name: key};
+NDTS_INTROSPECTION_KEYS="ems:<key>,billing:<key>"). No keys configured = endpoint disabled.
+
+Answers come back in request order as compact items:
+  {"a": 1, "u": "<user id>", "s": "<session jti>", "exp": <unix ts>, "ttl": 30}
+  {"a": 0, "r": "revoked" | "rotated" | "expired" | "unknown" | "invalid", "ttl": 3600}
+"ttl" is how many seconds the consumer may cache that item. Active sessions get a short
+TTL (they can be revoked any moment); revoked / rotated / expired / invalid are final and
+cache until INTROSPECTION_FINAL_TTL; unknown jtis get a short TTL because the row may not
+be visible yet.
+
+Access tokens are verified locally (signature + exp) and tied to their session through the
+"sid" claim set in tokens.create_stored_refresh_token. Tokens issued before that claim
+existed are answered from the JWT alone ("s": null).
+Session state comes from tokens.get_rt_meta_many: one cache get_many, then one jti__in
+query (per shard) for the misses.
+"""
+import hashlib
+import hmac
+import time
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .tokens import get_rt_meta_many, normalize_jti
+
+INTROSPECTION_SERVICE_KEYS: Dict[str, str] = dict(getattr(settings, "INTROSPECTION_SERVICE_KEYS", {}))
+INTROSPECTION_MAX_ITEMS = int(getattr(settings, "INTROSPECTION_MAX_ITEMS", 500))
+INTROSPECTION_ACTIVE_TTL = int(getattr(settings, "INTROSPECTION_ACTIVE_TTL", 30))
+INTROSPECTION_UNKNOWN_TTL = int(getattr(settings, "INTROSPECTION_UNKNOWN_TTL", 5))
+INTROSPECTION_FINAL_TTL = int(getattr(settings, "INTROSPECTION_FINAL_TTL", 3600))
+
+_KEY_DIGESTS = {name: hashlib.sha256(key.encode()).digest() for name, key in INTROSPECTION_SERVICE_KEYS.items() if key}
+
+
+def authenticate_service(request) -> Optional[str]:
+    """Name of the service whose key is in `Authorization: Service <key>`, else None."""
+    scheme, _, key = request.headers.get("Authorization", "").partition(" ")
+    if scheme != "Service" or not key:
+        return None
+    digest = hashlib.sha256(key.strip().encode()).digest()
+    match = None
+    for name, expected in _KEY_DIGESTS.items():
+        # compare against every key so timing does not reveal which one matched
+        if hmac.compare_digest(digest, expected):
+            match = name
+    return match
+
+
+def _inactive(reason: str, ttl: int) -> Dict[str, Any]:
+    return {"a": 0, "r": reason, "ttl": ttl}
+
+
+def _session_item(jti: str, meta: Optional[Dict[str, Any]], now: float) -> Dict[str, Any]:
+    if meta is None:
+        return _inactive("unknown", INTROSPECTION_UNKNOWN_TTL)
+    if meta.get("revoked"):
+        return _inactive("rotated" if meta.get("replaced_by_jti") else "revoked", INTROSPECTION_FINAL_TTL)
+    exp = meta.get("expires_at") or 0
+    if exp and exp < now:
+        return _inactive("expired", INTROSPECTION_FINAL_TTL)
+    ttl = INTROSPECTION_ACTIVE_TTL if not exp else max(0, min(INTROSPECTION_ACTIVE_TTL, int(exp - now)))
+    return {"a": 1, "u": meta.get("user_id"), "s": jti, "exp": int(exp), "ttl": ttl}
+
+
+def _decode_access(token) -> Optional[Dict[str, Any]]:
+    # AccessToken(None) (or "") mints a fresh token instead of decoding one
+    if not isinstance(token, str) or not token:
+        return None
+    try:
+        return AccessToken(token).payload
+    except (TokenError, TypeError, ValueError):
+        return None
+
+
+def introspect(jtis: List, tokens: List) -> Dict[str, List[Dict[str, Any]]]:
+    now = time.time()
+    user_claim = settings.SIMPLE_JWT.get("USER_ID_CLAIM", "user_id")
+    session_ids = [normalize_jti(j) for j in jtis]
+    payloads = [_decode_access(t) for t in tokens]
+    sids = [normalize_jti(p.get("sid")) if p and p.get("sid") else None for p in payloads]
+    metas = get_rt_meta_many([j for j in session_ids + sids if j])
+
+    jti_items = [
+        _session_item(jti, metas.get(jti), now) if jti else _inactive("invalid", INTROSPECTION_FINAL_TTL)
+        for jti in session_ids
+    ]
+
+    token_items = []
+    for payload, sid in zip(payloads, sids):
+        if payload is None:
+            # bad signature, malformed or past exp: none of these become valid later
+            token_items.append(_inactive("invalid", INTROSPECTION_FINAL_TTL))
+            continue
+        exp = int(payload.get("exp", 0))
+        ttl = max(0, min(INTROSPECTION_ACTIVE_TTL, exp - int(now)))
+        if sid is None:
+            token_items.append({"a": 1, "u": str(payload.get(user_claim)), "s": None, "exp": exp, "ttl": ttl})
+            continue
+        item = _session_item(sid, metas.get(sid), now)
+        if item["a"]:
+            item.update(u=str(payload.get(user_claim)), exp=min(exp, item["exp"] or exp), ttl=min(ttl, item["ttl"]))
+        token_items.append(item)
+
+    return {"jtis": jti_items, "tokens": token_items}
@@ -0,0 +1,36 @@
+# backend/apps/accounts/management/commands/accounts_audit.py
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.audit_store import AUDIT_RETENTION_DAYS, get_audit_store
+
+
+class Command(BaseCommand):
+    help = "Maintain the segmented audit store: seal closed segments, apply retention, query events."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seal", action="store_true", help="Write sorted indexes for closed segments.")
+        parser.add_argument("--prune", action="store_true", help="Drop segments older than the retention window.")
+        parser.add_argument("--retention-days", type=int, default=AUDIT_RETENTION_DAYS)
+        parser.add_argument("--entity", nargs=2, metavar=("TYPE", "ID"), help="Print events for one entity.")
+        parser.add_argument("--actor", help="Print events recorded for one actor id.")
+        parser.add_argument("--stats", action="store_true", help="Print segment count and size.")
+
+    def handle(self, *args, **options):
+        store = get_audit_store()
+        store.flush()
+        if options["seal"]:
+            for name in store.seal_segments():
+                self.stderr.write(f"sealed {name}")
+        if options["prune"]:
+            cutoff = time.time() - options["retention_days"] * 86400
+            for name in store.drop_segments_before(cutoff):
+                self.stderr.write(f"dropped {name}")
+        if options["entity"] or options["actor"]:
+            entity_type, entity_id = options["entity"] or (None, None)
+            for event in store.iter_events(entity_type=entity_type, entity_id=entity_id, actor_id=options["actor"]):
+                self.stdout.write(json.dumps(event, default=str))
+        if options["stats"]:
+            self.stdout.write(json.dumps(store.stats()))
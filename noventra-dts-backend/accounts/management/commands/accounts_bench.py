@@ -0,0 +1,65 @@
+# backend/apps/accounts/management/commands/accounts_bench.py
+import json
+import platform
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from accounts.benchmarks import BENCH_SEED, bench_environment, compare_results, load_benchmarks, run_benchmark
+
+
+class Command(BaseCommand):
+    help = "Run accounts benchmarks against a throwaway test database and LocMem cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help="Benchmarks to run (default: all).")
+        parser.add_argument("--list", action="store_true", help="List available benchmarks and exit.")
+        parser.add_argument("--output", help="Also write the JSON results to this file.")
+        parser.add_argument("--baseline", help="Compare median timings against a previous JSON result file.")
+        parser.add_argument(
+            "--threshold", type=float, default=0.2,
+            help="Relative slowdown that counts as a regression (default 0.2 = 20%%).",
+        )
+
+    def handle(self, *args, **options):
+        available = load_benchmarks()
+        if options["list"]:
+            for name in sorted(available):
+                self.stdout.write(name)
+            return
+
+        names = options["names"] or sorted(available)
+        unknown = [n for n in names if n not in available]
+        if unknown:
+            raise CommandError(f"Unknown benchmark(s): {', '.join(unknown)}")
+
+        results = {
+            "_meta": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "seed": BENCH_SEED,
+            }
+        }
+        with bench_environment():
+            for name in names:
+                self.stderr.write(f"running {name} ...")
+                results[name] = run_benchmark(name)
+
+        body = json.dumps(results, indent=2)
+        self.stdout.write(body)
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                fh.write(body + "\n")
+
+        if options["baseline"]:
+            with open(options["baseline"]) as fh:
+                baseline = json.load(fh)
+            rows = compare_results(results, baseline, options["threshold"])
+            regressed = [r for r in rows if r["regressed"]]
+            for r in rows:
+                mark = "REGRESSED" if r["regressed"] else "ok"
+                self.stderr.write(f"{mark:9} {r['timing']}: {r['baseline_ms']} -> {r['current_ms']} ms ({r['change']:+.1%})")
+            if regressed:
+                raise CommandError(f"{len(regressed)} timing(s) regressed more than {options['threshold']:.0%}")
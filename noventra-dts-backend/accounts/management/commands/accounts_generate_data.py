@@ -0,0 +1,78 @@
+# backend/apps/accounts/management/commands/accounts_generate_data.py
+import json
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from accounts.synthetic import DatasetSpec, generate
+
+
+class Command(BaseCommand):
+    help = (
+        "Load seeded synthetic users, refresh-token rotation chains, invites, verification and "
+        "password reset tokens for capacity testing. Writes to the configured database, so it "
+        "refuses to run without DEBUG unless --allow-production is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, required=True)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--start-index", type=int, default=0, help="First user number; use to append to an existing dataset.")
+        parser.add_argument("--sessions-mean", type=float, default=3.0, help="Mean sessions (rotation chains) per active user.")
+        parser.add_argument("--rotation-depth-mean", type=float, default=4.0, help="Mean rotations per session.")
+        parser.add_argument("--revoked-fraction", type=float, default=0.15, help="Share of chain heads that are revoked.")
+        parser.add_argument("--inactive-fraction", type=float, default=0.05, help="Share of users pending email verification.")
+        parser.add_argument("--reset-fraction", type=float, default=0.05, help="Share of active users with a password reset token.")
+        parser.add_argument("--invites", type=int, default=0)
+        parser.add_argument("--history-days", type=int, default=365)
+        parser.add_argument("--email-domain", default="synthetic.test")
+        parser.add_argument(
+            "--password",
+            help="Shared password for every generated user (admins included), hashed once. "
+                 "Default: an unusable password, so generated accounts cannot log in.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Users per transaction / work unit.")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows per INSERT.")
+        parser.add_argument("--workers", type=int, default=1, help="Parallel worker processes (Postgres; SQLite is forced to 1).")
+        parser.add_argument("--now", type=float, help="Reference unix time for generated timestamps (default: now).")
+        parser.add_argument("--allow-production", action="store_true", help="Run even though DEBUG is off.")
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options["allow_production"]:
+            raise CommandError(
+                f"DEBUG is off: refusing to load synthetic users into {connection.settings_dict['NAME']}. "
+                "Pass --allow-production if this really is a capacity-test database."
+            )
+        if options["users"] <= 0:
+            raise CommandError("--users must be positive")
+        workers = options["workers"]
+        if workers > 1 and connection.vendor == "sqlite":
+            self.stderr.write("SQLite allows one writer at a time; using --workers 1")
+            workers = 1
+
+        spec = DatasetSpec(
+            users=options["users"],
+            seed=options["seed"],
+            start_index=options["start_index"],
+            chunk_size=options["chunk_size"],
+            batch_size=options["batch_size"],
+            sessions_mean=options["sessions_mean"],
+            rotation_depth_mean=options["rotation_depth_mean"],
+            revoked_fraction=options["revoked_fraction"],
+            inactive_fraction=options["inactive_fraction"],
+            reset_fraction=options["reset_fraction"],
+            invites=options["invites"],
+            email_domain=options["email_domain"],
+            history_days=options["history_days"],
+            # make_password(None) is unusable: no known credential on generated admins
+            password_hash=make_password(options["password"]),
+            now_ts=options["now"] or time.time(),
+        )
+
+        progress = None
+        for progress in generate(spec, workers=workers):
+            self.stderr.write(f"chunk {progress['chunks_done']}: {sum(progress['rows'].values())} rows, {progress['rows_per_sec']} rows/sec")
+        self.stdout.write(json.dumps({"spec": {k: v for k, v in spec.__dict__.items() if k != "password_hash"}, "result": progress}, indent=2))
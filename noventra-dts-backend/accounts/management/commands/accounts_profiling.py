@@ -0,0 +1,36 @@
+# backend/apps/accounts/management/commands/accounts_profiling.py
+import json
+
+from django.core.management.base import BaseCommand
+
+from accounts.profiling import (
+    PROFILING_TOKEN_MAX_AGE,
+    get_profiled_users,
+    list_captures,
+    make_profile_token,
+    set_user_profiling,
+)
+
+
+class Command(BaseCommand):
+    help = "Control request profiling: issue X-Profile tokens, flag users, list captures."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--token", action="store_true", help="Print a signed X-Profile header value.")
+        parser.add_argument("--flag-user", metavar="USER_ID", help="Profile every request of this user.")
+        parser.add_argument("--unflag-user", metavar="USER_ID", help="Stop profiling this user.")
+        parser.add_argument("--list", action="store_true", help="List flagged users and stored captures.")
+
+    def handle(self, *args, **options):
+        if options["token"]:
+            self.stdout.write(make_profile_token())
+            self.stderr.write(f"valid for {PROFILING_TOKEN_MAX_AGE}s; send as X-Profile header")
+        if options["flag_user"]:
+            set_user_profiling(options["flag_user"], True)
+        if options["unflag_user"]:
+            set_user_profiling(options["unflag_user"], False)
+        if options["list"]:
+            self.stdout.write(json.dumps({
+                "flagged_users": sorted(get_profiled_users()),
+                "captures": list_captures(),
+            }, indent=2))
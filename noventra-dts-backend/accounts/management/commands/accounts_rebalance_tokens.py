@@ -0,0 +1,96 @@
+# backend/apps/accounts/management/commands/accounts_rebalance_tokens.py
+import json
+from typing import Dict, List
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from accounts.models import RefreshToken
+from accounts.sharding import all_shards, shard_for_user
+from accounts.synthetic import explicit_created_at
+
+_COPY_FIELDS = [f.name for f in RefreshToken._meta.concrete_fields if not f.primary_key]
+
+
+class Command(BaseCommand):
+    help = (
+        "Move RefreshToken rows to the shard their user hashes to (accounts/sharding.py). "
+        "Run after changing REFRESH_TOKEN_SHARDS / REFRESH_TOKEN_SHARD_MAP. Rows are copied "
+        "to the target (idempotent upsert), re-checked there and only then deleted from the "
+        "source, in one source transaction per chunk; if that transaction fails the copies are "
+        "removed again. jti lookups fall back across shards meanwhile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Rows scanned per source query.")
+        parser.add_argument(
+            "--from", dest="extra_sources", action="append", default=[],
+            help="Extra alias to drain (e.g. a shard being removed from REFRESH_TOKEN_SHARDS). Repeatable.",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Count misplaced rows without moving them.")
+
+    def handle(self, *args, **options):
+        shards = all_shards()
+        sources = list(dict.fromkeys(shards + options["extra_sources"]))
+        unknown = [alias for alias in sources if alias not in connections]
+        if unknown:
+            raise CommandError(f"Unknown database alias(es): {', '.join(unknown)}")
+        if options["chunk_size"] <= 0:
+            raise CommandError("--chunk-size must be positive")
+
+        summary = {}
+        for source in sources:
+            summary[source] = self._drain(source, options["chunk_size"], options["dry_run"])
+            self.stderr.write(f"{source}: scanned {summary[source]['scanned']}, moved {summary[source]['moved']}")
+        self.stdout.write(json.dumps({"shards": shards, "dry_run": options["dry_run"], "sources": summary}, indent=2))
+
+    def _drain(self, source: str, chunk_size: int, dry_run: bool) -> dict:
+        scanned = moved = 0
+        by_target: Dict[str, int] = {}
+        last_pk = None
+        while True:
+            qs = RefreshToken.objects.using(source).order_by("pk")
+            if last_pk is not None:
+                qs = qs.filter(pk__gt=last_pk)
+            rows = list(qs.values_list("pk", "user_id")[:chunk_size])
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            scanned += len(rows)
+
+            misplaced: Dict[str, List] = {}
+            for pk, user_id in rows:
+                target = shard_for_user(user_id)
+                if target != source:
+                    misplaced.setdefault(target, []).append(pk)
+            for target, pks in misplaced.items():
+                count = len(pks) if dry_run else self._move(source, target, pks)
+                by_target[target] = by_target.get(target, 0) + count
+                moved += count
+        return {"scanned": scanned, "moved": moved, "to": by_target}
+
+    def _move(self, source: str, target: str, pks: List) -> int:
+        copied_pks: List = []
+        try:
+            # lock the source rows so a concurrent revoke/rotate cannot land between copy and delete
+            with transaction.atomic(using=source):
+                objs = list(RefreshToken.objects.using(source).select_for_update().filter(pk__in=pks))
+                if not objs:
+                    return 0
+                with explicit_created_at(), transaction.atomic(using=target):
+                    # a row left on the target by an interrupted run is overwritten by the source copy
+                    RefreshToken.objects.using(target).bulk_create(
+                        objs, update_conflicts=True, unique_fields=["id"], update_fields=_COPY_FIELDS
+                    )
+                copied_pks = [o.pk for o in objs]
+                found = RefreshToken.objects.using(target).filter(pk__in=copied_pks).count()
+                if found != len(copied_pks):
+                    raise CommandError(f"{target}: {found} of {len(copied_pks)} copied rows present, keeping them on {source}")
+                # raw DELETE: the ORM cascade would query the unmanaged Session view
+                RefreshToken.objects.using(source).filter(pk__in=copied_pks)._raw_delete(source)
+        except Exception:
+            if copied_pks:
+                # the source kept its rows: drop the copies so no jti resolves to two live rows
+                RefreshToken.objects.using(target).filter(pk__in=copied_pks)._raw_delete(target)
+            raise
+        return len(copied_pks)
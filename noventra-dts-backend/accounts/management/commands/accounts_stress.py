@@ -0,0 +1,48 @@
+# backend/apps/accounts/management/commands/accounts_stress.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.benchmarks.stress import FLOWS, run_flows, stress_environment
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the token flows (refresh rotation, invite accept, password reset, revoke-all) "
+        "from many threads/processes against a throwaway database and check their invariants. "
+        "SQLite runs with the production profile (WAL, BEGIN IMMEDIATE, ...) unless "
+        "--sqlite-profile=off; --sqlite-profile=compare runs every flow with and without it. "
+        "Point the default database at Postgres to stress it instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("flows", nargs="*", help=f"Flows to run (default: all of {', '.join(sorted(FLOWS))}).")
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--processes", type=int, default=1, help="Forked worker processes (each runs --threads).")
+        parser.add_argument("--groups", type=int, default=20, help="Independent tokens/invites/users per flow.")
+        parser.add_argument("--contention", type=int, default=8, help="Concurrent attempts per group.")
+        parser.add_argument("--rounds", type=int, default=3)
+        parser.add_argument("--slow-hasher", action="store_true", help="Keep the configured PASSWORD_HASHERS.")
+        parser.add_argument("--sqlite-profile", choices=("on", "off", "compare"), default="on")
+
+    def handle(self, *args, **options):
+        names = options["flows"] or sorted(FLOWS)
+        unknown = [n for n in names if n not in FLOWS]
+        if unknown:
+            raise CommandError(f"Unknown flow(s): {', '.join(unknown)}")
+        opts = {k: options[k] for k in ("threads", "processes", "groups", "contention", "rounds")}
+
+        profiles = {"on": [True], "off": [False], "compare": [False, True]}[options["sqlite_profile"]]
+        reports = {}
+        for profile in profiles:
+            with stress_environment(fast_hasher=not options["slow_hasher"], sqlite_profile=profile):
+                reports["sqlite_profile" if profile else "default"] = run_flows(names, opts)
+        report = reports if len(reports) > 1 else next(iter(reports.values()))
+        self.stdout.write(json.dumps(report, indent=2, default=str))
+
+        failed = [
+            f"{flow}.{inv}" for r in reports.values() for flow, data in r["flows"].items()
+            for inv, result in data["invariants"].items() if not result["ok"]
+        ]
+        if failed:
+            raise CommandError(f"Invariant violations: {', '.join(failed)}")
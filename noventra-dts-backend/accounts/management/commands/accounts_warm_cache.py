@@ -0,0 +1,50 @@
+# backend/apps/accounts/management/commands/accounts_warm_cache.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.warmup import (
+    CACHE_WARMUP_CHUNK_SIZE,
+    CACHE_WARMUP_MAX_BYTES,
+    CACHE_WARMUP_MAX_ENTRIES,
+    CACHE_WARMUP_MAX_SECONDS,
+    CACHE_WARMUP_WINDOW_HOURS,
+    warm_caches,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Warm rt:<jti> session metadata and user entries for recently active sessions. "
+        "Only useful with a shared cache (Redis/Memcached): a LocMemCache is per process, "
+        "so workers warm themselves with CACHE_WARMUP_ON_BOOT instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--window-hours", type=float, default=CACHE_WARMUP_WINDOW_HOURS, help="Sessions active within this window.")
+        parser.add_argument("--max-seconds", type=float, default=CACHE_WARMUP_MAX_SECONDS)
+        parser.add_argument("--max-bytes", type=int, default=CACHE_WARMUP_MAX_BYTES, help="Pickled size budget of values written.")
+        parser.add_argument("--max-entries", type=int, default=CACHE_WARMUP_MAX_ENTRIES)
+        parser.add_argument("--chunk-size", type=int, default=CACHE_WARMUP_CHUNK_SIZE)
+        parser.add_argument("--no-users", action="store_true", help="Only warm session metadata.")
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] <= 0:
+            raise CommandError("--chunk-size must be positive")
+
+        def progress(stats):
+            self.stderr.write(
+                f"chunk {stats['chunks']}: {stats['sessions']} sessions, {stats['users']} users, "
+                f"{stats['bytes'] // 1024} KiB, {stats['seconds']}s"
+            )
+
+        stats = warm_caches(
+            max_seconds=options["max_seconds"],
+            max_bytes=options["max_bytes"],
+            max_entries=options["max_entries"],
+            chunk_size=options["chunk_size"],
+            window_hours=options["window_hours"],
+            warm_users=not options["no_users"],
+            progress=progress,
+        )
+        self.stdout.write(json.dumps(stats, indent=2))
@@ -2,56 +2,105 @@
 from django.http import JsonResponse
 from django.conf import settings
 from django.utils import timezone
-from django.core.cache import cache
 
-from .tokens import get_cached_rt_meta, touch_last_active_throttled
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .tokens import (
+    REFRESH_TOKEN_MODE,
+    RT_META_FIELDS,
+    cache_rt_meta,
+    get_cached_rt_meta,
+    normalize_jti,
+    rt_meta_from_row,
+    touch_last_active_throttled,
+)
 from .models import RefreshToken
+from .tracing import span, traced
 
 REFRESH_JTI_COOKIE_NAME = getattr(settings, "REFRESH_JTI_COOKIE_NAME", "refresh_jti")
 INACTIVITY_MINUTES = getattr(settings, "SESSION_INACTIVITY_MINUTES", 20)
 
+_jwt_auth = JWTAuthentication()
+
+
+def _access_token_sid(request):
+    """The "sid" (refresh jti) of a valid Bearer access token, or None (DRF rejects bad tokens)."""
+    try:
+        header = _jwt_auth.get_header(request)
+        raw = _jwt_auth.get_raw_token(header) if header else None
+        return AccessToken(raw).get("sid") if raw else None
+    except (AuthenticationFailed, TokenError):
+        return None
+
+@traced("session.db_load")
+def _load_refresh_token(jti):
+    # a revocation check: always the primary (or the jti's shard), never a replica, since
+    # revocation evicts rt: and the row read here is cached for every worker
+    return RefreshToken.objects.get_by_jti(jti)
+
+
 class SessionCookieMiddleware:
     """
     Read refresh_jti httpOnly cookie and enforce inactivity using cache-first checks.
     Keeps DB writes throttled via touch_last_active_throttled.
+    In opaque refresh mode there is no refresh_jti cookie; the session is the "sid" claim of
+    the request's (signature-checked) Bearer access token instead.
     """
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        jti = request.COOKIES.get(REFRESH_JTI_COOKIE_NAME)
-        if jti:
-            meta = get_cached_rt_meta(jti)
-            now = timezone.now()
-            # 1. cache-first check
-            if meta is not None:
-                # if cached expired or revoked -> reject
-                if meta.get("revoked") or (meta.get("expires_at") and meta["expires_at"] < now.timestamp()):
-                    return JsonResponse({"detail": "Session invalid"}, status=401)
-                # update last_active in throttled fashion (non-blocking)
+        raw_jti = request.COOKIES.get(REFRESH_JTI_COOKIE_NAME)
+        if not raw_jti and REFRESH_TOKEN_MODE == "opaque":
+            raw_jti = _access_token_sid(request)
+        if raw_jti:
+            with span("session.check") as sp:
+                rejected = self._check_session(raw_jti, sp)
+            if rejected is not None:
+                return rejected
+        response = self.get_response(request)
+        return response
+
+    def _check_session(self, raw_jti, sp):
+        """None if the session may proceed, else the 401 response."""
+        jti = normalize_jti(raw_jti)
+        if jti is None:
+            sp.set("result", "malformed")
+            return JsonResponse({"detail": "Session invalid"}, status=401)
+        meta = get_cached_rt_meta(jti)
+        now = timezone.now()
+        # 1. cache-first check
+        if meta is not None:
+            sp.set("branch", "cache")
+            # if cached expired or revoked -> reject
+            if meta.get("revoked") or (meta.get("expires_at") and meta["expires_at"] < now.timestamp()):
+                sp.set("result", "invalid")
+                return JsonResponse({"detail": "Session invalid"}, status=401)
+            # update last_active in throttled fashion (non-blocking)
+            try:
+                touch_last_active_throttled(jti, now=now)
+            except Exception:
+                # log but don't block
+                pass
+        else:
+            sp.set("branch", "db")
+            # cache miss -> check DB (primary)
+            try:
+                rt = _load_refresh_token(jti)
+                if rt.revoked or (rt.expires_at and rt.expires_at < now):
+                    sp.set("result", "invalid")
+                    return JsonResponse({"detail":"Session invalid"}, status=401)
+                # prime cache (same shape as every other rt: entry, handle_hash included)
+                cache_rt_meta(jti, rt_meta_from_row({f: getattr(rt, f) for f in RT_META_FIELDS}))
                 try:
                     touch_last_active_throttled(jti, now=now)
                 except Exception:
-                    # log but don't block
                     pass
-            else:
-                # cache miss -> check DB
-                try:
-                    rt = RefreshToken.objects.get(jti=jti)
-                    if rt.revoked or (rt.expires_at and rt.expires_at < now):
-                        return JsonResponse({"detail":"Session invalid"}, status=401)
-                    # prime cache
-                    cache.set(f"rt:{jti}", {
-                        "revoked": rt.revoked,
-                        "expires_at": rt.expires_at.timestamp() if rt.expires_at else 0,
-                        "user_id": str(rt.user_id),
-                        "replaced_by_jti": rt.replaced_by_jti,
-                    }, timeout=300)
-                    try:
-                        touch_last_active_throttled(jti, now=now)
-                    except Exception:
-                        pass
-                except RefreshToken.DoesNotExist:
-                    return JsonResponse({"detail":"Session invalid"}, status=401)
-        response = self.get_response(request)
-        return response
+            except RefreshToken.DoesNotExist:
+                sp.set("result", "unknown")
+                return JsonResponse({"detail":"Session invalid"}, status=401)
+        sp.set("result", "ok")
+        return None
@@ -0,0 +1,38 @@
+# Step 1/3 of the jti / opaque token storage change: add the new nullable columns.
+# Cheap (no table rewrite) and safe to run while the previous release is serving.
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_directory_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='refreshtoken',
+            name='jti_uuid',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='refreshtoken',
+            name='replaced_by_jti_uuid',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='invitetoken',
+            name='token_hash',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='emailverificationtoken',
+            name='token_hash',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='passwordresettoken',
+            name='token_hash',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Step 2/3: backfill the new columns in small batches, outside a single transaction,
+# so large tables are not locked for the duration. Re-runnable: only touches rows
+# whose new column is still NULL. 0005 runs it once more to catch stragglers.
+import hashlib
+import uuid
+
+from django.db import migrations
+
+BATCH_SIZE = 5000
+
+
+def _hash_token(raw):
+    # keep in sync with accounts.tokens.hash_token
+    return uuid.UUID(bytes=hashlib.sha256(raw.encode()).digest()[:16])
+
+
+def _to_uuid(value):
+    try:
+        return uuid.UUID(value) if value else None
+    except ValueError:
+        return None
+
+
+def _backfill(queryset, fields, convert):
+    while True:
+        batch = list(queryset[:BATCH_SIZE])
+        if not batch:
+            return
+        for obj in batch:
+            convert(obj)
+        queryset.model.objects.using(queryset.db).bulk_update(batch, fields)
+
+
+def backfill(apps, schema_editor):
+    # the database being migrated (`migrate --database rt_shardN`), not the routers' choice
+    alias = schema_editor.connection.alias
+    RefreshToken = apps.get_model('accounts', 'RefreshToken')
+
+    def convert_rt(rt):
+        # unparsable legacy jtis get a random id so the row stays unique (it can never match a JWT)
+        rt.jti_uuid = _to_uuid(rt.jti) or uuid.uuid4()
+        rt.replaced_by_jti_uuid = _to_uuid(rt.replaced_by_jti)
+
+    _backfill(
+        RefreshToken.objects.using(alias).filter(jti_uuid__isnull=True).order_by('pk'),
+        ['jti_uuid', 'replaced_by_jti_uuid'],
+        convert_rt,
+    )
+
+    def convert_token(obj):
+        obj.token_hash = _hash_token(obj.token)
+
+    for name in ('InviteToken', 'EmailVerificationToken', 'PasswordResetToken'):
+        model = apps.get_model('accounts', name)
+        _backfill(model.objects.using(alias).filter(token_hash__isnull=True).order_by('pk'), ['token_hash'], convert_token)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0003_token_uuid_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
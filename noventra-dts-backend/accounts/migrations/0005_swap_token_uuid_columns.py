@@ -0,0 +1,75 @@
+# Step 3/3: deploy together with the code that reads the new columns. Catches up any
+# rows written since 0004, drops the wide varchar columns/indexes and renames the new
+# columns into place with a single unique index each.
+import importlib
+
+from django.db import migrations, models
+
+backfill = importlib.import_module('accounts.migrations.0004_backfill_token_uuid_columns').backfill
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_backfill_token_uuid_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        # refresh tokens
+        migrations.RemoveIndex(
+            model_name='refreshtoken',
+            name='accounts_re_jti_467f41_idx',
+        ),
+        migrations.RemoveField(
+            model_name='refreshtoken',
+            name='jti',
+        ),
+        migrations.RemoveField(
+            model_name='refreshtoken',
+            name='replaced_by_jti',
+        ),
+        migrations.RenameField(
+            model_name='refreshtoken',
+            old_name='jti_uuid',
+            new_name='jti',
+        ),
+        migrations.RenameField(
+            model_name='refreshtoken',
+            old_name='replaced_by_jti_uuid',
+            new_name='replaced_by_jti',
+        ),
+        migrations.AlterField(
+            model_name='refreshtoken',
+            name='jti',
+            field=models.UUIDField(unique=True),
+        ),
+        # opaque tokens
+        migrations.RemoveField(
+            model_name='invitetoken',
+            name='token',
+        ),
+        migrations.AlterField(
+            model_name='invitetoken',
+            name='token_hash',
+            field=models.UUIDField(unique=True),
+        ),
+        migrations.RemoveField(
+            model_name='emailverificationtoken',
+            name='token',
+        ),
+        migrations.AlterField(
+            model_name='emailverificationtoken',
+            name='token_hash',
+            field=models.UUIDField(unique=True),
+        ),
+        migrations.RemoveField(
+            model_name='passwordresettoken',
+            name='token',
+        ),
+        migrations.AlterField(
+            model_name='passwordresettoken',
+            name='token_hash',
+            field=models.UUIDField(unique=True),
+        ),
+    ]
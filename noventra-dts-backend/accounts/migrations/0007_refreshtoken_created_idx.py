@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_user_email_ci_unique'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='refreshtoken',
+            index=models.Index(fields=['created_at'], name='accounts_rt_created_idx'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_refreshtoken_user_no_db_constraint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='refreshtoken',
+            name='handle_hash',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+    ]
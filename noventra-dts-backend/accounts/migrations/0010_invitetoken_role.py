@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_refreshtoken_handle_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invitetoken',
+            name='role',
+            field=models.CharField(choices=[('SUPER_ADMIN', 'Super Admin'), ('ADMIN', 'Admin'), ('HR', 'HR'), ('TEAM_LEAD', 'Team Lead'), ('EMPLOYEE', 'Employee'), ('CLIENT', 'Client')], default='EMPLOYEE', max_length=32),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Prefix search on LOWER(email) (admin changelists). The unique index from 0006 uses the
+# default operator class, which Postgres cannot use for LIKE 'abc%' under a non-C
+# collation; this adds a text_pattern_ops expression index next to it. Postgres only:
+# SQLite has no operator classes and its LIKE optimization does not apply to expressions.
+from django.db import migrations
+
+INDEX_NAME = 'accounts_user_email_prefix_idx'
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} '
+            f'ON accounts_user (LOWER(email) text_pattern_ops)'
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    atomic = False  # CREATE INDEX CONCURRENTLY
+
+    dependencies = [
+        ('accounts', '0010_invitetoken_role'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
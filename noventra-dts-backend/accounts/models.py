@@ -1,12 +1,30 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.utils import timezone
 import uuid
 
+from .sharding import REFRESH_TOKEN_JTI_FALLBACK, all_shards, is_sharded, shard_for_jti, shard_for_user
+
 # ------------------------
 # User + Manager
 # ------------------------
 class UserManager(BaseUserManager):
+    # Every email lookup goes through these so it compiles to LOWER(email) = %s, which is
+    # served by the functional unique index on User (no UPPER()/LIKE scans).
+    def filter_by_email(self, email):
+        return self.annotate(email_ci=Lower("email")).filter(email_ci=(email or "").strip().lower())
+
+    def filter_by_emails(self, emails):
+        return self.annotate(email_ci=Lower("email")).filter(email_ci__in=[(e or "").strip().lower() for e in emails])
+
+    def get_by_email(self, email):
+        return self.filter_by_email(email).get()
+
+    def get_by_natural_key(self, username):
+        # authenticate() resolves the USERNAME_FIELD through here
+        return self.get_by_email(username)
+
     def create_user(self, email, password=None, **extra_fields):
         if not email:
             raise ValueError("Email required")
@@ -34,6 +52,12 @@ ROLE_CHOICES = [
     ("EMPLOYEE", "Employee"),
     ("CLIENT", "Client"),
 ]
+# most privileged first; a caller may only grant roles at or below its own
+ROLE_RANK = {code: rank for rank, (code, _) in enumerate(ROLE_CHOICES)}
+
+
+def can_assign_role(actor_role, role) -> bool:
+    return role in ROLE_RANK and actor_role in ROLE_RANK and ROLE_RANK[role] >= ROLE_RANK[actor_role]
 
 
 from django.contrib.auth.models import Group, Permission
@@ -70,6 +94,15 @@ class User(AbstractBaseUser, PermissionsMixin):
     class Meta:
         db_table = "accounts_user"
         ordering = ("-created_at",)
+        constraints = [
+            models.UniqueConstraint(Lower("email"), name="accounts_user_email_ci_uniq"),
+        ]
+        indexes = [
+            # keyset pagination for the users directory: (created_at, id) plus filtered variants
+            models.Index(fields=["created_at", "id"], name="accounts_user_created_idx"),
+            models.Index(fields=["role", "created_at", "id"], name="accounts_user_role_idx"),
+            models.Index(fields=["is_active", "created_at", "id"], name="accounts_user_active_idx"),
+        ]
 
     def __str__(self):
         return f"{self.email}"
@@ -79,35 +112,71 @@ class User(AbstractBaseUser, PermissionsMixin):
 # ------------------------
 # Refresh token (server-tracked)
 # ------------------------
+class RefreshTokenManager(models.Manager):
+    # Rows are hash-partitioned by user across REFRESH_TOKEN_SHARDS (see accounts/sharding.py).
+    # Unsharded, these are plain filters so the routers (read replicas) still apply.
+    def for_user(self, user_id):
+        qs = self.filter(user_id=user_id)
+        return qs.using(shard_for_user(user_id)) if is_sharded() else qs
+
+    def for_jti(self, jti):
+        qs = self.filter(jti=jti)
+        return qs.using(shard_for_jti(jti)) if is_sharded() else qs
+
+    def get_by_jti(self, jti):
+        try:
+            return self.for_jti(jti).get()
+        except self.model.DoesNotExist:
+            if not (is_sharded() and REFRESH_TOKEN_JTI_FALLBACK):
+                raise
+            # pre-sharding jti, or row not yet moved by a rebalance
+            home = shard_for_jti(jti)
+            for alias in all_shards():
+                if alias != home:
+                    obj = self.using(alias).filter(jti=jti).first()
+                    if obj is not None:
+                        return obj
+            raise
+
+
 class RefreshToken(models.Model):
     """
     Server-side record for refresh tokens. We store jti (unique identifier from JWT).
     Optionally token_str can store the full JWT — if you do, **encrypt** it in production.
+    jti / replaced_by_jti are SimpleJWT's uuid4 hex ids stored as 16-byte UUIDs
+    (native uuid on Postgres) behind a single unique index.
     """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    jti = models.CharField(max_length=255, unique=True, db_index=True)  # jti from JWT
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="refresh_tokens")
+    jti = models.UUIDField(unique=True)  # jti from JWT
+    # no DB-level constraint: rows may live on a shard database without the user table
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="refresh_tokens", db_constraint=False)
     token_str = models.TextField(null=True, blank=True)  # optional: store the full JWT (ENCRYPT in prod!)
+    # opaque refresh mode: truncated SHA-256 of the handle's secret half (see tokens.make_refresh_handle)
+    handle_hash = models.UUIDField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField(null=True, blank=True)
     revoked = models.BooleanField(default=False)
     revoked_reason = models.CharField(max_length=255, null=True, blank=True)
-    replaced_by_jti = models.CharField(max_length=255, null=True, blank=True)
+    replaced_by_jti = models.UUIDField(null=True, blank=True)
     last_active = models.DateTimeField(null=True, blank=True)
     device = models.CharField(max_length=255, blank=True, null=True)       # e.g. "Chrome on Windows"
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(null=True, blank=True)
 
+    objects = RefreshTokenManager()
+
     class Meta:
         db_table = "accounts_refreshtoken"
         ordering = ("-created_at",)
         indexes = [
             models.Index(fields=["user"]),
-            models.Index(fields=["jti"]),
+            # admin ordering / date_hierarchy
+            models.Index(fields=["created_at"], name="accounts_rt_created_idx"),
         ]
 
     def __str__(self):
-        return f"RT {self.jti} user={self.user.email} revoked={self.revoked}"
+        # user_id, not user.email: avoids a query per row in admin changelists
+        return f"RT {self.jti} user={self.user_id} revoked={self.revoked}"
 
     def revoke(self, reason: str = "revoked"):
         self.revoked = True
@@ -115,21 +184,34 @@ class RefreshToken(models.Model):
         # do not clear replaced_by_jti here — rotation flow sets that explicitly
         self.save(update_fields=["revoked", "revoked_reason"])
 
-    def mark_replaced(self, new_jti: str):
-        """Set this token as rotated/replaced by new_jti and mark revoked."""
-        self.replaced_by_jti = new_jti
-        self.revoked = True
-        self.revoked_reason = "rotated"
-        self.save(update_fields=["replaced_by_jti", "revoked", "revoked_reason"])
+    def mark_replaced(self, new_jti: str) -> bool:
+        """
+        Set this token as rotated/replaced by new_jti and mark revoked.
+        A conditional UPDATE (WHERE revoked = false), so of two concurrent rotations of the
+        same token exactly one wins; returns False when the row was already revoked/replaced.
+        """
+        claimed = type(self).objects.using(self._state.db).filter(pk=self.pk, revoked=False).update(
+            replaced_by_jti=new_jti, revoked=True, revoked_reason="rotated"
+        )
+        if claimed:
+            self.replaced_by_jti = new_jti
+            self.revoked = True
+            self.revoked_reason = "rotated"
+        return bool(claimed)
 
 
 # ------------------------
 # Invite / Email verification / Password reset tokens
 # ------------------------
+# Opaque tokens are never stored: token_hash holds the first 16 bytes of SHA-256 of the
+# token string (see accounts.tokens.hash_token). Creators attach the raw value as a plain
+# `token` attribute on the returned instance so it can be emailed.
 class InviteToken(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     email = models.EmailField(db_index=True)
-    token = models.CharField(max_length=255, unique=True)
+    token_hash = models.UUIDField(unique=True)
+    # role the account gets when the invite is accepted
+    role = models.CharField(max_length=32, choices=ROLE_CHOICES, default="EMPLOYEE")
     invited_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
@@ -146,7 +228,7 @@ class InviteToken(models.Model):
 class EmailVerificationToken(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    token = models.CharField(max_length=255, unique=True)
+    token_hash = models.UUIDField(unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
     used = models.BooleanField(default=False)
@@ -156,13 +238,13 @@ class EmailVerificationToken(models.Model):
         ordering = ("-created_at",)
 
     def __str__(self):
-        return f"EmailVerif user={self.user.email} used={self.used}"
+        return f"EmailVerif user={self.user_id} used={self.used}"
 
 
 class PasswordResetToken(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    token = models.CharField(max_length=255, unique=True)
+    token_hash = models.UUIDField(unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
     used = models.BooleanField(default=False)
@@ -172,7 +254,7 @@ class PasswordResetToken(models.Model):
         ordering = ("-created_at",)
 
     def __str__(self):
-        return f"PwdReset user={self.user.email} used={self.used}"
+        return f"PwdReset user={self.user_id} used={self.used}"
 
 
 # ------------------------
@@ -197,4 +279,4 @@ class Session(models.Model):
         db_table = "accounts_session"
 
     def __str__(self):
-        return f"Session user={self.user.email} started={self.started_at}"
+        return f"Session user={self.user_id} started={self.started_at}"
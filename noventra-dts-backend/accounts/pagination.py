@@ -0,0 +1,34 @@
+# backend/apps/accounts/pagination.py
+"""
+Keyset (seek) pagination helpers.
+
+Cursors encode the (created_at, id) of the last row returned so the next page is a
+range seek on an index instead of OFFSET + COUNT(*).
+"""
+import base64
+import uuid
+from datetime import datetime
+from typing import Optional, Tuple
+
+from django.db.models import Q
+
+
+def encode_cursor(created_at: datetime, pk) -> str:
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[datetime, str]]:
+    """Return (created_at, pk) or None if the cursor is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+        # the pk goes straight into the seek filter; a non-UUID must not reach the DB layer
+        return datetime.fromisoformat(created_at), str(uuid.UUID(pk))
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def seek_after_desc(queryset, created_at: datetime, pk):
+    """Rows strictly after (created_at, pk) in ("-created_at", "-id") order."""
+    return queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
@@ -0,0 +1,92 @@
+# backend/apps/accounts/perm_cache.py
+"""
+Cross-request cache of a user's resolved permission set (PermissionsMixin / ModelBackend).
+
+ModelBackend resolves get_all_permissions() with two JOIN queries (user permissions, group
+permissions) the first time a request calls has_perm(). CachedPermissionBackend keeps the
+result as a frozenset under
+
+    perms:<user id>:<superuser flag>:<global version>:<user version>
+
+so steady-state checks are one get_many for the two version stamps plus one get.
+Stamps are bumped from accounts.signals:
+  - user version:   m2m_changed on User.groups / User.user_permissions (either side)
+  - global version: m2m_changed on Group.permissions, Group / Permission deletes,
+                    Permission saves, post_migrate (migrations bulk-create permissions),
+                    and reverse clears whose affected users are unknown
+Old entries are never read again and expire after PERM_CACHE_TTL.
+
+The bumps only reach processes that share the cache. With a per-process backend
+(LocMemCache, the default) another worker keeps its own stamps and serves the old set until
+the entry expires, so entries then live PERM_CACHE_LOCAL_TTL seconds instead: that is how
+long a revoked permission can survive in other workers.
+"""
+import time
+from typing import Iterable
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+CACHE_PREFIX_PERMS = getattr(settings, "CACHE_PREFIX_PERMS", "perms:")
+CACHE_PREFIX_PERM_VERSION = getattr(settings, "CACHE_PREFIX_PERM_VERSION", "perm_ver:")
+PERM_CACHE_TTL = int(getattr(settings, "PERM_CACHE_TTL", 3600))
+PERM_CACHE_LOCAL_TTL = int(getattr(settings, "PERM_CACHE_LOCAL_TTL", 30))
+_GLOBAL = "global"
+
+
+def _entry_ttl() -> int:
+    # `cache` is a proxy; the backend instance tells whether other processes see our bumps
+    if isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache)):
+        return min(PERM_CACHE_TTL, PERM_CACHE_LOCAL_TTL)
+    return PERM_CACHE_TTL
+
+
+def _version_key(scope) -> str:
+    return f"{CACHE_PREFIX_PERM_VERSION}{scope}"
+
+
+def _new_version() -> int:
+    return time.time_ns() // 1000
+
+
+def bump_user_perm_versions(user_ids: Iterable) -> None:
+    version = _new_version()
+    cache.set_many({_version_key(u): version for u in user_ids}, timeout=None)
+
+
+def bump_global_perm_version() -> None:
+    cache.set(_version_key(_GLOBAL), _new_version(), timeout=None)
+
+
+def _versions(user_id):
+    keys = [_version_key(_GLOBAL), _version_key(user_id)]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # a lost stamp must not fall back to a value an older entry was keyed on;
+            # add() so concurrent misses agree on one stamp
+            cache.add(key, _new_version(), timeout=None)
+            found[key] = cache.get(key)
+    return found[keys[0]], found[keys[1]]
+
+
+class CachedPermissionBackend(ModelBackend):
+    """ModelBackend whose get_all_permissions() is cached across requests (see module doc)."""
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        # per-request memo, same attribute ModelBackend uses
+        if hasattr(user_obj, "_perm_cache"):
+            return user_obj._perm_cache
+        global_ver, user_ver = _versions(user_obj.pk)
+        key = f"{CACHE_PREFIX_PERMS}{user_obj.pk}:{int(user_obj.is_superuser)}:{global_ver}:{user_ver}"
+        perms = cache.get(key)
+        if perms is None:
+            perms = frozenset(super().get_all_permissions(user_obj, obj))
+            cache.set(key, perms, timeout=_entry_ttl())
+        user_obj._perm_cache = perms
+        return perms
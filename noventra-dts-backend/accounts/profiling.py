@@ -0,0 +1,301 @@
+# backend/apps/accounts/profiling.py
+"""
+Opt-in per-request profiling.
+
+ProfilingMiddleware is a no-op (MiddlewareNotUsed) unless settings.PROFILING_ENABLED.
+When enabled, a request is captured if any trigger matches:
+
+  - X-Profile header carrying a token from `manage.py accounts_profiling --token`
+    (TimestampSigner, valid for PROFILING_TOKEN_MAX_AGE seconds)
+  - random sampling at PROFILING_SAMPLE_RATE (0.0 - 1.0)
+  - the session's user is flagged: settings.PROFILING_USER_IDS, or at runtime with
+    `manage.py accounts_profiling --flag-user <id>` (needs a cache shared with the workers)
+
+A capture holds the profile (cProfile, or a stack sampler with PROFILING_MODE = "sample"),
+plus the SQL and cache call timeline of the request. Captures are gzip JSON files in a
+bounded ring buffer under PROFILING_DIR, listed/downloaded by admins at
+/api/auth/profiling/. Requests that match no trigger pay a header lookup, one random()
+and (only when users are flagged) one cache read.
+"""
+import contextvars
+import cProfile
+import gzip
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+
+from .instrumentation import add_cache_interceptor, add_sql_interceptor
+from .tokens import get_cached_rt_meta, normalize_jti
+
+PROFILING_ENABLED = bool(getattr(settings, "PROFILING_ENABLED", False))
+PROFILING_MODE = getattr(settings, "PROFILING_MODE", "cprofile")  # "cprofile" | "sample"
+PROFILING_SAMPLE_RATE = float(getattr(settings, "PROFILING_SAMPLE_RATE", 0.0))
+PROFILING_PATH_PREFIXES = tuple(getattr(settings, "PROFILING_PATH_PREFIXES", ("/api/",)))
+PROFILING_DIR = Path(getattr(settings, "PROFILING_DIR", Path(settings.BASE_DIR) / "var" / "profiles"))
+PROFILING_MAX_CAPTURES = int(getattr(settings, "PROFILING_MAX_CAPTURES", 200))
+PROFILING_TOKEN_MAX_AGE = int(getattr(settings, "PROFILING_TOKEN_MAX_AGE", 3600))
+PROFILING_SAMPLE_INTERVAL = float(getattr(settings, "PROFILING_SAMPLE_INTERVAL_MS", 5)) / 1000
+PROFILING_TOP_FUNCTIONS = int(getattr(settings, "PROFILING_TOP_FUNCTIONS", 80))
+PROFILING_USER_IDS = frozenset(str(u) for u in getattr(settings, "PROFILING_USER_IDS", ()))
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+PROFILED_USERS_KEY = "profiling:users"
+REFRESH_JTI_COOKIE_NAME = getattr(settings, "REFRESH_JTI_COOKIE_NAME", "refresh_jti")
+
+_SIGNER_SALT = "accounts.profiling"
+
+_recorder: contextvars.ContextVar = contextvars.ContextVar("accounts_profiling_recorder", default=None)
+# one cProfile capture per process: Python >= 3.12 rejects a second enabled profiler
+_cprofile_lock = threading.Lock()
+
+
+# ---------------------------
+# Triggers
+# ---------------------------
+def make_profile_token() -> str:
+    return signing.TimestampSigner(salt=_SIGNER_SALT).sign(uuid.uuid4().hex)
+
+
+def _valid_profile_token(value: str) -> bool:
+    try:
+        signing.TimestampSigner(salt=_SIGNER_SALT).unsign(value, max_age=PROFILING_TOKEN_MAX_AGE)
+        return True
+    except signing.BadSignature:
+        return False
+
+
+def get_profiled_users() -> set:
+    return PROFILING_USER_IDS | (cache.get(PROFILED_USERS_KEY) or set())
+
+
+def set_user_profiling(user_id, enabled: bool) -> set:
+    users = cache.get(PROFILED_USERS_KEY) or set()
+    (users.add if enabled else users.discard)(str(user_id))
+    cache.set(PROFILED_USERS_KEY, users, timeout=None)
+    return users
+
+
+def _trigger(request) -> Optional[str]:
+    header = request.META.get(PROFILE_HEADER)
+    if header and _valid_profile_token(header):
+        return "header"
+    if PROFILING_SAMPLE_RATE and random.random() < PROFILING_SAMPLE_RATE:
+        return "sample"
+    users = get_profiled_users()
+    if users:
+        jti = normalize_jti(request.COOKIES.get(REFRESH_JTI_COOKIE_NAME))
+        meta = get_cached_rt_meta(jti) if jti else None
+        if meta and meta.get("user_id") in users:
+            return "user"
+    return None
+
+
+# ---------------------------
+# Timeline recording
+# ---------------------------
+class _Recorder:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql: List[dict] = []
+        self.cache: List[dict] = []
+
+    def offset_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 3)
+
+
+# interceptors on the hooks shared with tracing (accounts/instrumentation.py); they only
+# record while a capture is active in the current context
+def _cache_interceptor(name, args, kwargs, call):
+    recorder = _recorder.get()
+    if recorder is None:
+        return call()
+    start = recorder.offset_ms()
+    try:
+        return call()
+    finally:
+        key = args[0] if args else kwargs.get("key", kwargs.get("keys"))
+        if not isinstance(key, str):
+            key = f"<{len(key)} keys>" if hasattr(key, "__len__") else None
+        recorder.cache.append({"at_ms": start, "ms": round(recorder.offset_ms() - start, 3), "op": name, "key": key})
+
+
+def _sql_interceptor(execute, sql, params, many, context):
+    recorder = _recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    start = recorder.offset_ms()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        recorder.sql.append({"at_ms": start, "ms": round(recorder.offset_ms() - start, 3),
+                             "alias": context["connection"].alias, "sql": sql[:2000], "many": many})
+
+
+# ---------------------------
+# Profilers
+# ---------------------------
+class _CProfiler:
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        self._profile.enable()
+
+    def stop(self) -> dict:
+        self._profile.disable()
+        stats = pstats.Stats(self._profile)
+        rows = []
+        for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+            rows.append({"function": f"{filename}:{line}({func})", "calls": nc, "primitive_calls": cc,
+                         "tottime_ms": round(tt * 1000, 3), "cumtime_ms": round(ct * 1000, 3)})
+        rows.sort(key=lambda r: r["cumtime_ms"], reverse=True)
+        return {"mode": "cprofile", "functions": rows[:PROFILING_TOP_FUNCTIONS]}
+
+
+class _StackSampler:
+    """Samples the request thread's stack every PROFILING_SAMPLE_INTERVAL; output is collapsed stacks."""
+    def __init__(self):
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._stacks: Counter = Counter()
+        self._sampler = threading.Thread(target=self._run, name="accounts-profiler", daemon=True)
+
+    def start(self):
+        self._sampler.start()
+
+    def _run(self):
+        while not self._stop.wait(PROFILING_SAMPLE_INTERVAL):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_filename}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self._stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> dict:
+        self._stop.set()
+        self._sampler.join()
+        return {
+            "mode": "sample",
+            "interval_ms": PROFILING_SAMPLE_INTERVAL * 1000,
+            "samples": sum(self._stacks.values()),
+            "stacks": dict(self._stacks.most_common()),
+        }
+
+
+# ---------------------------
+# Ring buffer
+# ---------------------------
+def _capture_path(capture_id: str) -> Optional[Path]:
+    # ids are "<ns timestamp>-<hex>"; reject anything else so ids cannot escape PROFILING_DIR
+    head, _, tail = capture_id.partition("-")
+    if not (head.isdigit() and tail.isalnum()):
+        return None
+    return PROFILING_DIR / f"{capture_id}.json.gz"
+
+
+def save_capture(capture: dict) -> str:
+    PROFILING_DIR.mkdir(parents=True, exist_ok=True)
+    capture_id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+    capture["id"] = capture_id
+    tmp = PROFILING_DIR / f".{capture_id}.tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8") as fh:
+        json.dump(capture, fh, default=str)
+    os.replace(tmp, _capture_path(capture_id))
+
+    captures = sorted(PROFILING_DIR.glob("*.json.gz"))
+    for old in captures[:max(len(captures) - PROFILING_MAX_CAPTURES, 0)]:
+        old.unlink(missing_ok=True)
+    return capture_id
+
+
+def list_captures() -> List[Dict]:
+    if not PROFILING_DIR.exists():
+        return []
+    items = []
+    for path in sorted(PROFILING_DIR.glob("*.json.gz"), reverse=True):
+        stat = path.stat()
+        items.append({"id": path.name[:-len(".json.gz")], "bytes": stat.st_size, "created_at": stat.st_mtime})
+    return items
+
+
+def open_capture(capture_id: str):
+    path = _capture_path(capture_id)
+    if path is None or not path.exists():
+        return None
+    return open(path, "rb")
+
+
+# ---------------------------
+# Middleware
+# ---------------------------
+class ProfilingMiddleware:
+    """Put first in MIDDLEWARE so captures cover the whole stack."""
+    def __init__(self, get_response):
+        if not PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        add_cache_interceptor(_cache_interceptor)
+        add_sql_interceptor(_sql_interceptor)
+
+    def __call__(self, request):
+        if not request.path.startswith(PROFILING_PATH_PREFIXES):
+            return self.get_response(request)
+        trigger = _trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+        return self._capture(request, trigger)
+
+    def _capture(self, request, trigger):
+        if PROFILING_MODE == "sample":
+            return self._record(request, trigger, _StackSampler())
+        if not _cprofile_lock.acquire(blocking=False):
+            # another request of this process is under cProfile: serve this one unprofiled
+            return self.get_response(request)
+        try:
+            return self._record(request, trigger, _CProfiler())
+        finally:
+            _cprofile_lock.release()
+
+    def _record(self, request, trigger, profiler):
+        recorder = _Recorder()
+        token = _recorder.set(recorder)
+        started = False
+        try:
+            profiler.start()
+            started = True
+            response = self.get_response(request)
+        finally:
+            duration_ms = recorder.offset_ms()
+            profile = profiler.stop() if started else None
+            _recorder.reset(token)
+
+        user = getattr(request, "user", None)
+        capture_id = save_capture({
+            "trigger": trigger,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "duration_ms": duration_ms,
+            "user_id": str(user.pk) if getattr(user, "is_authenticated", False) else None,
+            "sql": recorder.sql,
+            "cache": recorder.cache,
+            "profile": profile,
+        })
+        response["X-Profile-Id"] = capture_id
+        return response
@@ -0,0 +1,71 @@
+# backend/apps/accounts/renderers.py
+"""
+Pluggable fast JSON backend for DRF.
+
+Uses orjson when it is installed and falls back to the stdlib json module with DRF's
+encoder otherwise. Both produce compact UTF-8 bytes; anything the fast path cannot
+encode natively (Decimal, lazy strings, querysets, ...) goes through DRF's encoder.
+"""
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# set ACCOUNTS_JSON_BACKEND = "stdlib" to force the fallback
+JSON_BACKEND = "orjson" if orjson is not None and getattr(settings, "ACCOUNTS_JSON_BACKEND", "orjson") == "orjson" else "stdlib"
+
+_drf_encoder = encoders.JSONEncoder()
+
+
+def _default(obj):
+    return _drf_encoder.default(obj)
+
+
+if JSON_BACKEND == "orjson":
+    _ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def json_dumps(data) -> bytes:
+        return orjson.dumps(data, default=_default, option=_ORJSON_OPTIONS)
+
+    def json_loads(raw):
+        return orjson.loads(raw)
+
+    JSONDecodeError = orjson.JSONDecodeError
+else:
+    def json_dumps(data) -> bytes:
+        return json.dumps(data, cls=encoders.JSONEncoder, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def json_loads(raw):
+        return json.loads(raw)
+
+    JSONDecodeError = ValueError
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Drop-in JSONRenderer using json_dumps; indented output still goes through DRF."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        return json_dumps(data)
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return json_loads(stream.read())
+        except (JSONDecodeError, UnicodeDecodeError) as exc:
+            raise ParseError(f"JSON parse error - {exc}")
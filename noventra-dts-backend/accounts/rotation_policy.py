@@ -0,0 +1,107 @@
+# backend/apps/accounts/rotation_policy.py
+"""
+Refresh-token rotation policy for TokenRefreshRotateView.
+
+Rotating costs two writes (insert the new RefreshToken row, mark the old one replaced).
+Clients that refresh eagerly (an interceptor retrying every 401, page reloads, several tabs)
+pay that on every call. A policy decides per refresh:
+
+  rotate      -> previous behaviour: new refresh token + cookie, old row revoked/replaced
+  don't       -> a new access token for the same session (its "sid" stays the current jti);
+                 no cookie change, only the throttled last_active touch
+
+Reuse detection is unchanged: a token that was rotated away is still revoked with
+replaced_by_jti, and presenting it revokes every session of the user. The trade-off is the
+window: a stolen, not-yet-rotated refresh token stays valid until the next rotation, i.e.
+for at most REFRESH_ROTATION_MIN_AGE_SECONDS of its owner's activity.
+
+REFRESH_ROTATION_POLICY is a dotted path:
+  accounts.rotation_policy.AlwaysRotate      every refresh rotates
+  accounts.rotation_policy.AgeBasedRotation  rotate when the token is older than
+      REFRESH_ROTATION_MIN_AGE_SECONDS or within REFRESH_ROTATION_NEAR_EXPIRY_SECONDS of expiry
+Custom policies subclass RotationPolicy and implement decide().
+
+rotation_metrics() returns per-process counters by decision and reason.
+"""
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+REFRESH_ROTATION_POLICY = getattr(settings, "REFRESH_ROTATION_POLICY", "accounts.rotation_policy.AlwaysRotate")
+REFRESH_ROTATION_MIN_AGE_SECONDS = int(getattr(settings, "REFRESH_ROTATION_MIN_AGE_SECONDS", 900))
+REFRESH_ROTATION_NEAR_EXPIRY_SECONDS = int(getattr(settings, "REFRESH_ROTATION_NEAR_EXPIRY_SECONDS", 86400))
+
+
+@dataclass(frozen=True)
+class RotationDecision:
+    rotate: bool
+    reason: str
+
+
+class RotationPolicy:
+    def decide(self, created_at: Optional[datetime], expires_at: Optional[datetime], now: datetime) -> RotationDecision:
+        raise NotImplementedError
+
+
+class AlwaysRotate(RotationPolicy):
+    def decide(self, created_at, expires_at, now):
+        return RotationDecision(True, "always")
+
+
+class AgeBasedRotation(RotationPolicy):
+    def __init__(self, min_age_seconds: int = REFRESH_ROTATION_MIN_AGE_SECONDS,
+                 near_expiry_seconds: int = REFRESH_ROTATION_NEAR_EXPIRY_SECONDS):
+        self.min_age_seconds = min_age_seconds
+        self.near_expiry_seconds = near_expiry_seconds
+
+    def decide(self, created_at, expires_at, now):
+        if expires_at is not None and (expires_at - now).total_seconds() <= self.near_expiry_seconds:
+            return RotationDecision(True, "near_expiry")
+        if created_at is None or (now - created_at).total_seconds() >= self.min_age_seconds:
+            return RotationDecision(True, "age")
+        return RotationDecision(False, "fresh")
+
+
+_policy: Optional[RotationPolicy] = None
+
+
+def get_rotation_policy() -> RotationPolicy:
+    global _policy
+    if _policy is None:
+        _policy = import_string(REFRESH_ROTATION_POLICY)()
+    return _policy
+
+
+# ---------------------------
+# Metrics
+# ---------------------------
+_decisions: Counter = Counter()
+_decisions_lock = threading.Lock()
+
+
+def record_rotation_decision(decision: RotationDecision) -> None:
+    with _decisions_lock:
+        _decisions[(decision.rotate, decision.reason)] += 1
+
+
+def rotation_metrics() -> Dict[str, object]:
+    with _decisions_lock:
+        snapshot = dict(_decisions)
+    rotated = sum(n for (rotate, _), n in snapshot.items() if rotate)
+    reused = sum(n for (rotate, _), n in snapshot.items() if not rotate)
+    total = rotated + reused
+    return {
+        "policy": REFRESH_ROTATION_POLICY,
+        "refreshes": total,
+        "rotated": rotated,
+        "access_only": reused,
+        # one insert + one update saved per access-only refresh
+        "writes_saved": reused * 2,
+        "rotation_ratio": round(rotated / total, 4) if total else None,
+        "by_reason": {f"{'rotate' if rotate else 'keep'}:{reason}": n for (rotate, reason), n in sorted(snapshot.items())},
+    }
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from django.conf import settings
+from django.db import models
 from django.utils import timezone
 from datetime import timedelta
 from accounts.models import User, RefreshToken, InviteToken
@@ -12,6 +14,66 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ("id", "email", "full_name", "role", "is_active", "created_at")
 
 
+def _drf_datetime(value):
+    # same output as DRF's DateTimeField (ISO 8601, UTC as "Z")
+    if value is None:
+        return None
+    value = timezone.localtime(value) if timezone.is_aware(value) else value
+    text = value.isoformat()
+    return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+
+class CompiledSerializer:
+    """
+    Read-only serializer for hot paths: works on values() rows instead of model instances
+    and resolves per-field converters once at import time instead of per object.
+    fields are names or (output_name, model_field) pairs; output matches the DRF field
+    representation (UUID -> str, datetime -> ISO 8601). hex_fields are UUID columns sent as
+    32-char hex instead (jtis: the form used by cookies, events and token payloads).
+    """
+    def __init__(self, model, fields, hex_fields=()):
+        self.columns = []
+        self._plan = []
+        for f in fields:
+            out, source = (f, f) if isinstance(f, str) else f
+            self.columns.append(source)
+            self._plan.append((out, source, self._converter(model._meta.get_field(source), source in hex_fields)))
+
+    @staticmethod
+    def _converter(field, as_hex=False):
+        # the fast JSON backend encodes UUIDs natively; datetimes only when they are UTC
+        from .renderers import JSON_BACKEND
+        if as_hex:
+            return lambda v: None if v is None else v.hex
+        if isinstance(field, models.DateTimeField):
+            if JSON_BACKEND == "orjson" and settings.TIME_ZONE == "UTC":
+                return None
+            return _drf_datetime
+        if isinstance(field, models.UUIDField) and JSON_BACKEND != "orjson":
+            return lambda v: None if v is None else str(v)
+        return None
+
+    def to_representation(self, row):
+        return {out: (row[src] if conv is None else conv(row[src])) for out, src, conv in self._plan}
+
+    def to_representation_many(self, rows):
+        return [self.to_representation(r) for r in rows]
+
+    def render(self, rows, many=True) -> bytes:
+        from .renderers import json_dumps
+        if many:
+            return json_dumps(self.to_representation_many(rows))
+        return json_dumps(self.to_representation(rows))
+
+
+compiled_user_serializer = CompiledSerializer(User, UserSerializer.Meta.fields)
+
+compiled_session_serializer = CompiledSerializer(RefreshToken, (
+    "jti", "created_at", "expires_at", "revoked", "revoked_reason", "replaced_by_jti",
+    "device", ("ip", "ip_address"), "last_active",
+), hex_fields=("jti", "replaced_by_jti"))
+
+
 class LoginSerializer(serializers.Serializer):
     """
     Accept either 'email' or 'username' as identifier to support multiple frontends/clients.
@@ -102,7 +164,7 @@ class RegisterSerializer(serializers.Serializer):
 
     def validate_email(self, value):
         normalized = value.strip().lower()
-        if User.objects.filter(email__iexact=normalized).exists():
+        if User.objects.filter_by_email(normalized).exists():
             raise serializers.ValidationError("A user with that email already exists.")
         return normalized
 
@@ -0,0 +1,88 @@
+# backend/apps/accounts/sharding.py
+"""
+Hash partitioning of RefreshToken rows across database aliases.
+
+A user's tokens live on one shard: bucket = first byte of blake2b(user id) (256 buckets),
+alias = REFRESH_TOKEN_SHARD_MAP[bucket] if mapped, else
+REFRESH_TOKEN_SHARDS[bucket % len(REFRESH_TOKEN_SHARDS)].
+
+Refresh jtis carry the bucket in their first byte (make_jti), so a jti alone (middleware,
+logout, refresh) routes to its shard without fan-out. jtis issued before sharding, or
+rows not yet moved by `manage.py accounts_rebalance_tokens`, are found by falling back to
+the other shards on a miss (REFRESH_TOKEN_JTI_FALLBACK; turn off once they have expired).
+
+With the default REFRESH_TOKEN_SHARDS = ["default"] nothing is partitioned and token
+reads go through the normal routers (read replicas included).
+"""
+import hashlib
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+SHARD_BUCKETS = 256
+REFRESH_TOKEN_SHARDS: List[str] = list(getattr(settings, "REFRESH_TOKEN_SHARDS", [DEFAULT_DB_ALIAS]))
+REFRESH_TOKEN_SHARD_MAP: Dict[int, str] = dict(getattr(settings, "REFRESH_TOKEN_SHARD_MAP", {}))
+REFRESH_TOKEN_JTI_FALLBACK = bool(getattr(settings, "REFRESH_TOKEN_JTI_FALLBACK", True))
+
+
+def is_sharded(shards: Optional[List[str]] = None) -> bool:
+    shards = REFRESH_TOKEN_SHARDS if shards is None else shards
+    return len(set(shards) | set(REFRESH_TOKEN_SHARD_MAP.values())) > 1
+
+
+def bucket_for_user(user_id) -> int:
+    user_id = _as_uuid(user_id)
+    raw = user_id.bytes if isinstance(user_id, uuid.UUID) else str(user_id).encode()
+    return hashlib.blake2b(raw, digest_size=1).digest()[0]
+
+
+def alias_for_bucket(bucket: int, shards: Optional[List[str]] = None) -> str:
+    if shards is None:
+        if bucket in REFRESH_TOKEN_SHARD_MAP:
+            return REFRESH_TOKEN_SHARD_MAP[bucket]
+        shards = REFRESH_TOKEN_SHARDS
+    return shards[bucket % len(shards)]
+
+
+def shard_for_user(user_id, shards: Optional[List[str]] = None) -> str:
+    return alias_for_bucket(bucket_for_user(user_id), shards)
+
+
+def make_jti(user_id) -> str:
+    """Random uuid4 hex whose first byte is the user's bucket."""
+    raw = bytearray(uuid.uuid4().bytes)
+    raw[0] = bucket_for_user(user_id)
+    return uuid.UUID(bytes=bytes(raw)).hex
+
+
+def shard_for_jti(jti) -> str:
+    try:
+        bucket = (jti if isinstance(jti, uuid.UUID) else uuid.UUID(str(jti))).bytes[0]
+    except (TypeError, ValueError):
+        return REFRESH_TOKEN_SHARDS[0]
+    return alias_for_bucket(bucket)
+
+
+def all_shards() -> List[str]:
+    seen = dict.fromkeys(REFRESH_TOKEN_SHARDS)
+    seen.update(dict.fromkeys(REFRESH_TOKEN_SHARD_MAP.values()))
+    return list(seen)
+
+
+def group_by_shard(user_ids: Iterable) -> Dict[str, list]:
+    groups: Dict[str, list] = {}
+    for user_id in user_ids:
+        groups.setdefault(shard_for_user(user_id), []).append(user_id)
+    return groups
+
+
+def _as_uuid(user_id):
+    # hash the canonical UUID bytes so "ABC-..." / UUID(...) / hex forms agree
+    if isinstance(user_id, uuid.UUID):
+        return user_id
+    try:
+        return uuid.UUID(str(user_id))
+    except ValueError:
+        return user_id
@@ -1,11 +1,75 @@
-from django.db.models.signals import post_save
+from django.contrib.auth.models import Group, Permission
+from django.db.models.signals import m2m_changed, post_migrate, post_save, post_delete, pre_delete
 from django.dispatch import receiver
-from accounts.models import User
+from accounts.models import User, RefreshToken
 from accounts.tokens import create_email_verification
 from accounts.utils import send_verification_email
+from accounts.user_cache import invalidate_user_data, bump_user_version, VERSIONED_USER_FIELDS
+from accounts.events import publish_event, EVENT_PROFILE_CHANGED
+from accounts.db_router import pin_to_primary
+from accounts.sharding import all_shards, is_sharded
+from accounts.perm_cache import bump_global_perm_version, bump_user_perm_versions
 
 @receiver(post_save, sender=User)
 def create_verification(sender, instance, created, **kwargs):
     if created and not instance.is_active:
         v = create_email_verification(instance)
         send_verification_email(v)
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    invalidate_user_data(instance.pk)
+    pin_to_primary([instance.pk])
+
+@receiver(pre_delete, sender=User)
+def delete_sharded_refresh_tokens(sender, instance, using, **kwargs):
+    # the FK cascade only reaches tokens on the user's own database; raw DELETE, since the
+    # ORM cascade would query the unmanaged Session view
+    if is_sharded():
+        for alias in all_shards():
+            if alias != using:
+                RefreshToken.objects.using(alias).filter(user_id=instance.pk)._raw_delete(alias)
+
+@receiver(post_save, sender=User)
+def bump_user_cache_version(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or VERSIONED_USER_FIELDS.intersection(update_fields):
+        bump_user_version(instance)
+
+@receiver(post_save, sender=User)
+def push_profile_changed(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        return
+    changed = VERSIONED_USER_FIELDS if update_fields is None else VERSIONED_USER_FIELDS.intersection(update_fields)
+    if changed:
+        publish_event(instance.pk, EVENT_PROFILE_CHANGED, fields=sorted(changed), is_active=instance.is_active)
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_user_perms(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        bump_user_perm_versions([instance.pk])
+    elif pk_set is not None:
+        # group.accounts_user_set.add(...) / permission.accounts_user_set_permissions.remove(...)
+        bump_user_perm_versions(pk_set)
+    else:
+        # reverse clear: the affected users are no longer known
+        bump_global_perm_version()
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_group_perms(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_global_perm_version()
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+@receiver(post_save, sender=Permission)
+def invalidate_perms_on_delete(sender, **kwargs):
+    bump_global_perm_version()
+
+@receiver(post_migrate)
+def invalidate_perms_after_migrate(sender, **kwargs):
+    # migrations create / rename Permission rows with bulk operations that send no signals
+    bump_global_perm_version()
@@ -0,0 +1,88 @@
+# backend/apps/accounts/sqlite.py
+"""
+SQLite production profile for single-node deployments.
+
+With SQLITE_PROFILE = "production" every new SQLite connection gets PRODUCTION_PRAGMAS
+(or settings.SQLITE_PRAGMAS when set) via connection_created.
+BEGIN IMMEDIATE comes from DATABASES OPTIONS["transaction_mode"] and the write-lock wait from
+OPTIONS["timeout"] = SQLITE_BUSY_TIMEOUT (see Ndts/settings.py); no PRAGMA busy_timeout is
+issued, since it would silently override that value.
+
+SQLITE_SINGLE_WRITER additionally funnels the refresh-token writes in accounts.tokens
+through one writer thread, so threads of a worker never compete for the write lock.
+"""
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+PRODUCTION_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",       # fsync on checkpoint, not every commit (safe with WAL)
+    "mmap_size": 268435456,        # 256 MiB
+    "cache_size": -65536,          # 64 MiB (negative = KiB)
+    "temp_store": "MEMORY",
+}
+
+
+def get_pragmas() -> Dict[str, object]:
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", None)
+    if pragmas is not None:
+        return pragmas
+    if getattr(settings, "SQLITE_PROFILE", "") == "production":
+        return PRODUCTION_PRAGMAS
+    return {}
+
+
+def apply_pragmas(connection, pragmas: Dict[str, object]) -> None:
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    if connection.vendor == "sqlite":
+        pragmas = get_pragmas()
+        if pragmas:
+            apply_pragmas(connection, pragmas)
+
+
+# ---------------------------
+# Single writer thread
+# ---------------------------
+_writer: Optional[ThreadPoolExecutor] = None
+
+
+def _get_writer() -> ThreadPoolExecutor:
+    global _writer
+    if _writer is None:
+        _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+        atexit.register(_writer.shutdown, wait=True)
+    return _writer
+
+
+def _close_after(fn, args, kwargs):
+    from django.db import close_old_connections
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def run_write(fn, *args, using: str = DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Run a self-contained write (no caller transaction required) on the writer thread when
+    SQLITE_SINGLE_WRITER is enabled, otherwise inline. Blocks until the result is ready.
+    using is the database alias fn writes to.
+    """
+    if not getattr(settings, "SQLITE_SINGLE_WRITER", False):
+        return fn(*args, **kwargs)
+    if connections[using].in_atomic_block:
+        # must stay on the caller's connection to be part of its transaction
+        return fn(*args, **kwargs)
+    return _get_writer().submit(_close_after, fn, args, kwargs).result()
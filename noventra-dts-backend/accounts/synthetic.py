@@ -0,0 +1,247 @@
+# backend/apps/accounts/synthetic.py
+"""
+Seeded synthetic data for capacity testing (see `manage.py accounts_generate_data`).
+
+Users are generated in chunks; every chunk gets its own Random(seed, first user index), so
+the output is identical whatever the worker count, and runs with a different start_index
+never collide. Rows are written with bulk_create, which
+sends no post_save signals (no verification emails, no cache invalidation), and every
+user shares one precomputed password hash.
+
+Per user:
+  sessions        ~ exponential(sessions_mean), each a rotation chain t0 -> t1 -> ... -> tN
+                    linked by replaced_by_jti; N ~ exponential(rotation_depth_mean)
+  chain head      live, or revoked with probability revoked_fraction
+  verification    inactive users get one pending EmailVerificationToken
+  password reset  with probability reset_fraction
+Invites are spread over the chunks, invited_by a random staff user of the chunk.
+"""
+import math
+import multiprocessing
+import random
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Iterator, List, Tuple
+
+from django.db import connections, transaction
+
+from .models import (
+    EmailVerificationToken,
+    InviteToken,
+    PasswordResetToken,
+    RefreshToken,
+    User,
+)
+from .sharding import bucket_for_user, is_sharded, shard_for_user
+
+ROLE_WEIGHTS = (
+    ("EMPLOYEE", 80.0),
+    ("TEAM_LEAD", 8.0),
+    ("CLIENT", 7.0),
+    ("HR", 3.0),
+    ("ADMIN", 1.9),
+    ("SUPER_ADMIN", 0.1),
+)
+REVOKE_REASONS = ("user_logout", "admin_revoked", "revoked_all", "replay_detected_reuse")
+DEVICES = ("Chrome on Windows", "Safari on iOS", "Firefox on Linux", "Chrome on Android", "Edge on Windows")
+MAX_SESSIONS = 50
+MAX_ROTATIONS = 200
+
+_MODELS_WITH_CREATED_AT = (User, RefreshToken, InviteToken, EmailVerificationToken, PasswordResetToken)
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    users: int
+    seed: int = 42
+    start_index: int = 0
+    chunk_size: int = 5000
+    batch_size: int = 5000
+    sessions_mean: float = 3.0
+    rotation_depth_mean: float = 4.0
+    revoked_fraction: float = 0.15
+    inactive_fraction: float = 0.05
+    reset_fraction: float = 0.05
+    invites: int = 0
+    email_domain: str = "synthetic.test"
+    history_days: int = 365
+    password_hash: str = ""
+    now_ts: float = 0.0
+
+
+@contextmanager
+def explicit_created_at():
+    """Let bulk_create keep the generated created_at values instead of auto_now_add's now()."""
+    fields = [m._meta.get_field("created_at") for m in _MODELS_WITH_CREATED_AT]
+    saved = [f.auto_now_add for f in fields]
+    for f in fields:
+        f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, value in zip(fields, saved):
+            f.auto_now_add = value
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _jti(rng: random.Random, bucket: int) -> uuid.UUID:
+    # same layout as sharding.make_jti, drawn from the chunk's rng
+    raw = bytearray(_uuid(rng).bytes)
+    raw[0] = bucket
+    return uuid.UUID(bytes=bytes(raw))
+
+
+def _count(rng: random.Random, mean: float, cap: int) -> int:
+    if mean <= 0:
+        return 0
+    return min(int(rng.expovariate(1 / mean)), cap)
+
+
+def _chunks(spec: DatasetSpec) -> List[Tuple[int, int, int]]:
+    """(chunk index, first user index, user count) for every chunk."""
+    n_chunks = math.ceil(spec.users / spec.chunk_size)
+    return [
+        (i, spec.start_index + i * spec.chunk_size, min(spec.chunk_size, spec.users - i * spec.chunk_size))
+        for i in range(n_chunks)
+    ]
+
+
+def build_chunk(spec: DatasetSpec, chunk_index: int, first: int, count: int) -> Dict[str, list]:
+    """Build (unsaved) model instances for one chunk of users."""
+    rng = random.Random(f"{spec.seed}:{first}")
+    now = datetime.fromtimestamp(spec.now_ts, dt_timezone.utc)
+    history = spec.history_days * 86400
+    roles, weights = zip(*ROLE_WEIGHTS)
+    rows: Dict[str, list] = {"users": [], "refresh_tokens": [], "verifications": [], "resets": [], "invites": []}
+
+    for idx in range(first, first + count):
+        created = now - timedelta(seconds=rng.random() * history)
+        active = rng.random() >= spec.inactive_fraction
+        role = rng.choices(roles, weights)[0]
+        user = User(
+            id=_uuid(rng),
+            email=f"user{idx:09d}@{spec.email_domain}",
+            full_name=f"Synthetic User {idx}",
+            role=role,
+            is_active=active,
+            is_staff=role in ("SUPER_ADMIN", "ADMIN"),
+            password=spec.password_hash,
+            created_at=created,
+        )
+        rows["users"].append(user)
+
+        if not active:
+            rows["verifications"].append(EmailVerificationToken(
+                user_id=user.id, token_hash=_uuid(rng), created_at=created,
+                expires_at=created + timedelta(hours=48), used=False,
+            ))
+            continue
+
+        if rng.random() < spec.reset_fraction:
+            reset_at = created + (now - created) * rng.random()
+            rows["resets"].append(PasswordResetToken(
+                user_id=user.id, token_hash=_uuid(rng), created_at=reset_at,
+                expires_at=reset_at + timedelta(hours=4), used=rng.random() < 0.7,
+            ))
+
+        for _ in range(_count(rng, spec.sessions_mean, MAX_SESSIONS)):
+            started = created + (now - created) * rng.random()
+            device = rng.choice(DEVICES)
+            ip = f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}"
+            depth = _count(rng, spec.rotation_depth_mean, MAX_ROTATIONS)
+            chain = [_jti(rng, bucket_for_user(user.id)) for _ in range(depth + 1)]
+            step = (now - started) / (depth + 1)
+            for i, jti in enumerate(chain):
+                issued = started + step * i
+                head = i == depth
+                revoked = not head or rng.random() < spec.revoked_fraction
+                rows["refresh_tokens"].append(RefreshToken(
+                    id=_uuid(rng),
+                    jti=jti,
+                    user_id=user.id,
+                    created_at=issued,
+                    expires_at=issued + timedelta(days=30),
+                    last_active=issued + step * rng.random(),
+                    revoked=revoked,
+                    revoked_reason=None if not revoked else ("rotated" if not head else rng.choice(REVOKE_REASONS)),
+                    replaced_by_jti=None if head else chain[i + 1],
+                    device=device,
+                    ip_address=ip,
+                ))
+
+    staff = [u.id for u in rows["users"] if u.is_staff] or [None]
+    total_chunks = math.ceil(spec.users / spec.chunk_size)
+    n_invites = spec.invites // total_chunks + (1 if chunk_index < spec.invites % total_chunks else 0)
+    for j in range(n_invites):
+        sent = now - timedelta(seconds=rng.random() * history)
+        rows["invites"].append(InviteToken(
+            email=f"invite{first:09d}-{j:06d}@{spec.email_domain}",
+            token_hash=_uuid(rng),
+            invited_by_id=rng.choice(staff),
+            created_at=sent,
+            expires_at=sent + timedelta(hours=72),
+            used=rng.random() < 0.6,
+        ))
+    return rows
+
+
+def write_chunk(rows: Dict[str, list], batch_size: int) -> Dict[str, int]:
+    with explicit_created_at(), transaction.atomic():
+        User.objects.bulk_create(rows["users"], batch_size=batch_size)
+        if not is_sharded():
+            RefreshToken.objects.bulk_create(rows["refresh_tokens"], batch_size=batch_size)
+        EmailVerificationToken.objects.bulk_create(rows["verifications"], batch_size=batch_size)
+        PasswordResetToken.objects.bulk_create(rows["resets"], batch_size=batch_size)
+        InviteToken.objects.bulk_create(rows["invites"], batch_size=batch_size)
+    if is_sharded():
+        by_shard: Dict[str, list] = {}
+        for rt in rows["refresh_tokens"]:
+            by_shard.setdefault(shard_for_user(rt.user_id), []).append(rt)
+        for alias, objs in by_shard.items():
+            with explicit_created_at(), transaction.atomic(using=alias):
+                RefreshToken.objects.using(alias).bulk_create(objs, batch_size=batch_size)
+    return {name: len(objs) for name, objs in rows.items()}
+
+
+def _init_worker():
+    # forked workers must not reuse the parent's DB connections
+    connections.close_all()
+
+
+def _generate_chunk(args) -> Dict[str, int]:
+    spec, chunk_index, first, count = args
+    return write_chunk(build_chunk(spec, chunk_index, first, count), spec.batch_size)
+
+
+def generate(spec: DatasetSpec, workers: int = 1) -> Iterator[Dict]:
+    """Write the dataset, yielding cumulative per-model row counts and rows/sec after each chunk."""
+    if not spec.now_ts:
+        raise ValueError("spec.now_ts must be set so runs are reproducible")
+    started = time.monotonic()
+    totals: Dict[str, int] = {}
+    jobs = [(spec, *chunk) for chunk in _chunks(spec)]
+    if workers > 1:
+        connections.close_all()
+        # fork: children inherit the configured Django app registry
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+            results = pool.map(_generate_chunk, jobs)
+            yield from _progress(results, totals, started)
+    else:
+        yield from _progress(map(_generate_chunk, jobs), totals, started)
+
+
+def _progress(results, totals, started):
+    for done, counts in enumerate(results, start=1):
+        for name, n in counts.items():
+            totals[name] = totals.get(name, 0) + n
+        elapsed = time.monotonic() - started
+        rows = sum(totals.values())
+        yield {"chunks_done": done, "rows": dict(totals), "rows_per_sec": round(rows / elapsed) if elapsed else None}
@@ -1,3 +1,699 @@
-from django.test import TestCase
+import hashlib
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import make_password
+from django.apps import apps
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connections
+from django.db.models.signals import post_migrate
+from django.db.models.query import QuerySet
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .db_router import pin_to_primary, read_from, replica_for
+from .middleware import REFRESH_JTI_COOKIE_NAME, SessionCookieMiddleware
+from .models import RefreshToken, User
+from .perm_cache import _versions
+from .rotation_policy import AgeBasedRotation
+from .sharding import shard_for_user
+from . import sqlite, transfer, user_cache
+from .transfer import import_users
+from .tokens import (
+    RT_META_FIELDS,
+    RefreshTokenReused,
+    _cache_key,
+    create_stored_refresh_token,
+    get_cached_rt_meta,
+    make_refresh_handle,
+    mint_access_token,
+    rotate_refresh_token,
+    rt_meta_from_row,
+)
+from .views import REFRESH_HANDLE_COOKIE_NAME, REFRESH_REQUIRED_HEADER_NAME, REFRESH_TOKEN_COOKIE_NAME
+
+REPLICA = "replica_test"
+SHARD = "shard_test"
+
+
+def _add_memory_alias(alias, models):
+    # the alias must exist (with its tables) before TestCase resolves "__all__"
+    connections.settings[alias] = {**connections["default"].settings_dict, "NAME": ":memory:"}
+    with connections[alias].schema_editor() as editor:
+        for model in models:
+            editor.create_model(model)
+
+
+def _drop_alias(alias):
+    connections[alias].close()
+    del connections[alias]
+    del connections.settings[alias]
+
+
+class ReplicaRoutingTests(TestCase):
+    """
+    Two SQLite aliases: the test database as primary and an in-memory replica that only
+    gets the rows a test copies into it, so replication lag is explicit.
+    """
+
+    databases = "__all__"
+
+    @classmethod
+    def setUpClass(cls):
+        _add_memory_alias(REPLICA, [User, RefreshToken])
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        _drop_alias(REPLICA)
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch("accounts.db_router.REPLICA_ALIASES", [REPLICA])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create(
+            email="replica@example.com", full_name="Replica", password=make_password(None), is_active=True
+        )
+        self.user.save(using=REPLICA)
+        _, _, self.jti, self.db_rt = create_stored_refresh_token(self.user)
+        # replicate the live row, then revoke it on the primary only
+        RefreshToken.objects.using(REPLICA).bulk_create([self.db_rt])
+        RefreshToken.objects.filter(pk=self.db_rt.pk).update(revoked=True, revoked_reason="logout")
+        cache.clear()
+
+    def _request(self):
+        request = RequestFactory().get("/api/auth/me/")
+        request.COOKIES[REFRESH_JTI_COOKIE_NAME] = self.jti
+        return SessionCookieMiddleware(lambda r: HttpResponse("ok"))(request)
+
+    def test_session_check_reads_revocation_from_primary(self):
+        response = self._request()
+        self.assertEqual(response.status_code, 401)
+        self.assertIsNone(cache.get(_cache_key(self.jti)))
+
+    def test_session_check_caches_primary_row(self):
+        RefreshToken.objects.filter(pk=self.db_rt.pk).update(revoked=False)
+        response = self._request()
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(get_cached_rt_meta(self.jti)["revoked"])
+
+    def test_display_reads_use_replica_until_pinned(self):
+        with read_from(replica_for(self.user.pk)):
+            self.assertFalse(RefreshToken.objects.get(pk=self.db_rt.pk).revoked)
+        pin_to_primary([self.user.pk])
+        with read_from(replica_for(self.user.pk)):
+            self.assertTrue(RefreshToken.objects.get(pk=self.db_rt.pk).revoked)
+
+
+class OpaqueRefreshTests(TestCase):
+    """Refresh with an opaque handle cookie, from the DB row and from a middleware-primed cache."""
+
+    def setUp(self):
+        cache.clear()
+        for module in ("accounts.tokens", "accounts.views", "accounts.middleware"):
+            patcher = mock.patch(f"{module}.REFRESH_TOKEN_MODE", "opaque")
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.user = User.objects.create(
+            email="opaque@example.com", full_name="Opaque", password=make_password(None), is_active=True
+        )
+        _, self.handle, self.jti, self.db_rt = create_stored_refresh_token(self.user)
+
+    def _refresh(self, handle):
+        self.client.cookies[REFRESH_HANDLE_COOKIE_NAME] = handle
+        return self.client.post(reverse("token-refresh-rotate"), headers={REFRESH_REQUIRED_HEADER_NAME: "1"})
+
+    def _prime_from_middleware(self):
+        cache.clear()
+        access = mint_access_token(self.user, self.jti)
+        request = RequestFactory().get("/api/auth/me/", HTTP_AUTHORIZATION=f"Bearer {access}")
+        response = SessionCookieMiddleware(lambda r: HttpResponse("ok"))(request)
+        self.assertEqual(response.status_code, 200)
+
+    def test_handle_refresh_rotates(self):
+        response = self._refresh(self.handle)
+        self.assertEqual(response.status_code, 200)
+        new_handle = response.cookies[REFRESH_HANDLE_COOKIE_NAME].value
+        self.assertNotEqual(new_handle, self.handle)
+        self.db_rt.refresh_from_db()
+        self.assertTrue(self.db_rt.revoked)
+        self.assertIsNotNone(self.db_rt.replaced_by_jti)
+
+    def test_handle_with_wrong_secret_is_rejected_without_revoking(self):
+        forged, _ = make_refresh_handle(self.jti)
+        self.assertEqual(self._refresh(forged).status_code, 401)
+        self.db_rt.refresh_from_db()
+        self.assertFalse(self.db_rt.revoked)
+
+    def test_middleware_primes_the_same_meta_as_the_token_helpers(self):
+        self._prime_from_middleware()
+        row = RefreshToken.objects.filter(pk=self.db_rt.pk).values(*RT_META_FIELDS).get()
+        self.assertEqual(get_cached_rt_meta(self.jti), rt_meta_from_row(row))
+        self.assertIsNotNone(get_cached_rt_meta(self.jti)["handle_hash"])
+
+    def test_refresh_trusts_primed_cache_for_matching_handle(self):
+        self._prime_from_middleware()
+        # a revocation visible only in the cache: honoured only if the primed handle_hash matched
+        meta = get_cached_rt_meta(self.jti)
+        cache.set(_cache_key(self.jti), {**meta, "revoked": True})
+        self.assertEqual(self._refresh(self.handle).status_code, 401)
+        self.db_rt.refresh_from_db()
+        self.assertFalse(self.db_rt.revoked)
+
+
+class RotationTests(TestCase):
+    """Rotation claims the old row conditionally; presenting a rotated token revokes everything."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email="rotate@example.com", full_name="Rotate", password=make_password(None), is_active=True
+        )
+        _, self.refresh, self.jti, self.db_rt = create_stored_refresh_token(self.user)
+
+    def _refresh(self, refresh_str):
+        self.client.cookies[REFRESH_TOKEN_COOKIE_NAME] = refresh_str
+        return self.client.post(reverse("token-refresh-rotate"), headers={REFRESH_REQUIRED_HEADER_NAME: "1"})
+
+    def test_rotation_claims_old_row(self):
+        _, _, new_jti, new_rt = rotate_refresh_token(self.db_rt, self.user)
+        self.db_rt.refresh_from_db()
+        self.assertTrue(self.db_rt.revoked)
+        self.assertEqual(self.db_rt.revoked_reason, "rotated")
+        self.assertEqual(self.db_rt.replaced_by_jti.hex, new_jti)
+        self.assertFalse(new_rt.revoked)
+
+    def test_second_rotation_of_stale_row_is_refused(self):
+        stale = RefreshToken.objects.get(pk=self.db_rt.pk)
+        rotate_refresh_token(self.db_rt, self.user)
+        with self.assertRaises(RefreshTokenReused):
+            rotate_refresh_token(stale, self.user)
+        # the losing rotation created nothing
+        self.assertEqual(RefreshToken.objects.filter(user=self.user).count(), 2)
+
+    def test_reusing_rotated_token_revokes_all_sessions(self):
+        _, _, _, other = create_stored_refresh_token(self.user)
+        response = self._refresh(self.refresh)
+        self.assertEqual(response.status_code, 200)
+        new_refresh = response.cookies[REFRESH_TOKEN_COOKIE_NAME].value
+
+        self.assertEqual(self._refresh(self.refresh).status_code, 401)
+        self.assertFalse(RefreshToken.objects.filter(user=self.user, revoked=False).exists())
+        other.refresh_from_db()
+        self.assertTrue(other.revoked)
+        self.assertEqual(self._refresh(new_refresh).status_code, 401)
+
+
+class AgeBasedRotationTests(TestCase):
+    """Fresh tokens get an access token only; old, near-expiry and rotated-away tokens don't."""
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch("accounts.views.get_rotation_policy", return_value=AgeBasedRotation(3600, 86400))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create(
+            email="age@example.com", full_name="Age", password=make_password(None), is_active=True
+        )
+        _, self.refresh, self.jti, self.db_rt = create_stored_refresh_token(self.user)
+
+    def _refresh(self, refresh_str):
+        self.client.cookies[REFRESH_TOKEN_COOKIE_NAME] = refresh_str
+        return self.client.post(reverse("token-refresh-rotate"), headers={REFRESH_REQUIRED_HEADER_NAME: "1"})
+
+    def test_decide(self):
+        policy = AgeBasedRotation(3600, 86400)
+        now = timezone.now()
+        expires = now + timedelta(days=30)
+        self.assertEqual(policy.decide(now - timedelta(minutes=5), expires, now).reason, "fresh")
+        self.assertFalse(policy.decide(now - timedelta(minutes=5), expires, now).rotate)
+        self.assertEqual(policy.decide(now - timedelta(hours=2), expires, now).reason, "age")
+        self.assertEqual(policy.decide(now - timedelta(minutes=5), now + timedelta(hours=1), now).reason, "near_expiry")
+        self.assertTrue(policy.decide(None, None, now).rotate)
+
+    def test_fresh_token_keeps_session(self):
+        response = self._refresh(self.refresh)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(REFRESH_TOKEN_COOKIE_NAME, response.cookies)
+        self.assertEqual(AccessToken(response.json()["access"])["sid"], self.jti)
+        self.db_rt.refresh_from_db()
+        self.assertFalse(self.db_rt.revoked)
+        # the same cookie keeps working
+        self.assertEqual(self._refresh(self.refresh).status_code, 200)
+
+    def test_old_token_rotates(self):
+        RefreshToken.objects.filter(pk=self.db_rt.pk).update(created_at=timezone.now() - timedelta(hours=2))
+        cache.clear()
+        response = self._refresh(self.refresh)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(REFRESH_TOKEN_COOKIE_NAME, response.cookies)
+        self.db_rt.refresh_from_db()
+        self.assertTrue(self.db_rt.revoked)
+
+    def test_rotated_away_token_is_still_reuse(self):
+        RefreshToken.objects.filter(pk=self.db_rt.pk).update(created_at=timezone.now() - timedelta(hours=2))
+        cache.clear()
+        self.assertEqual(self._refresh(self.refresh).status_code, 200)
+        self.assertEqual(self._refresh(self.refresh).status_code, 401)
+        self.assertFalse(RefreshToken.objects.filter(user=self.user, revoked=False).exists())
+
+
+class IntrospectionTests(TestCase):
+    SERVICE_KEY = "test-service-key"
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch(
+            "accounts.introspection._KEY_DIGESTS", {"svc": hashlib.sha256(self.SERVICE_KEY.encode()).digest()}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create(
+            email="introspect@example.com", full_name="Introspect", password=make_password(None), is_active=True
+        )
+        _, _, self.jti, self.db_rt = create_stored_refresh_token(self.user)
+
+    def _introspect(self, body, key=SERVICE_KEY):
+        headers = {"Authorization": f"Service {key}"} if key else {}
+        return self.client.post(reverse("introspect"), body, content_type="application/json", headers=headers)
+
+    def test_rejects_missing_and_wrong_keys(self):
+        self.assertEqual(self._introspect({"jtis": [self.jti]}, key=None).status_code, 401)
+        self.assertEqual(self._introspect({"jtis": [self.jti]}, key="not-the-key").status_code, 401)
+        response = self.client.post(
+            reverse("introspect"), {"jtis": [self.jti]}, content_type="application/json",
+            headers={"Authorization": f"Bearer {self.SERVICE_KEY}"},
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_non_string_tokens_are_invalid(self):
+        response = self._introspect({"tokens": [123, None, "", {"a": 1}, "not.a.jwt"]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item["r"] for item in response.json()["tokens"]], ["invalid"] * 5)
+
+    def test_active_revoked_and_rotated_sessions(self):
+        access = mint_access_token(self.user, self.jti)
+        body = {"jtis": [self.jti], "tokens": [access]}
+        items = self._introspect(body).json()
+        self.assertEqual(items["jtis"][0]["a"], 1)
+        self.assertEqual(items["tokens"][0]["s"], self.jti)
+
+        RefreshToken.objects.filter(pk=self.db_rt.pk).update(revoked=True, revoked_reason="logout")
+        cache.clear()
+        items = self._introspect(body).json()
+        self.assertEqual(items["jtis"][0], {"a": 0, "r": "revoked", "ttl": items["jtis"][0]["ttl"]})
+        self.assertEqual(items["tokens"][0]["r"], "revoked")
+
+        _, _, jti, db_rt = create_stored_refresh_token(self.user)
+        rotate_refresh_token(db_rt, self.user)
+        self.assertEqual(self._introspect({"jtis": [jti]}).json()["jtis"][0]["r"], "rotated")
+
+    def test_malformed_and_unknown_jtis(self):
+        items = self._introspect({"jtis": ["nope", 5, "0" * 32]}).json()["jtis"]
+        self.assertEqual([item["r"] for item in items], ["invalid", "invalid", "unknown"])
+
+
+class ShardingTests(TestCase):
+    """
+    RefreshToken rows split between the test database and an in-memory shard that has no
+    user table (RefreshToken.user has db_constraint=False for exactly this).
+    """
+
+    databases = "__all__"
+
+    @classmethod
+    def setUpClass(cls):
+        _add_memory_alias(SHARD, [RefreshToken])
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        _drop_alias(SHARD)
+
+    def setUp(self):
+        cache.clear()
+        self._shards(["default", SHARD])
+        self.users = {}
+        while len(self.users) < 2:
+            user = User.objects.create(
+                email=f"shard{User.objects.count()}@example.com", full_name="Shard",
+                password=make_password(None), is_active=True,
+            )
+            self.users.setdefault(shard_for_user(user.pk), user)
+
+    def _shards(self, shards):
+        patcher = mock.patch("accounts.sharding.REFRESH_TOKEN_SHARDS", shards)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _aliases_holding(self, jti):
+        return [alias for alias in ("default", SHARD) if RefreshToken.objects.using(alias).filter(jti=jti).exists()]
+
+    def _rebalance(self):
+        call_command("accounts_rebalance_tokens", stdout=StringIO(), stderr=StringIO())
+
+    def test_tokens_route_to_the_users_shard(self):
+        for alias, user in self.users.items():
+            _, _, jti, db_rt = create_stored_refresh_token(user)
+            self.assertEqual(self._aliases_holding(jti), [alias])
+            self.assertEqual(RefreshToken.objects.get_by_jti(jti).pk, db_rt.pk)
+            self.assertEqual(list(RefreshToken.objects.for_user(user.pk).values_list("pk", flat=True)), [db_rt.pk])
+            # writes through the loaded row stay on its shard, rt.user comes from the primary
+            db_rt.revoke(reason="logout")
+            self.assertTrue(RefreshToken.objects.using(alias).get(pk=db_rt.pk).revoked)
+            self.assertEqual(RefreshToken.objects.get_by_jti(jti).user, user)
+
+    def test_rebalance_moves_rows_then_rotation_stays_on_shard(self):
+        user = self.users[SHARD]
+        self._shards(["default"])
+        _, refresh, jti, _ = create_stored_refresh_token(user)
+        self.assertEqual(self._aliases_holding(jti), ["default"])
+
+        self._shards(["default", SHARD])
+        # before the move, the jti is still found through the fallback
+        self.assertEqual(RefreshToken.objects.get_by_jti(jti).jti.hex, jti)
+        self._rebalance()
+        self.assertEqual(self._aliases_holding(jti), [SHARD])
+
+        self.client.cookies[REFRESH_TOKEN_COOKIE_NAME] = refresh
+        response = self.client.post(reverse("token-refresh-rotate"), headers={REFRESH_REQUIRED_HEADER_NAME: "1"})
+        self.assertEqual(response.status_code, 200)
+        new_jti = response.cookies[REFRESH_JTI_COOKIE_NAME].value
+        self.assertEqual(self._aliases_holding(new_jti), [SHARD])
+        self.assertTrue(RefreshToken.objects.using(SHARD).get(jti=jti).revoked)
+
+    def test_failed_move_keeps_source_rows_and_drops_copies(self):
+        user = self.users[SHARD]
+        self._shards(["default"])
+        _, _, jti, _ = create_stored_refresh_token(user)
+        self._shards(["default", SHARD])
+
+        raw_delete = QuerySet._raw_delete
+
+        def fail_on_source(qs, using):
+            if using == "default":
+                raise DatabaseError("source delete failed")
+            return raw_delete(qs, using)
+
+        with mock.patch.object(QuerySet, "_raw_delete", fail_on_source), self.assertRaises(DatabaseError):
+            self._rebalance()
+        self.assertEqual(self._aliases_holding(jti), ["default"])
+
+        self._rebalance()
+        self.assertEqual(self._aliases_holding(jti), [SHARD])
+
+
+class PermissionCacheTests(TestCase):
+    """CachedPermissionBackend answers change as soon as grants, revokes and groups change."""
+
+    PERM = "accounts.view_user"
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email="perms@example.com", full_name="Perms", password=make_password(None), is_active=True
+        )
+        self.permission = Permission.objects.get(content_type__app_label="accounts", codename="view_user")
+        self.group = Group.objects.create(name="viewers")
+
+    def _has_perm(self):
+        # a fresh instance per "request": the per-request memo must not hide the cache
+        return User.objects.get(pk=self.user.pk).has_perm(self.PERM)
+
+    def test_grant_then_check(self):
+        self.assertFalse(self._has_perm())
+        self.user.user_permissions.add(self.permission)
+        self.assertTrue(self._has_perm())
+
+    def test_revoke_then_check(self):
+        self.user.user_permissions.add(self.permission)
+        self.assertTrue(self._has_perm())
+        self.user.user_permissions.remove(self.permission)
+        self.assertFalse(self._has_perm())
+        self.permission.accounts_user_set_permissions.add(self.user)
+        self.assertTrue(self._has_perm())
+        self.permission.accounts_user_set_permissions.clear()
+        self.assertFalse(self._has_perm())
+
+    def test_group_membership_and_group_permissions(self):
+        self.group.permissions.add(self.permission)
+        self.assertFalse(self._has_perm())
+        self.user.groups.add(self.group)
+        self.assertTrue(self._has_perm())
+        self.group.accounts_user_set.remove(self.user)
+        self.assertFalse(self._has_perm())
+        self.user.groups.add(self.group)
+        self.assertTrue(self._has_perm())
+        self.group.permissions.remove(self.permission)
+        self.assertFalse(self._has_perm())
+        self.group.permissions.add(self.permission)
+        self.assertTrue(self._has_perm())
+        self.group.delete()
+        self.assertFalse(self._has_perm())
+
+    def test_migrate_bumps_global_version(self):
+        before, _ = _versions(self.user.pk)
+        config = apps.get_app_config("auth")
+        post_migrate.send(sender=config, app_config=config, verbosity=0, interactive=False, using="default",
+                          apps=apps, plan=[])
+        after, _ = _versions(self.user.pk)
+        self.assertNotEqual(before, after)
+
+
+class UserImportTests(TestCase):
+    """Role / is_staff limits and duplicate handling of transfer.import_users."""
+
+    def setUp(self):
+        self.admin = User.objects.create(
+            email="admin@example.com", full_name="Admin", password=make_password(None), is_active=True, role="ADMIN"
+        )
+
+    def _import(self, rows, actor=None, **kwargs):
+        events = list(import_users(rows, actor=actor or self.admin, **kwargs))
+        results = {e["email"]: e for e in events if "progress" not in e}
+        return results, events[-1]["progress"]
+
+    def test_roles_are_limited_to_the_actors_rank(self):
+        results, progress = self._import([
+            {"email": "emp@example.com", "role": "EMPLOYEE"},
+            {"email": "admin2@example.com", "role": "ADMIN"},
+            {"email": "super@example.com", "role": "SUPER_ADMIN"},
+            {"email": "bogus@example.com", "role": "OWNER"},
+        ])
+        self.assertEqual(results["emp@example.com"]["status"], "created")
+        self.assertEqual(results["admin2@example.com"]["status"], "created")
+        self.assertEqual(results["super@example.com"]["status"], "invalid")
+        self.assertEqual(results["bogus@example.com"]["status"], "invalid")
+        self.assertEqual(progress["created"], 2)
+        self.assertFalse(User.objects.filter(email="super@example.com").exists())
+        self.assertEqual(User.objects.get(email="emp@example.com").role, "EMPLOYEE")
+
+    def test_is_staff_needs_a_staff_actor(self):
+        results, _ = self._import([{"email": "staff@example.com", "is_staff": "true"}])
+        self.assertEqual(results["staff@example.com"]["status"], "invalid")
+        self.admin.is_staff = True
+        results, _ = self._import([{"email": "staff@example.com", "is_staff": "true"}])
+        self.assertEqual(results["staff@example.com"]["status"], "created")
+        self.assertTrue(User.objects.get(email="staff@example.com").is_staff)
+
+    def test_duplicates_in_upload_and_existing_users(self):
+        events = list(import_users([
+            {"email": "dup@example.com"},
+            {"email": "not-an-email"},
+            {"email": "DUP@example.com"},
+            {"email": "ADMIN@example.com"},
+        ], batch_size=2, actor=self.admin))
+        statuses = [(e["row"], e["status"]) for e in events if "progress" not in e]
+        self.assertEqual(statuses, [(1, "created"), (2, "invalid"), (3, "duplicate"), (4, "exists")])
+        self.assertEqual(events[-1]["progress"]["processed"], 4)
+        self.assertEqual(events[-1]["progress"]["created"], 1)
+        self.assertEqual(User.objects.filter(email__iexact="dup@example.com").count(), 1)
+
+    def test_passwords_hashed_in_pool_and_unusable_without(self):
+        results, progress = self._import([
+            {"email": "pw1@example.com", "password": "first-Passw0rd"},
+            {"email": "pw2@example.com", "password": "second-Passw0rd"},
+            {"email": "nopw@example.com"},
+        ], workers=2)
+        self.assertEqual(progress["created"], 3)
+        self.assertTrue(User.objects.get(email="pw1@example.com").check_password("first-Passw0rd"))
+        self.assertTrue(User.objects.get(email="pw2@example.com").check_password("second-Passw0rd"))
+        self.assertFalse(User.objects.get(email="nopw@example.com").has_usable_password())
+
+    def test_no_hash_pool_without_passwords(self):
+        with mock.patch.dict(transfer._hash_pools, clear=True):
+            _, progress = self._import([{"email": f"bulk{i}@example.com"} for i in range(5)], workers=3)
+            self.assertEqual(progress["created"], 5)
+            self.assertEqual(transfer._hash_pools, {})
+
+
+class UserListViewTests(TestCase):
+    """Users directory: staff-only access, validated filters and keyset cursor round-trips."""
+
+    def setUp(self):
+        cache.clear()
+        self.hr = self._user("hr@example.com", "HR")
+        created = timezone.now() - timedelta(days=1)
+        for i in range(7):
+            user = self._user(f"emp{i}@example.com", "EMPLOYEE", is_active=i % 2 == 0)
+            # several rows share created_at so paging must fall back to the id tiebreaker
+            User.objects.filter(pk=user.pk).update(created_at=created - timedelta(minutes=i // 3))
+
+    def _user(self, email, role, is_active=True):
+        return User.objects.create(email=email, full_name=email, password=make_password(None), is_active=is_active, role=role)
+
+    def _list(self, user=None, **params):
+        access = AccessToken.for_user(user or self.hr)
+        return self.client.get(reverse("user-list"), params, headers={"Authorization": f"Bearer {access}"})
+
+    def test_non_staff_roles_are_forbidden(self):
+        for role in ("CLIENT", "EMPLOYEE", "TEAM_LEAD"):
+            user = self._user(f"{role.lower()}@example.com", role)
+            self.assertEqual(self._list(user).status_code, 403)
+        self.assertEqual(self._list().status_code, 200)
+
+    def test_invalid_filters_are_rejected(self):
+        for params in ({"is_active": ""}, {"is_active": "maybe"}, {"role": "NOPE"}, {"role": ""},
+                       {"limit": "abc"}, {"fields": "password"}, {"cursor": "garbage"}):
+            self.assertEqual(self._list(**params).status_code, 400, params)
+
+    def test_filters(self):
+        rows = self._list(role="EMPLOYEE", is_active="false", fields="email").json()["results"]
+        self.assertEqual(sorted(r["email"] for r in rows), ["emp1@example.com", "emp3@example.com", "emp5@example.com"])
+        rows = self._list(role="HR", is_active="1").json()["results"]
+        self.assertEqual([r["email"] for r in rows], ["hr@example.com"])
+
+    def test_cursor_round_trip_visits_every_row_once(self):
+        expected = list(User.objects.order_by("-created_at", "-id").values_list("email", flat=True))
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2, "fields": "email"}
+            if cursor:
+                params["cursor"] = cursor
+            body = self._list(**params).json()
+            seen.extend(r["email"] for r in body["results"])
+            cursor = body["next"]
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+
+
+class SessionsListViewTests(TestCase):
+    def test_jtis_use_the_cookie_format(self):
+        user = User.objects.create(
+            email="sessions@example.com", full_name="Sessions", password=make_password(None), is_active=True
+        )
+        _, _, old_jti, db_rt = create_stored_refresh_token(user)
+        _, _, new_jti, _ = rotate_refresh_token(db_rt, user)
+        access = AccessToken.for_user(user)
+        response = self.client.get(reverse("sessions-list"), headers={"Authorization": f"Bearer {access}"})
+        self.assertEqual(response.status_code, 200)
+        by_jti = {row["jti"]: row for row in response.json()}
+        self.assertEqual(set(by_jti), {old_jti, new_jti})
+        self.assertEqual(by_jti[old_jti]["replaced_by_jti"], new_jti)
+        self.assertIsNone(by_jti[new_jti]["replaced_by_jti"])
+
+
+class RunWriteTests(TestCase):
+    def _thread_of_write(self, using, atomic):
+        in_atomic = {alias: mock.Mock(in_atomic_block=value) for alias, value in atomic.items()}
+        with self.settings(SQLITE_SINGLE_WRITER=True), mock.patch.object(sqlite, "connections", in_atomic):
+            return sqlite.run_write(lambda: threading.current_thread().name, using=using)
+
+    def test_stays_inline_in_a_transaction_on_the_written_alias(self):
+        name = self._thread_of_write("shard_b", {"default": False, "shard_b": True})
+        self.assertEqual(name, threading.current_thread().name)
+
+    def test_uses_the_writer_when_only_another_alias_is_in_a_transaction(self):
+        name = self._thread_of_write("shard_b", {"default": True, "shard_b": False})
+        self.assertTrue(name.startswith("sqlite-writer"))
+
+
+class UserCacheTests(TestCase):
+    """user:<id> entries behind the detail and batch endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email="cached@example.com", full_name="Cached", password=make_password(None), is_active=True
+        )
+        self.auth = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+
+    def test_save_invalidates_detail_and_batch(self):
+        detail = reverse("user-detail", args=[self.user.pk])
+        self.assertEqual(self.client.get(detail, headers=self.auth).json()["role"], "EMPLOYEE")
+        self.client.get(reverse("user-batch"), {"ids": str(self.user.pk)}, headers=self.auth)
+
+        self.user.role = "HR"
+        self.user.save()
+        self.assertEqual(self.client.get(detail, headers=self.auth).json()["role"], "HR")
+        batch = self.client.get(reverse("user-batch"), {"ids": str(self.user.pk)}, headers=self.auth).json()
+        self.assertEqual(batch["results"][str(self.user.pk)]["role"], "HR")
+
+    def test_entries_are_capped_at_the_recheck_window_on_a_per_process_cache(self):
+        with mock.patch.object(cache, "set_many", wraps=cache.set_many) as set_many:
+            user_cache.get_user_data(self.user.pk)
+        self.assertEqual(set_many.call_args.kwargs["timeout"], user_cache.USER_VERSION_RECHECK_SECONDS)
+
+        with mock.patch.object(user_cache, "caches", {"default": mock.Mock()}):
+            self.assertEqual(user_cache._entry_ttl(), user_cache.USER_CACHE_TTL)
+
+
+class UserViewConditionalTests(TestCase):
+    """/me/ ETag / Last-Modified from the per-user version stamp."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email="me@example.com", full_name="Me", password=make_password(None), is_active=True
+        )
+        self.auth = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+
+    def _me(self, **headers):
+        return self.client.get(reverse("auth-user"), headers={**self.auth, **headers})
+
+    def test_if_none_match_returns_304_until_the_user_changes(self):
+        first = self._me()
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+        self.assertEqual(self._me()["ETag"], etag)
+        not_modified = self._me(**{"If-None-Match": etag})
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified["ETag"], etag)
+
+        self.user.full_name = "Renamed"
+        self.user.save()
+        changed = self._me(**{"If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+        self.assertEqual(changed.json()["full_name"], "Renamed")
+
+    def test_change_made_by_another_process_is_seen_after_the_recheck_window(self):
+        etag = self._me()["ETag"]
+        # queryset update: no signals, like a save in another worker with its own cache
+        User.objects.filter(pk=self.user.pk).update(role="HR")
+        self.assertEqual(self._me(**{"If-None-Match": etag}).status_code, 304)
+
+        later = time.time() + user_cache.USER_VERSION_RECHECK_SECONDS + 1
+        with mock.patch("time.time", return_value=later):
+            response = self._me(**{"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["role"], "HR")
+
+    def test_deactivated_user_is_rejected(self):
+        self._me()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self._me().status_code, 401)
@@ -1,61 +1,160 @@
 # backend/apps/accounts/tokens.py
+import base64
+import hashlib
+import hmac
+import logging
+import math
+import secrets
 import uuid
 from datetime import timedelta
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, Tuple, Iterable, List, Set
 
 from django.conf import settings
+from django.db import router, transaction
 from django.utils import timezone
 from django.core.cache import cache
 
-from rest_framework_simplejwt.tokens import RefreshToken as SimpleRefreshToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken as SimpleRefreshToken
 
+from .db_router import pin_to_primary
+from .sharding import REFRESH_TOKEN_JTI_FALLBACK, all_shards, group_by_shard, is_sharded, make_jti, shard_for_jti, shard_for_user
+from .events import EVENT_SESSION_ROTATED, publish_event, publish_sessions_revoked
+from .sqlite import run_write
+from .tracing import current_span, traced
 from .models import (
+    User,
     RefreshToken as DBRefreshToken,
     EmailVerificationToken,
     InviteToken,
     PasswordResetToken,
 )
 
+logger = logging.getLogger(__name__)
+
 # Cache key prefixes & defaults
 CACHE_PREFIX_RT = getattr(settings, "CACHE_PREFIX_RT", "rt:")
 CACHE_TOUCHED_PREFIX = getattr(settings, "CACHE_TOUCHED_PREFIX", "rt_touch:")
 CACHE_TTL_DEFAULT = int(getattr(settings, "CACHE_TTL_DEFAULT", 300))  # 5 minutes
 REFRESH_TOUCH_SECONDS = int(getattr(settings, "REFRESH_LAST_ACTIVE_TOUCH_SECONDS", 60))
+REFRESH_TOKEN_MODE = getattr(settings, "REFRESH_TOKEN_MODE", "jwt")
+# re-select passes revoke_refresh_tokens may spend on tokens inserted while it runs
+REVOKE_EXTRA_PASSES = int(getattr(settings, "REVOKE_EXTRA_PASSES", 3))
+
+
+class RefreshTokenReused(Exception):
+    """The refresh token was already rotated or revoked (e.g. by a concurrent refresh)."""
+
+
+def normalize_jti(jti) -> Optional[str]:
+    """
+    Canonical (32-char hex) form of a jti from a JWT claim, cookie or DB UUID.
+    Returns None for values that are not UUIDs, so untrusted input never reaches the DB.
+    """
+    if isinstance(jti, uuid.UUID):
+        return jti.hex
+    try:
+        return uuid.UUID(str(jti)).hex
+    except (TypeError, ValueError):
+        return None
+
+
+@traced()
+def hash_token(raw: str) -> uuid.UUID:
+    """16-byte lookup key for opaque tokens: truncated SHA-256, stored as a UUID column."""
+    return uuid.UUID(bytes=hashlib.sha256(raw.encode()).digest()[:16])
+
+
+def _handle_hash(secret: bytes) -> uuid.UUID:
+    return uuid.UUID(bytes=hashlib.sha256(secret).digest()[:16])
+
 
+@traced()
+def make_refresh_handle(jti) -> Tuple[str, uuid.UUID]:
+    """
+    Opaque refresh handle: base64url(jti bytes + 16 random bytes), 43 chars.
+    The jti half routes the lookup (unique index, shard); only the secret half's hash is stored,
+    since jtis are visible in session lists and audit logs.
+    Returns (handle, handle_hash).
+    """
+    secret = secrets.token_bytes(16)
+    handle = base64.urlsafe_b64encode(uuid.UUID(str(jti)).bytes + secret).rstrip(b"=").decode()
+    return handle, _handle_hash(secret)
+
+
+@traced()
+def parse_refresh_handle(handle) -> Optional[Tuple[str, bytes]]:
+    """(jti hex, secret) from an opaque handle, or None if it is malformed."""
+    if not handle or len(handle) != 43:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(handle + "=")
+    except (TypeError, ValueError):
+        return None
+    if len(raw) != 32:
+        return None
+    return uuid.UUID(bytes=raw[:16]).hex, raw[16:]
+
+
+@traced()
+def refresh_handle_matches(stored_hash, secret: bytes) -> bool:
+    stored = normalize_jti(stored_hash)
+    return stored is not None and hmac.compare_digest(stored, _handle_hash(secret).hex)
 
-def _cache_key(jti: str) -> str:
-    return f"{CACHE_PREFIX_RT}{jti}"
 
+def _cache_key(jti) -> str:
+    return f"{CACHE_PREFIX_RT}{normalize_jti(jti)}"
 
-def _touch_key(jti: str) -> str:
-    return f"{CACHE_TOUCHED_PREFIX}{jti}"
+
+def _touch_key(jti) -> str:
+    return f"{CACHE_TOUCHED_PREFIX}{normalize_jti(jti)}"
 
 
 # ---------------------------
 # Refresh token helpers
 # ---------------------------
+@traced()
 def create_stored_refresh_token(
     user,
     request_meta: Optional[Dict[str, Any]] = None,
     store_token_str: bool = False,
     cache_ttl: int = CACHE_TTL_DEFAULT,
+    opaque: Optional[bool] = None,
+    jti: Optional[str] = None,
 ) -> Tuple[SimpleRefreshToken, str, str, DBRefreshToken]:
     """
     Create a SimpleJWT refresh token + DB row and prime cache.
     Returns: (simple_refresh_obj, refresh_str, jti, db_obj)
     request_meta: {"ip": str, "device": str, "user_agent": str}
+    opaque (default: REFRESH_TOKEN_MODE == "opaque"): refresh_str is an opaque handle
+    (make_refresh_handle) instead of the signed JWT; simple_rt still mints the access token.
+    jti: a pre-generated make_jti(user.id) value (rotation claims the old row with it first).
     """
+    opaque = REFRESH_TOKEN_MODE == "opaque" if opaque is None else opaque
     simple_rt = SimpleRefreshToken.for_user(user)
-    refresh_str = str(simple_rt)
+    # the jti's first byte names the user's shard, so jti-only lookups route directly
+    simple_rt["jti"] = jti or make_jti(user.id)
     jti = simple_rt["jti"]
+    handle_hash = None
+    if opaque:
+        refresh_str, handle_hash = make_refresh_handle(jti)
+        store_token_str = False  # the handle is a bearer secret; only its hash is kept
+    else:
+        refresh_str = str(simple_rt)
+    # not part of the refresh token: access tokens minted from simple_rt copy it, which lets
+    # introspection map an access token back to its session
+    simple_rt["sid"] = jti
 
     expires_delta = settings.SIMPLE_JWT.get("REFRESH_TOKEN_LIFETIME", timedelta(days=30))
     expires_at = timezone.now() + expires_delta
 
-    db_rt = DBRefreshToken.objects.create(
+    shard = shard_for_user(user.id)
+    db_rt = run_write(
+        DBRefreshToken.objects.db_manager(shard).create,
+        using=shard,
         jti=jti,
         user=user,
         token_str=refresh_str if store_token_str else None,
+        handle_hash=handle_hash,
         expires_at=expires_at,
         last_active=timezone.now(),
         device=(request_meta.get("device") if request_meta else None),
@@ -63,6 +162,9 @@ def create_stored_refresh_token(
         user_agent=(request_meta.get("user_agent") if request_meta else None),
     )
 
+    # login / rotation: this user's routed reads go to the primary until replicas catch up
+    pin_to_primary([user.id])
+
     # prime cache metadata for fast checks
     cache.set(
         _cache_key(jti),
@@ -71,13 +173,28 @@ def create_stored_refresh_token(
             "expires_at": expires_at.timestamp(),
             "user_id": str(user.id),
             "replaced_by_jti": None,
+            "handle_hash": handle_hash.hex if handle_hash else None,
         },
         timeout=cache_ttl,
     )
+    # last_active was just written with the row; skip the touch that would follow
+    cache.set(_touch_key(jti), 1, timeout=REFRESH_TOUCH_SECONDS)
 
     return simple_rt, refresh_str, jti, db_rt
 
 
+@traced()
+def mint_access_token(user, jti) -> str:
+    """
+    Access token for an existing session without rotating its refresh token
+    (see accounts/rotation_policy.py). Carries the same "sid" claim as at login.
+    """
+    access = AccessToken.for_user(user)
+    access["sid"] = normalize_jti(jti)
+    return str(access)
+
+
+@traced()
 def rotate_refresh_token(
     old_db_rt: DBRefreshToken,
     user,
@@ -87,19 +204,24 @@ def rotate_refresh_token(
     cache_ttl: int = CACHE_TTL_DEFAULT,
 ) -> Tuple[SimpleRefreshToken, str, str, DBRefreshToken]:
     """
-    Rotate refresh token: create new stored DB row and mark old_db_rt as replaced.
-    Accepts DB objects as params to avoid re-querying.
+    Rotate refresh token: mark old_db_rt as replaced, then create the new stored DB row,
+    in one transaction. Accepts DB objects as params to avoid re-querying.
+    The old row is claimed with a conditional UPDATE first, so concurrent rotations of one
+    token produce exactly one new token; the others raise RefreshTokenReused.
     Returns (new_simple_rt, new_refresh_str, new_jti, new_db_rt).
     """
     cache_client = cache_client or cache
+    new_jti = make_jti(user.id)
 
-    # create new token + db row
-    new_simple_rt, new_refresh_str, new_jti, new_db_rt = create_stored_refresh_token(
-        user, request_meta=request_meta, store_token_str=store_token_str, cache_ttl=cache_ttl
-    )
+    def claim_and_create():
+        with transaction.atomic(using=old_db_rt._state.db):
+            if not old_db_rt.mark_replaced(new_jti):
+                raise RefreshTokenReused(normalize_jti(old_db_rt.jti))
+            return create_stored_refresh_token(
+                user, request_meta=request_meta, store_token_str=store_token_str, cache_ttl=cache_ttl, jti=new_jti
+            )
 
-    # mark old as replaced (atomic single-row update inside model method)
-    old_db_rt.mark_replaced(new_jti)
+    new_simple_rt, new_refresh_str, new_jti, new_db_rt = run_write(claim_and_create, using=old_db_rt._state.db)
 
     # update cache: set new meta and evict old
     cache_client.set(
@@ -109,35 +231,142 @@ def rotate_refresh_token(
             "expires_at": new_db_rt.expires_at.timestamp() if new_db_rt.expires_at else 0,
             "user_id": str(user.id),
             "replaced_by_jti": None,
+            "handle_hash": normalize_jti(new_db_rt.handle_hash) if new_db_rt.handle_hash else None,
         },
         timeout=cache_ttl,
     )
     cache_client.delete(_cache_key(old_db_rt.jti))
 
+    # open push sockets follow the session from the old jti to the new one
+    publish_event(
+        user.id,
+        EVENT_SESSION_ROTATED,
+        jti=normalize_jti(old_db_rt.jti),
+        replaced_by=normalize_jti(new_jti),
+        expires_at=new_db_rt.expires_at.timestamp() if new_db_rt.expires_at else 0,
+    )
+
     return new_simple_rt, new_refresh_str, new_jti, new_db_rt
 
 
+@traced()
 def invalidate_all_user_sessions(user, reason: str = "revoked_all") -> None:
     """
     Bulk revoke all non-revoked refresh tokens for a user and evict their cache entries.
     """
-    jt_is = list(DBRefreshToken.objects.filter(user=user, revoked=False).values_list("jti", flat=True))
-    DBRefreshToken.objects.filter(user=user, revoked=False).update(revoked=True, revoked_reason=reason)
-    for j in jt_is:
-        cache.delete(_cache_key(j))
+    revoke_refresh_tokens(DBRefreshToken.objects.for_user(user.id), reason=reason)
+
+
+@traced()
+def invalidate_sessions_for_users(user_ids: Iterable, reason: str = "revoked_all") -> int:
+    """
+    invalidate_all_user_sessions for many users: one revoke_refresh_tokens pass per shard.
+    Returns the number of tokens revoked.
+    """
+    revoked = 0
+    for alias, ids in group_by_shard(user_ids).items():
+        qs = DBRefreshToken.objects.filter(user_id__in=ids)
+        revoked += revoke_refresh_tokens(qs.using(alias) if is_sharded() else qs, reason=reason)
+    return revoked
 
 
+@traced()
+def revoke_refresh_tokens(queryset, reason: str = "revoked", batch_size: int = 1000) -> int:
+    """
+    Batched revocation path: revoke every non-revoked token in queryset with one UPDATE
+    per batch_size jtis and evict their cache entries with delete_many.
+    Re-selects until nothing is left, so tokens inserted while revoking are not orphaned,
+    but for at most REVOKE_EXTRA_PASSES passes beyond what the rows present at the start
+    need, so steady concurrent inserts cannot keep it looping.
+    Each batch is pushed to the owners' open sockets as a session_revoked event.
+    Returns the number of tokens revoked.
+    """
+    revoked = 0
+    max_passes = math.ceil(queryset.filter(revoked=False).count() / batch_size) + REVOKE_EXTRA_PASSES
+    for _ in range(max_passes):
+        rows = list(queryset.filter(revoked=False).values_list("jti", "user_id")[:batch_size])
+        if not rows:
+            break
+        chunk = [jti for jti, _ in rows]
+        revoked += run_write(
+            DBRefreshToken.objects.using(queryset.db).filter(jti__in=chunk, revoked=False).update,
+            using=queryset.db,
+            revoked=True,
+            revoked_reason=reason,
+        )
+        cache.delete_many([_cache_key(j) for j in chunk])
+        by_user: Dict[str, List[str]] = {}
+        for jti, user_id in rows:
+            by_user.setdefault(str(user_id), []).append(normalize_jti(jti))
+        pin_to_primary(by_user)
+        publish_sessions_revoked(by_user, reason)
+    else:
+        logger.warning("revoke_refresh_tokens: stopped after %d passes with tokens still being inserted", max_passes)
+    current_span().set("revoked", revoked)
+    return revoked
+
+
+@traced()
 def get_cached_rt_meta(jti: str) -> Optional[Dict[str, Any]]:
     """
     Return cached metadata dict for jti or None.
     """
-    return cache.get(_cache_key(jti))
+    meta = cache.get(_cache_key(jti))
+    current_span().set("hit", meta is not None)
+    return meta
 
 
+@traced()
 def cache_rt_meta(jti: str, meta: Dict[str, Any], timeout: int = CACHE_TTL_DEFAULT) -> None:
     cache.set(_cache_key(jti), meta, timeout=timeout)
 
 
+RT_META_FIELDS = ("jti", "user_id", "revoked", "expires_at", "replaced_by_jti", "handle_hash")
+
+
+def rt_meta_from_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Cache metadata for a RefreshToken .values(*RT_META_FIELDS) row."""
+    return {
+        "revoked": row["revoked"],
+        "expires_at": row["expires_at"].timestamp() if row["expires_at"] else 0,
+        "user_id": str(row["user_id"]),
+        "replaced_by_jti": normalize_jti(row["replaced_by_jti"]) if row["replaced_by_jti"] else None,
+        "handle_hash": row["handle_hash"].hex if row["handle_hash"] else None,
+    }
+
+
+@traced()
+def get_rt_meta_many(jtis: Iterable, timeout: int = CACHE_TTL_DEFAULT) -> Dict[str, Dict[str, Any]]:
+    """
+    Cached metadata for many jtis: one get_many against the cache, then one jti__in query
+    per shard for the misses, which are written back with set_many.
+    Returns {jti hex: meta}; unknown or malformed jtis are simply absent.
+    """
+    keys = {_cache_key(j): j for j in dict.fromkeys(filter(None, map(normalize_jti, jtis)))}
+    found = {keys[k]: meta for k, meta in cache.get_many(list(keys)).items()}
+    missing = [j for j in keys.values() if j not in found]
+    current_span().set("requested", len(keys))
+    current_span().set("cache_hits", len(found))
+    if not missing:
+        return found
+
+    groups: Dict[str, list] = {}
+    for jti in missing:
+        groups.setdefault(shard_for_jti(jti) if is_sharded() else None, []).append(jti)
+    loaded: Dict[str, Dict[str, Any]] = {}
+    for alias, chunk in groups.items():
+        qs = DBRefreshToken.objects.filter(jti__in=chunk)
+        if alias is not None:
+            qs = qs.using(alias)
+        for row in qs.values(*RT_META_FIELDS):
+            loaded[row["jti"].hex] = rt_meta_from_row(row)
+    if loaded:
+        cache.set_many({_cache_key(j): meta for j, meta in loaded.items()}, timeout=timeout)
+    found.update(loaded)
+    return found
+
+
+@traced()
 def touch_last_active_throttled(jti: str, now=None, throttle_seconds: Optional[int] = None) -> bool:
     """
     Update last_active DB field but throttle updates to once per throttle_seconds.
@@ -147,8 +376,16 @@ def touch_last_active_throttled(jti: str, now=None, throttle_seconds: Optional[i
     now = now or timezone.now()
     touch_key = _touch_key(jti)
     if cache.get(touch_key):
+        current_span().set("throttled", True)
         return False
-    DBRefreshToken.objects.filter(jti=jti).update(last_active=now)
+    touch = DBRefreshToken.objects.for_jti(jti)
+    updated = run_write(touch.update, using=touch._db or router.db_for_write(DBRefreshToken), last_active=now)
+    if not updated and is_sharded() and REFRESH_TOKEN_JTI_FALLBACK:
+        # pre-sharding jti: the row is on another shard until it expires or is rebalanced
+        home = shard_for_jti(jti)
+        for alias in all_shards():
+            if alias != home and run_write(DBRefreshToken.objects.using(alias).filter(jti=jti).update, using=alias, last_active=now):
+                break
     cache.set(touch_key, 1, timeout=throttle_seconds)
     return True
 
@@ -161,6 +398,7 @@ def _generate_token_string() -> str:
     return uuid.uuid4().hex
 
 
+@traced()
 def create_email_verification(user, expires_in_hours: Optional[int] = None) -> EmailVerificationToken:
     """
     Create an EmailVerificationToken instance for the given user.
@@ -169,22 +407,28 @@ def create_email_verification(user, expires_in_hours: Optional[int] = None) -> E
         expires_in_hours = int(getattr(settings, "EMAIL_VERIFICATION_EXPIRES_HOURS", 48))
     token_str = _generate_token_string()
     expires_at = timezone.now() + timedelta(hours=expires_in_hours)
-    v = EmailVerificationToken.objects.create(user=user, token=token_str, expires_at=expires_at, used=False)
+    v = EmailVerificationToken.objects.create(user=user, token_hash=hash_token(token_str), expires_at=expires_at, used=False)
+    v.token = token_str
     return v
 
 
-def create_invite_token(email: str, invited_by=None, expires_in_hours: Optional[int] = None) -> InviteToken:
+@traced()
+def create_invite_token(email: str, invited_by=None, expires_in_hours: Optional[int] = None, role: Optional[str] = None) -> InviteToken:
     """
     Create an InviteToken tied to an email (invited_by may be a User or None).
+    role (default: the model default) is applied when the invite is accepted.
     """
     if expires_in_hours is None:
         expires_in_hours = int(getattr(settings, "INVITE_TOKEN_EXPIRES_HOURS", 72))
     token_str = _generate_token_string()
     expires_at = timezone.now() + timedelta(hours=expires_in_hours)
-    inv = InviteToken.objects.create(email=email, token=token_str, invited_by=invited_by, expires_at=expires_at, used=False)
+    extra = {"role": role} if role else {}
+    inv = InviteToken.objects.create(email=email, token_hash=hash_token(token_str), invited_by=invited_by, expires_at=expires_at, used=False, **extra)
+    inv.token = token_str
     return inv
 
 
+@traced()
 def create_password_reset(user, expires_in_hours: Optional[int] = None) -> PasswordResetToken:
     """
     Create a PasswordResetToken for the given user.
@@ -193,5 +437,53 @@ def create_password_reset(user, expires_in_hours: Optional[int] = None) -> Passw
         expires_in_hours = int(getattr(settings, "PASSWORD_RESET_EXPIRES_HOURS", 4))
     token_str = _generate_token_string()
     expires_at = timezone.now() + timedelta(hours=expires_in_hours)
-    pr = PasswordResetToken.objects.create(user=user, token=token_str, expires_at=expires_at, used=False)
+    pr = PasswordResetToken.objects.create(user=user, token_hash=hash_token(token_str), expires_at=expires_at, used=False)
+    pr.token = token_str
     return pr
+
+
+@traced()
+def find_taken_invite_emails(emails: Iterable[str]) -> Set[str]:
+    """
+    Return the subset of emails that already belong to a user or have a pending invite.
+    Both checks run as one UNION query so bulk dedupe costs a single round trip.
+    """
+    emails = list(emails)
+    if not emails:
+        return set()
+    # order_by(): Meta.ordering is not allowed inside a compound statement
+    users = User.objects.filter_by_emails(emails).order_by().values_list("email_ci", flat=True)
+    pending = InviteToken.objects.filter(
+        email__in=emails, used=False, expires_at__gt=timezone.now()
+    ).order_by().values_list("email", flat=True)
+    return set(users.union(pending))
+
+
+@traced()
+def create_invite_tokens_bulk(
+    emails: Iterable[str],
+    invited_by=None,
+    expires_in_hours: Optional[int] = None,
+    batch_size: int = 500,
+    roles: Optional[Iterable[Optional[str]]] = None,
+) -> List[InviteToken]:
+    """
+    Bulk variant of create_invite_token: one INSERT per batch_size rows.
+    Callers are expected to have deduped emails (see find_taken_invite_emails).
+    roles, when given, runs parallel to emails (None = model default).
+    """
+    if expires_in_hours is None:
+        expires_in_hours = int(getattr(settings, "INVITE_TOKEN_EXPIRES_HOURS", 72))
+    expires_at = timezone.now() + timedelta(hours=expires_in_hours)
+    emails = list(emails)
+    roles = list(roles) if roles is not None else [None] * len(emails)
+    invites, raw_tokens = [], []
+    for email, role in zip(emails, roles):
+        token_str = _generate_token_string()
+        raw_tokens.append(token_str)
+        extra = {"role": role} if role else {}
+        invites.append(InviteToken(email=email, token_hash=hash_token(token_str), invited_by=invited_by, expires_at=expires_at, used=False, **extra))
+    created = InviteToken.objects.bulk_create(invites, batch_size=batch_size)
+    for inv, token_str in zip(created, raw_tokens):
+        inv.token = token_str
+    return created
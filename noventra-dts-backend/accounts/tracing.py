@@ -0,0 +1,352 @@
+# backend/apps/accounts/tracing.py
+"""
+Lightweight tracing for the auth hot paths.
+
+    @traced()                                   # span named "<module>.<function>"
+    def rotate_refresh_token(...): ...
+
+    with span("session.db_load", jti=jti) as sp:
+        ...
+        sp.set("found", True)
+
+With TRACING_ENABLED off (the default), traced() returns the function unchanged, span()
+returns a shared no-op after one flag check, and no middleware, cache or DB hooks are
+installed.
+
+When on:
+  - TracingMiddleware opens a root span per request. Head sampling (TRACING_SAMPLE_RATE)
+    is decided once there. An incoming W3C `traceparent` header always supplies the trace
+    and parent ids, but its sampled flag is only honoured from TRACING_TRUSTED_SOURCES
+    (client IPs / networks), so arbitrary clients cannot force every request to be traced.
+    Unsampled requests mark the context so nested spans stay no-ops.
+  - Spans opened outside a request (commands, threads) start their own sampled trace.
+  - Cache calls and SQL queries become child spans with hit counts / rows affected, through
+    the hooks shared with request profiling (accounts/instrumentation.py).
+  - A finished trace is handed to the exporter (TRACING_EXPORTER, dotted path):
+    NDJSONExporter (one span per line, TRACING_NDJSON_PATH, rotated to "<path>.1" past
+    TRACING_NDJSON_MAX_BYTES), LoggingExporter or NullExporter.
+    Custom exporters subclass SpanExporter and implement export(spans).
+"""
+import contextvars
+import functools
+import ipaddress
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.module_loading import import_string
+
+from .instrumentation import add_cache_interceptor, add_sql_interceptor
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = bool(getattr(settings, "TRACING_ENABLED", False))
+TRACING_SAMPLE_RATE = float(getattr(settings, "TRACING_SAMPLE_RATE", 0.01))
+TRACING_EXPORTER = getattr(settings, "TRACING_EXPORTER", "accounts.tracing.NDJSONExporter")
+TRACING_NDJSON_PATH = Path(getattr(settings, "TRACING_NDJSON_PATH", Path(settings.BASE_DIR) / "var" / "traces.ndjson"))
+TRACING_MAX_SPANS = int(getattr(settings, "TRACING_MAX_SPANS", 1000))
+TRACING_SQL_MAX_CHARS = int(getattr(settings, "TRACING_SQL_MAX_CHARS", 500))
+TRACING_NDJSON_MAX_BYTES = int(getattr(settings, "TRACING_NDJSON_MAX_BYTES", 256 * 1024 * 1024))
+TRACING_TRUSTED_SOURCES = tuple(
+    ipaddress.ip_network(item, strict=False) for item in getattr(settings, "TRACING_TRUSTED_SOURCES", ())
+)
+
+_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# current span, _UNSAMPLED inside an unsampled trace, None outside any trace
+_current: contextvars.ContextVar = contextvars.ContextVar("accounts_tracing_span", default=None)
+_UNSAMPLED = object()
+
+
+# ---------------------------
+# Exporters
+# ---------------------------
+class SpanExporter:
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+
+class NullExporter(SpanExporter):
+    def export(self, spans):
+        pass
+
+
+class LoggingExporter(SpanExporter):
+    def export(self, spans):
+        for item in spans:
+            logger.info("span %s", json.dumps(item, default=str))
+
+
+class NDJSONExporter(SpanExporter):
+    """
+    Append spans to a local NDJSON file; one write() per trace so processes don't interleave.
+    Past max_bytes the file is renamed to "<path>.1" (replacing the previous one), so the
+    two files together stay around 2 * max_bytes.
+    """
+
+    def __init__(self, path: Path = TRACING_NDJSON_PATH, max_bytes: int = TRACING_NDJSON_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._fh = None
+        self._pid = None
+
+    def _file(self):
+        if self._fh is not None and self._pid == os.getpid():
+            if os.fstat(self._fh.fileno()).st_size < self.max_bytes:
+                return self._fh
+            self._fh.close()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            # another process may have rotated already; only rotate a file that is still full
+            if self.path.stat().st_size >= self.max_bytes:
+                os.replace(self.path, self.path.with_name(self.path.name + ".1"))
+        except FileNotFoundError:
+            pass
+        self._fh = open(self.path, "a", buffering=1, encoding="utf-8")
+        self._pid = os.getpid()
+        return self._fh
+
+    def export(self, spans):
+        data = "".join(json.dumps(item, default=str, separators=(",", ":")) + "\n" for item in spans)
+        with self._lock:
+            fh = self._file()
+            fh.write(data)
+            fh.flush()
+
+
+_exporter: Optional[SpanExporter] = None
+
+
+def get_exporter() -> SpanExporter:
+    global _exporter
+    if _exporter is None:
+        _exporter = import_string(TRACING_EXPORTER)()
+    return _exporter
+
+
+# ---------------------------
+# Spans
+# ---------------------------
+class _Trace:
+    __slots__ = ("trace_id", "spans", "dropped")
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.spans: List[Dict[str, Any]] = []
+        self.dropped = 0
+
+
+class Span:
+    __slots__ = ("trace", "name", "span_id", "parent_id", "attrs", "_start_ts", "_start", "_token", "_root")
+
+    def __init__(self, name: str, trace: _Trace, parent_id: Optional[str], attrs: Dict[str, Any], root: bool):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attrs = attrs
+        self._root = root
+        self._token = None
+
+    def set(self, key: str, value) -> None:
+        self.attrs[key] = value
+
+    def __enter__(self):
+        self._start_ts = time.time()
+        self._start = time.perf_counter()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration_ms = round((time.perf_counter() - self._start) * 1000, 3)
+        _current.reset(self._token)
+        trace = self.trace
+        if len(trace.spans) < TRACING_MAX_SPANS:
+            record = {
+                "trace_id": trace.trace_id,
+                "span_id": self.span_id,
+                "parent_id": self.parent_id,
+                "name": self.name,
+                "start_ts": self._start_ts,
+                "duration_ms": duration_ms,
+                "attrs": self.attrs,
+            }
+            if exc_type is not None:
+                record["error"] = exc_type.__name__
+            trace.spans.append(record)
+        else:
+            trace.dropped += 1
+        if self._root:
+            if trace.dropped:
+                trace.spans[-1]["attrs"]["dropped_spans"] = trace.dropped
+            try:
+                get_exporter().export(trace.spans)
+            except Exception:
+                logger.exception("trace export failed")
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class _UnsampledScope(_NoopSpan):
+    """Root of an unsampled trace: nested span() calls see _UNSAMPLED and stay no-ops."""
+    __slots__ = ("_token",)
+
+    def __enter__(self):
+        self._token = _current.set(_UNSAMPLED)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str, **attrs):
+    """Context manager for a child span (or a new sampled root outside any trace)."""
+    if not TRACING_ENABLED:
+        return _NOOP
+    parent = _current.get()
+    if parent is _UNSAMPLED:
+        return _NOOP
+    if parent is None:
+        return start_trace(name, **attrs)
+    return Span(name, parent.trace, parent.span_id, attrs, root=False)
+
+
+def start_trace(name: str, sampled: Optional[bool] = None, trace_id: Optional[str] = None,
+                parent_id: Optional[str] = None, **attrs):
+    """Root span; sampled=None applies TRACING_SAMPLE_RATE."""
+    if sampled is None:
+        sampled = random.random() < TRACING_SAMPLE_RATE
+    if not sampled:
+        return _UnsampledScope()
+    return Span(name, _Trace(trace_id), parent_id, attrs, root=True)
+
+
+def current_span():
+    """The active Span, or a no-op stand-in, so callers can always .set() attributes."""
+    current = _current.get()
+    return current if isinstance(current, Span) else _NOOP
+
+
+def traced(name: Optional[str] = None):
+    """Decorator: run the function inside span(name); a no-op wrapper-free pass when disabled."""
+    def decorate(fn):
+        if not TRACING_ENABLED:
+            return fn
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current.get() is _UNSAMPLED:
+                return fn(*args, **kwargs)
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# ---------------------------
+# Cache / DB instrumentation (shared hooks, accounts/instrumentation.py)
+# ---------------------------
+def _cache_interceptor(name, args, kwargs, call):
+    parent = _current.get()
+    if not isinstance(parent, Span):
+        return call()
+    with Span(f"cache.{name}", parent.trace, parent.span_id, {}, root=False) as sp:
+        result = call()
+        keys = args[0] if args else kwargs.get("key", kwargs.get("keys", kwargs.get("data")))
+        if isinstance(keys, str):
+            sp.set("key", keys)
+            if name == "get":
+                sp.set("hit", result is not None)
+        elif hasattr(keys, "__len__"):
+            sp.set("keys", len(keys))
+            if name == "get_many":
+                sp.set("hits", len(result))
+        return result
+
+
+def _sql_interceptor(execute, sql, params, many, context):
+    parent = _current.get()
+    if not isinstance(parent, Span):
+        return execute(sql, params, many, context)
+    connection = context["connection"]
+    attrs = {"alias": connection.alias, "sql": sql[:TRACING_SQL_MAX_CHARS], "many": many}
+    with Span("db.query", parent.trace, parent.span_id, attrs, root=False) as sp:
+        result = execute(sql, params, many, context)
+        rowcount = getattr(context.get("cursor"), "rowcount", -1)
+        if rowcount is not None and rowcount >= 0:
+            sp.set("rows", rowcount)
+        return result
+
+
+def install() -> None:
+    """Register the cache / SQL span interceptors (idempotent; no-op when disabled)."""
+    if not TRACING_ENABLED:
+        return
+    add_cache_interceptor(_cache_interceptor)
+    add_sql_interceptor(_sql_interceptor)
+
+
+# ---------------------------
+# Middleware
+# ---------------------------
+def _trusted_source(request) -> bool:
+    """Whether the caller's traceparent sampled flag is honoured (TRACING_TRUSTED_SOURCES)."""
+    if not TRACING_TRUSTED_SOURCES:
+        return False
+    try:
+        addr = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(addr in network for network in TRACING_TRUSTED_SOURCES)
+
+
+class TracingMiddleware:
+    """Root span per request. Place near the top of MIDDLEWARE."""
+
+    def __init__(self, get_response):
+        if not TRACING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        install()
+
+    def __call__(self, request):
+        sampled, trace_id, parent_id = None, None, None
+        match = _TRACEPARENT.match(request.META.get("HTTP_TRACEPARENT", ""))
+        if match:
+            trace_id, parent_id = match.group(1), match.group(2)
+            if _trusted_source(request):
+                sampled = bool(int(match.group(3), 16) & 1)
+        with start_trace("http.request", sampled=sampled, trace_id=trace_id, parent_id=parent_id,
+                         method=request.method, path=request.path) as root:
+            response = self.get_response(request)
+            root.set("status", response.status_code)
+        if isinstance(root, Span):
+            response["X-Trace-Id"] = root.trace.trace_id
+        return response
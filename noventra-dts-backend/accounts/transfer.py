@@ -0,0 +1,255 @@
+# backend/apps/accounts/transfer.py
+"""
+Streaming user export / import helpers.
+
+Export walks the user table with values_list().iterator(chunk_size=...) so memory stays
+flat regardless of table size. Import parses the upload incrementally, validates rows in
+batches, hashes passwords in a thread pool and bulk_creates with conflict handling.
+
+Password hashing runs in threads, not processes: the hashers release the GIL (PBKDF2 in
+hashlib, argon2 / bcrypt in their C extensions), and forking a web worker per import would
+copy its DB connections and caches into the children. The pool is created on the first
+batch that has passwords and reused by later imports of the process.
+"""
+import atexit
+import csv
+import io
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+
+from .models import ROLE_RANK, User, can_assign_role
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FIELDS = ("id", "email", "full_name", "role", "is_active", "is_staff", "created_at", "last_login")
+EXPORT_DEFAULT_FIELDS = ("id", "email", "full_name", "role", "is_active", "created_at")
+EXPORT_CHUNK_SIZE = int(getattr(settings, "USER_EXPORT_CHUNK_SIZE", 2000))
+
+IMPORT_FIELDS = ("email", "full_name", "role", "is_active", "is_staff", "password")
+IMPORT_BATCH_SIZE = int(getattr(settings, "USER_IMPORT_BATCH_SIZE", 1000))
+IMPORT_HASH_WORKERS = int(getattr(settings, "USER_IMPORT_HASH_WORKERS", 4))
+
+_TRUE = {"1", "true", "yes", "y", "t"}
+
+
+class _Echo:
+    """File-like object whose write() returns the value, for csv.writer streaming."""
+    def write(self, value):
+        return value
+
+
+def _to_text(value) -> str:
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def parse_export_fields(raw: Optional[str]) -> Sequence[str]:
+    """Validate a comma separated ?fields= value against EXPORT_FIELDS."""
+    if not raw:
+        return EXPORT_DEFAULT_FIELDS
+    fields = tuple(f.strip() for f in raw.split(",") if f.strip())
+    unknown = [f for f in fields if f not in EXPORT_FIELDS]
+    if unknown or not fields:
+        raise ValueError(f"Unknown export fields: {', '.join(unknown) or raw}")
+    return fields
+
+
+def iter_export(fields: Sequence[str], fmt: str = "csv", chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Yield the export body line by line. Only the requested columns are selected in SQL.
+    Ordered by primary key (not Meta.ordering) so the scan needs no sort.
+    """
+    rows = User.objects.order_by("pk").values_list(*fields).iterator(chunk_size=chunk_size)
+    started = time.monotonic()
+    count = 0
+    if fmt == "ndjson":
+        for row in rows:
+            count += 1
+            yield json.dumps({f: _to_text(v) if not isinstance(v, bool) else v for f, v in zip(fields, row)}) + "\n"
+    else:
+        writer = csv.writer(_Echo())
+        yield writer.writerow(fields)
+        for row in rows:
+            count += 1
+            yield writer.writerow([_to_text(v) for v in row])
+    elapsed = time.monotonic() - started
+    logger.info("user export: %d rows in %.2fs (%.0f rows/sec)", count, elapsed, count / elapsed if elapsed else 0)
+
+
+# ---------------------------
+# Import
+# ---------------------------
+def iter_import_rows(upload, fmt: str = "csv") -> Iterator[Dict[str, str]]:
+    """Incrementally parse an uploaded CSV (with header) or NDJSON file into dicts."""
+    text = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+    if fmt == "ndjson":
+        for line in text:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                item = {}
+            yield item if isinstance(item, dict) else {}
+    else:
+        for row in csv.DictReader(text):
+            yield {(k or "").strip().lower(): v for k, v in row.items()}
+
+
+_hash_pools: Dict[int, ThreadPoolExecutor] = {}
+_hash_pools_lock = threading.Lock()
+
+
+def _hash_pool(workers: int) -> ThreadPoolExecutor:
+    with _hash_pools_lock:
+        pool = _hash_pools.get(workers)
+        if pool is None:
+            pool = _hash_pools[workers] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="import-hash")
+        return pool
+
+
+@atexit.register
+def _shutdown_hash_pools():
+    for pool in _hash_pools.values():
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _hash_password(raw: Optional[str]) -> str:
+    return make_password(raw or None)
+
+
+def _hash_passwords(passwords: List[Optional[str]], workers: int) -> List[str]:
+    # rows without a password get an unusable one, which costs no hashing
+    if workers > 1 and sum(1 for p in passwords if p) > 1:
+        chunksize = max(1, len(passwords) // (workers * 4))
+        return list(_hash_pool(workers).map(_hash_password, passwords, chunksize=chunksize))
+    return [_hash_password(p) for p in passwords]
+
+
+def _bool(value, default: bool) -> bool:
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in _TRUE
+
+
+def _validate_batch(batch: List[Dict[str, str]], row_offset: int, seen: set, actor=None):
+    """
+    Return (results, candidates) where candidates are (result, cleaned_row) pairs.
+    With an actor, rows may not grant a role above the actor's, nor is_staff unless the
+    actor is staff.
+    """
+    results, candidates = [], []
+    for i, raw in enumerate(batch, start=row_offset):
+        email = (raw.get("email") or "").strip().lower()
+        result = {"row": i, "email": email}
+        results.append(result)
+        try:
+            validate_email(email)
+        except ValidationError:
+            result.update(status="invalid", detail="Enter a valid email address.")
+            continue
+        role = str(raw.get("role") or "EMPLOYEE").strip()
+        if role not in ROLE_RANK:
+            result.update(status="invalid", detail=f"Unknown role {role}.")
+            continue
+        is_staff = _bool(raw.get("is_staff"), False)
+        if actor is not None and not can_assign_role(actor.role, role):
+            result.update(status="invalid", detail=f"Not allowed to grant role {role}.")
+            continue
+        if actor is not None and is_staff and not actor.is_staff:
+            result.update(status="invalid", detail="Not allowed to grant is_staff.")
+            continue
+        if email in seen:
+            result.update(status="duplicate", detail="Duplicate row in upload.")
+            continue
+        seen.add(email)
+        password = raw.get("password")
+        candidates.append((result, {
+            "email": email,
+            "full_name": str(raw.get("full_name") or "")[:200],
+            "role": role,
+            "is_active": _bool(raw.get("is_active"), True),
+            "is_staff": is_staff,
+            "password": str(password) if password else None,
+        }))
+    return results, candidates
+
+
+def import_users(rows: Iterable[Dict[str, str]], batch_size: int = IMPORT_BATCH_SIZE, workers: int = IMPORT_HASH_WORKERS,
+                 actor=None) -> Iterator[Dict]:
+    """
+    Import users from an iterable of dicts, yielding per-row results and a progress dict
+    after every batch. Existing emails are reported as "exists", including rows that lose a
+    race against a concurrent insert (dropped by bulk_create(ignore_conflicts=True) and
+    detected by re-reading the inserted pks). actor limits the grantable role / is_staff.
+    bulk_create bypasses post_save, so no verification emails are sent for imported users.
+    """
+    started = time.monotonic()
+    seen: set = set()
+    processed = created = 0
+    batch: List[Dict[str, str]] = []
+    row_offset = 1
+    for raw in _with_sentinel(rows):
+        if raw is not None:
+            batch.append(raw)
+            if len(batch) < batch_size:
+                continue
+        if not batch:
+            break
+        results, candidates = _validate_batch(batch, row_offset, seen, actor)
+        row_offset += len(batch)
+        batch = []
+
+        existing = set(
+            User.objects.filter_by_emails([c["email"] for _, c in candidates]).values_list("email_ci", flat=True)
+        )
+        to_create = []
+        for result, cleaned in candidates:
+            if cleaned["email"] in existing:
+                result.update(status="exists", detail="User already exists.")
+            else:
+                to_create.append((result, cleaned))
+
+        hashes = _hash_passwords([c.pop("password") for _, c in to_create], workers)
+
+        users = [User(password=h, **c) for (_, c), h in zip(to_create, hashes)]
+        User.objects.bulk_create(users, batch_size=batch_size, ignore_conflicts=True)
+        # pks are generated client side, so the rows that were really inserted carry ours
+        inserted = set(User.objects.filter(pk__in=[u.pk for u in users]).values_list("pk", flat=True)) if users else set()
+        for (result, _), user in zip(to_create, users):
+            if user.pk in inserted:
+                result["status"] = "created"
+            else:
+                result.update(status="exists", detail="User already exists.")
+        created += len(inserted)
+        processed += len(results)
+
+        yield from results
+        elapsed = time.monotonic() - started
+        yield {"progress": {
+            "processed": processed,
+            "created": created,
+            "rows_per_sec": round(processed / elapsed, 1) if elapsed else None,
+        }}
+    elapsed = time.monotonic() - started
+    logger.info("user import: %d rows in %.2fs (%.0f rows/sec)", processed, elapsed, processed / elapsed if elapsed else 0)
+
+
+def _with_sentinel(rows):
+    yield from rows
+    yield None
@@ -9,8 +9,11 @@ urlpatterns = [
     path("logout/", views.LogoutView.as_view(), name="auth-logout"),
     # Rotate & refresh
     path("token/refresh/", views.TokenRefreshRotateView.as_view(), name="token-refresh-rotate"),
+    # logout under the refresh cookie's path, so opaque-mode handles are sent and revoked
+    path("token/logout/", views.LogoutView.as_view(), name="token-logout"),
     # Invite & accept
     path("invite/", views.InviteCreateView.as_view(), name="invite-create"),
+    path("invite/bulk/", views.InviteBulkCreateView.as_view(), name="invite-bulk-create"),
     path("invite/accept/", views.AcceptInviteView.as_view(), name="invite-accept"),
     # password reset
     path("password/reset/request/", views.RequestPasswordResetView.as_view(), name="password-reset-request"),
@@ -19,9 +22,23 @@ urlpatterns = [
     path("verify-email/", views.VerifyEmailView.as_view(), name="verify-email"),
     # sessions
     path("sessions/", views.SessionsListView.as_view(), name="sessions-list"),
+    # service-to-service session / access-token introspection
+    path("introspect/", views.IntrospectView.as_view(), name="introspect"),
     # admin revoke user sessions
     # path("admin/revoke-user/<uuid:user_id>/", views.revoke_user_sessions, name="admin-revoke-user"),
 
     path("me/", views.UserView.as_view(), name="auth-user"),
+    path("users/", views.UserListView.as_view(), name="user-list"),
+    path("users/batch/", views.UserBatchView.as_view(), name="user-batch"),
+    path("users/export/", views.UserExportView.as_view(), name="user-export"),
+    path("users/import/", views.UserImportView.as_view(), name="user-import"),
     path("users/<uuid:user_id>/", views.UserDetailView.as_view(), name="user-detail"),
+    # audit
+    path("audit/", views.AuditEventsView.as_view(), name="audit-events"),
+    # request profiling captures
+    path("profiling/", views.ProfilingCaptureListView.as_view(), name="profiling-list"),
+    path("profiling/<str:capture_id>/", views.ProfilingCaptureDownloadView.as_view(), name="profiling-download"),
+    # health
+    path("health/db/", views.DatabaseHealthView.as_view(), name="health-db"),
+    path("metrics/rotation/", views.RotationMetricsView.as_view(), name="metrics-rotation"),
 ]
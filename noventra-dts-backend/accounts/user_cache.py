@@ -0,0 +1,147 @@
+# backend/apps/accounts/user_cache.py
+"""
+Per-user cache of serialized UserSerializer output.
+Entries are invalidated from accounts.signals on User save/delete.
+
+Also keeps a per-user version stamp (bumped on profile/role/active changes) that /me/
+uses as its ETag / Last-Modified, plus the rendered JSON body keyed by that version.
+Signals only reach the cache of the process that saved the user, so a stamp older than
+USER_VERSION_RECHECK_SECONDS is re-checked against the row: unchanged fields keep the
+version (stable ETag), changed ones mint a new one. A deactivation or profile change made
+elsewhere is therefore seen within that window even with a per-process cache.
+For the same reason user:<id> entries only live USER_VERSION_RECHECK_SECONDS with a
+per-process backend (LocMemCache); USER_CACHE_TTL applies with a shared cache.
+"""
+import hashlib
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from .models import User
+from .serializers import compiled_user_serializer
+
+CACHE_PREFIX_USER = getattr(settings, "CACHE_PREFIX_USER", "user:")
+USER_CACHE_TTL = int(getattr(settings, "USER_CACHE_TTL", 600))  # 10 minutes
+CACHE_PREFIX_USER_VERSION = getattr(settings, "CACHE_PREFIX_USER_VERSION", "user_ver:")
+CACHE_PREFIX_USER_BODY = getattr(settings, "CACHE_PREFIX_USER_BODY", "user_body:")
+USER_VERSION_RECHECK_SECONDS = int(getattr(settings, "USER_VERSION_RECHECK_SECONDS", 30))
+
+# saves touching any of these fields change what /me/ returns
+VERSIONED_USER_FIELDS = frozenset({"email", "full_name", "role", "is_active"})
+
+
+def _entry_ttl() -> int:
+    # other workers never see our invalidations on a per-process backend
+    if isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache)):
+        return min(USER_CACHE_TTL, USER_VERSION_RECHECK_SECONDS)
+    return USER_CACHE_TTL
+
+
+def _user_key(user_id) -> str:
+    return f"{CACHE_PREFIX_USER}{user_id}"
+
+
+def get_user_data(user_id) -> Optional[Dict[str, Any]]:
+    """Serialized user for user_id (cache-first) or None if the user does not exist."""
+    return get_user_data_many([user_id]).get(str(user_id))
+
+
+def get_user_data_many(user_ids: Iterable) -> Dict[str, Dict[str, Any]]:
+    """
+    Resolve many users at once: one get_many against the cache, then a single
+    pk__in query for the misses, which are written back with set_many.
+    Returns {str(user_id): data}; unknown ids are simply absent.
+    """
+    ids = list(dict.fromkeys(str(u) for u in user_ids))
+    if not ids:
+        return {}
+    cached = cache.get_many([_user_key(i) for i in ids])
+    found = {i: cached[_user_key(i)] for i in ids if _user_key(i) in cached}
+
+    missing = [i for i in ids if i not in found]
+    if missing:
+        rows = User.objects.filter(pk__in=missing).values(*compiled_user_serializer.columns)
+        fresh = {str(r["id"]): compiled_user_serializer.to_representation(r) for r in rows}
+        if fresh:
+            cache.set_many({_user_key(i): data for i, data in fresh.items()}, timeout=_entry_ttl())
+        found.update(fresh)
+    return found
+
+
+def invalidate_user_data(user_id) -> None:
+    cache.delete(_user_key(user_id))
+
+
+# ---------------------------
+# Version stamps (/me/ ETag)
+# ---------------------------
+def _version_key(user_id) -> str:
+    return f"{CACHE_PREFIX_USER_VERSION}{user_id}"
+
+
+def _body_key(user_id, version: int) -> str:
+    return f"{CACHE_PREFIX_USER_BODY}{user_id}:{version}"
+
+
+def _new_version() -> int:
+    # microsecond timestamp: monotonic enough to double as Last-Modified
+    return time.time_ns() // 1000
+
+
+def _fingerprint(values) -> str:
+    """Digest of the versioned fields; stable across processes (unlike hash())."""
+    raw = "\x1f".join(str(values[f]) for f in sorted(VERSIONED_USER_FIELDS))
+    return hashlib.blake2b(raw.encode(), digest_size=8).hexdigest()
+
+
+def _stamp(version: int, values) -> Tuple[int, bool, str, float]:
+    # (version, is_active, fingerprint, checked at)
+    return version, bool(values["is_active"]), _fingerprint(values), time.time()
+
+
+def bump_user_version(user) -> int:
+    version = _new_version()
+    cache.set(_version_key(user.pk), _stamp(version, {f: getattr(user, f) for f in VERSIONED_USER_FIELDS}), timeout=None)
+    return version
+
+
+def get_user_version(user_id) -> Optional[Tuple[int, bool]]:
+    """
+    Return (version, is_active) for user_id, cache-only while the stamp is fresh.
+    Otherwise the versioned fields are read once (pk lookup) and the stamp refreshed;
+    returns None if the user does not exist.
+    """
+    key = _version_key(user_id)
+    entry = cache.get(key)
+    if entry is not None and len(entry) == 4 and time.time() - entry[3] < USER_VERSION_RECHECK_SECONDS:
+        return entry[0], entry[1]
+    row = User.objects.filter(pk=user_id).values(*VERSIONED_USER_FIELDS).first()
+    if row is None:
+        cache.delete(key)
+        return None
+    if entry is None:
+        # add() so concurrent misses agree on one stamp
+        cache.add(key, _stamp(_new_version(), row), timeout=None)
+        entry = cache.get(key) or _stamp(_new_version(), row)
+        return entry[0], entry[1]
+    fingerprint = _fingerprint(row)
+    if len(entry) == 4 and entry[2] == fingerprint:
+        version = entry[0]
+    else:
+        # changed by another process: this process's user:<id> copy is stale as well
+        version = _new_version()
+        invalidate_user_data(user_id)
+    cache.set(key, _stamp(version, row), timeout=None)
+    return version, bool(row["is_active"])
+
+
+def get_user_body(user_id, version: int) -> Optional[bytes]:
+    return cache.get(_body_key(user_id, version))
+
+
+def set_user_body(user_id, version: int, body: bytes) -> None:
+    cache.set(_body_key(user_id, version), body, timeout=USER_CACHE_TTL)
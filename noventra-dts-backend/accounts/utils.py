@@ -1,6 +1,14 @@
 # backend/apps/accounts/utils.py
+import csv
+import io
+import logging
+
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.mail import send_mail, get_connection, EmailMessage
+
+from .audit_store import get_audit_store
+
+logger = logging.getLogger(__name__)
 
 def extract_request_meta(request):
     """
@@ -20,6 +28,84 @@ def send_invite_email(invite_obj, request=None):
     body = f"You were invited. Accept: {link}"
     send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, [invite_obj.email])
 
+def send_invite_emails_batch(invites, request=None, batch_size=None):
+    """
+    Batched dispatcher for invite emails: reuses one mail connection per batch
+    instead of opening one per send_mail call.
+    Returns a list of invites whose batch failed to send.
+    """
+    batch_size = batch_size or int(getattr(settings, "INVITE_EMAIL_BATCH_SIZE", 100))
+    frontend = getattr(settings, "FRONTEND_URL", "")
+    failed = []
+    for start in range(0, len(invites), batch_size):
+        chunk = invites[start:start + batch_size]
+        messages = [
+            EmailMessage(
+                "You're invited",
+                f"You were invited. Accept: {frontend}/auth/accept-invite?token={inv.token}",
+                settings.DEFAULT_FROM_EMAIL,
+                [inv.email],
+            )
+            for inv in chunk
+        ]
+        try:
+            connection = get_connection()
+            connection.send_messages(messages)
+        except Exception:
+            failed.extend(chunk)
+    return failed
+
+def iter_invite_rows(request):
+    """
+    Iterator of (row_number, email, role) from a bulk invite request.
+    Accepts a JSON list (of emails or {"email", "role"} objects), {"invites": [...]},
+    or a multipart CSV upload in the "file" field (header row with an "email" column,
+    otherwise the first column is used). CSV uploads are read incrementally.
+    Raises ValueError up front when a JSON body is not a list.
+    """
+    upload = request.FILES.get("file") if hasattr(request, "FILES") else None
+    if upload is not None:
+        return _iter_invite_csv(upload)
+    data = request.data
+    if isinstance(data, dict):
+        data = data.get("invites", [])
+    if not isinstance(data, list):
+        raise ValueError("Expected a JSON list of invites")
+    return _iter_invite_json(data)
+
+def _iter_invite_json(data):
+    for row_no, item in enumerate(data, start=1):
+        if isinstance(item, dict):
+            role = item.get("role")
+            yield row_no, str(item.get("email") or ""), str(role) if role is not None else None
+        else:
+            yield row_no, str(item), None
+
+def _iter_invite_csv(upload):
+    reader = csv.reader(io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline=""))
+    header = next(reader, None) or []
+    lowered = [h.strip().lower() for h in header]
+    if "email" in lowered:
+        email_idx = lowered.index("email")
+        role_idx = lowered.index("role") if "role" in lowered else None
+        row_no = 1
+    else:
+        # no header: treat the first line as data
+        email_idx, role_idx, row_no = 0, None, 0
+        reader = _chain_row(header, reader)
+    for row in reader:
+        row_no += 1
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        email = row[email_idx] if len(row) > email_idx else ""
+        role = row[role_idx] if role_idx is not None and len(row) > role_idx else None
+        yield row_no, email, role
+
+def _chain_row(first, reader):
+    if first:
+        yield first
+    yield from reader
+
 def send_verification_email(verification_obj, request=None):
     frontend = getattr(settings, "FRONTEND_URL", "")
     link = f"{frontend}/auth/verify-email?token={verification_obj.token}"
@@ -30,10 +116,13 @@ def send_password_reset_email(reset_obj, request=None):
     link = f"{frontend}/auth/reset-password?token={reset_obj.token}"
     send_mail("Reset password", f"Reset: {link}", settings.DEFAULT_FROM_EMAIL, [reset_obj.user.email])
 
-# Audit hook - call asynchronously in production (Celery)
+# Audit hook - buffered append to the segmented audit store (accounts/audit_store.py)
 def audit_log(actor, action, entity_type=None, entity_id=None, meta=None):
     """
-    Minimal stub. Replace with real audit service or Celery task.
+    Record an audit event. Never raises: audit failures must not break the request.
     """
-    # ex: enqueue celery task here
-    pass
+    try:
+        actor_id = getattr(actor, "pk", actor)
+        get_audit_store().append(actor_id, action, entity_type=entity_type, entity_id=entity_id, meta=meta)
+    except Exception:
+        logger.exception("audit_log failed for %s", action)
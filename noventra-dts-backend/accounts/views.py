@@ -1,6 +1,14 @@
 # backend/apps/accounts/views.py
+import itertools
+import json
+import uuid
 from datetime import timedelta
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from django.db import transaction
 from django.utils import timezone
 from django.core.cache import cache
@@ -8,6 +16,9 @@ from django.core.cache import cache
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.throttling import ScopedRateThrottle
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework_simplejwt.tokens import RefreshToken as SimpleRefreshToken
 
@@ -21,8 +32,21 @@ from .serializers import (
     PasswordResetConfirmSerializer,
     UserSerializer,
     RegisterSerializer,
+    compiled_session_serializer,
 )
+from .renderers import json_dumps, FastJSONParser
+from .events import publish_sessions_revoked
+from .audit_store import get_audit_store
+from .profiling import list_captures, open_capture
+from .dbpool import check_databases_cached, pool_metrics
+from .tracing import current_span, span
+from .ws import WS_EVENTS_PATH
+from .rotation_policy import RotationDecision, get_rotation_policy, record_rotation_decision, rotation_metrics
+from .introspection import INTROSPECTION_MAX_ITEMS, authenticate_service, introspect
+from .db_router import pin_to_primary, read_from, replica_for
 from .models import (
+    ROLE_RANK,
+    can_assign_role,
     User,
     RefreshToken as DBRefreshToken,
     InviteToken,
@@ -31,18 +55,32 @@ from .models import (
 )
 from .tokens import (
     create_stored_refresh_token,
+    mint_access_token,
     rotate_refresh_token,
+    RefreshTokenReused,
     invalidate_all_user_sessions,
     get_cached_rt_meta,
     touch_last_active_throttled,
     create_email_verification,
     create_invite_token,
+    create_invite_tokens_bulk,
+    find_taken_invite_emails,
     create_password_reset,
+    hash_token,
+    normalize_jti,
+    parse_refresh_handle,
+    refresh_handle_matches,
+    REFRESH_TOKEN_MODE,
 )
-from .tokens import cache_rt_meta
+from .tokens import _cache_key, cache_rt_meta
+from .transfer import iter_export, parse_export_fields, iter_import_rows, import_users
+from .pagination import encode_cursor, decode_cursor, seek_after_desc
+from .user_cache import get_user_data, get_user_data_many, get_user_version, get_user_body, set_user_body
 from .utils import (
     extract_request_meta,
     send_invite_email,
+    send_invite_emails_batch,
+    iter_invite_rows,
     send_password_reset_email,
     send_verification_email,
     audit_log,
@@ -59,6 +97,22 @@ REFRESH_JTI_COOKIE_NAME = getattr(settings, "REFRESH_JTI_COOKIE_NAME", "refresh_
 REFRESH_COOKIE_MAX_AGE = int(getattr(settings, "REFRESH_COOKIE_MAX_AGE", 60 * 60 * 24 * 30))
 REFRESH_REQUIRE_CUSTOM_HEADER = bool(getattr(settings, "REFRESH_REQUIRE_CUSTOM_HEADER", False))
 REFRESH_REQUIRED_HEADER_NAME = getattr(settings, "REFRESH_REQUIRED_HEADER_NAME", "X-CSRF-REFRESH")
+REFRESH_HANDLE_COOKIE_NAME = getattr(settings, "REFRESH_HANDLE_COOKIE_NAME", "rh")
+REFRESH_HANDLE_COOKIE_PATH = getattr(settings, "REFRESH_HANDLE_COOKIE_PATH", "/api/auth/token/")
+# a second copy of the handle for the session event socket, which has no access token to
+# show (a separate name: a response can't carry two cookies of the same name)
+REFRESH_HANDLE_WS_COOKIE_NAME = getattr(settings, "REFRESH_HANDLE_WS_COOKIE_NAME", "rh_ws")
+REFRESH_HANDLE_COOKIES = ((REFRESH_HANDLE_COOKIE_NAME, REFRESH_HANDLE_COOKIE_PATH), (REFRESH_HANDLE_WS_COOKIE_NAME, WS_EVENTS_PATH))
+
+# Bulk invite limits
+BULK_INVITE_BATCH_SIZE = int(getattr(settings, "BULK_INVITE_BATCH_SIZE", 500))
+BULK_INVITE_MAX_ROWS = int(getattr(settings, "BULK_INVITE_MAX_ROWS", 5000))  # above this, use ?stream=1
+
+# Users directory
+USER_LIST_FIELDS = ("id", "email", "full_name", "role", "is_active", "created_at")
+USER_LIST_DEFAULT_LIMIT = int(getattr(settings, "USER_LIST_DEFAULT_LIMIT", 50))
+USER_LIST_MAX_LIMIT = int(getattr(settings, "USER_LIST_MAX_LIMIT", 200))
+USER_BATCH_MAX_IDS = int(getattr(settings, "USER_BATCH_MAX_IDS", 100))
 
 
 # backend/apps/accounts/views.py  (replace RegisterView only)
@@ -114,6 +168,41 @@ class RegisterView(APIView):
 
         return Response({"detail": detail}, status=status_code)
 
+def _set_refresh_cookies(request, response, refresh_str, jti):
+    """
+    jwt mode: refresh JWT + refresh_jti cookies on "/".
+    opaque mode: the handle alone, sent only to REFRESH_HANDLE_COOKIE_PATH (token endpoints)
+    and, as REFRESH_HANDLE_WS_COOKIE_NAME, to the session event socket.
+    """
+    cookie_secure = getattr(settings, "SESSION_COOKIE_SECURE", True)
+    if REFRESH_TOKEN_MODE != "opaque":
+        for name, value in ((REFRESH_TOKEN_COOKIE_NAME, refresh_str), (REFRESH_JTI_COOKIE_NAME, jti)):
+            response.set_cookie(
+                name,
+                value,
+                max_age=REFRESH_COOKIE_MAX_AGE,
+                httponly=True,
+                secure=cookie_secure,
+                samesite="Lax",
+                path="/",
+            )
+        return
+    for name, path in REFRESH_HANDLE_COOKIES:
+        response.set_cookie(
+            name,
+            refresh_str,
+            max_age=REFRESH_COOKIE_MAX_AGE,
+            httponly=True,
+            secure=cookie_secure,
+            samesite="Lax",
+            path=path,
+        )
+    # drop cookies left over from jwt mode, otherwise they keep riding on every request
+    for name in (REFRESH_TOKEN_COOKIE_NAME, REFRESH_JTI_COOKIE_NAME):
+        if name in request.COOKIES:
+            response.delete_cookie(name, path="/")
+
+
 # backend/apps/accounts/views.py  (LoginView — replace or copy comments)
 
 
@@ -132,11 +221,12 @@ class LoginView(APIView):
             return Response({"detail": "Missing credentials"}, status=status.HTTP_400_BAD_REQUEST)
 
         # Try Django authenticate first — supports custom backends and username/email as configured.
-        user = authenticate(request=request, username=email, password=password)
+        with span("auth.authenticate"):  # password hash check dominates
+            user = authenticate(request=request, username=email, password=password)
         if user is None:
             # Try fallback lookup by email (in case authenticate uses username field)
             try:
-                u = User.objects.get(email__iexact=email)
+                u = User.objects.get_by_email(email)
             except User.DoesNotExist:
                 logger.info("Login failed - user not found for: %s", email)
                 return Response({"detail": "Invalid credentials"}, status=status.HTTP_401_UNAUTHORIZED)
@@ -160,26 +250,9 @@ class LoginView(APIView):
         cookie_secure = getattr(settings, "SESSION_COOKIE_SECURE", True)
 
         # Log cookies we set
-        logger.debug("Setting refresh cookie (secure=%s) jti=%s", cookie_secure, jti)
+        logger.debug("Setting refresh cookie (secure=%s, mode=%s) jti=%s", cookie_secure, REFRESH_TOKEN_MODE, jti)
 
-        response.set_cookie(
-            REFRESH_TOKEN_COOKIE_NAME,
-            refresh_str,
-            max_age=REFRESH_COOKIE_MAX_AGE,
-            httponly=True,
-            secure=cookie_secure,
-            samesite="Lax",
-            path="/",
-        )
-        response.set_cookie(
-            REFRESH_JTI_COOKIE_NAME,
-            jti,
-            max_age=REFRESH_COOKIE_MAX_AGE,
-            httponly=True,
-            secure=cookie_secure,
-            samesite="Lax",
-            path="/",
-        )
+        _set_refresh_cookies(request, response, refresh_str, jti)
         return response
 
 
@@ -188,19 +261,31 @@ class LogoutView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
-        jti = request.COOKIES.get(REFRESH_JTI_COOKIE_NAME)
+        jti = normalize_jti(request.COOKIES.get(REFRESH_JTI_COOKIE_NAME))
+        handle_secret = None
+        if not jti:
+            # opaque mode: the handle cookie only reaches token/logout/
+            parsed = parse_refresh_handle(request.COOKIES.get(REFRESH_HANDLE_COOKIE_NAME))
+            if parsed:
+                jti, handle_secret = parsed
         if jti:
             try:
-                rt = DBRefreshToken.objects.get(jti=jti)
-                rt.revoke(reason="user_logout")
-                # evict cache entry (our tokens helpers use rt: prefix)
-                cache.delete(f"rt:{jti}")
+                rt = DBRefreshToken.objects.get_by_jti(jti)
             except DBRefreshToken.DoesNotExist:
-                pass
+                rt = None
+            if rt is not None and (handle_secret is None or refresh_handle_matches(rt.handle_hash, handle_secret)):
+                rt.revoke(reason="user_logout")
+                cache.delete(_cache_key(jti))
+                publish_sessions_revoked({str(rt.user_id): [jti]}, "user_logout")
+                pin_to_primary([rt.user_id])
 
         response = Response({"detail": "Logged out"}, status=status.HTTP_200_OK)
-        response.delete_cookie(REFRESH_TOKEN_COOKIE_NAME, path="/api/auth/token/")
+        # same paths as set in _set_refresh_cookies, or the browser keeps the cookie
+        response.delete_cookie(REFRESH_TOKEN_COOKIE_NAME, path="/")
         response.delete_cookie(REFRESH_JTI_COOKIE_NAME, path="/")
+        if REFRESH_TOKEN_MODE == "opaque" or REFRESH_HANDLE_COOKIE_NAME in request.COOKIES:
+            for name, path in REFRESH_HANDLE_COOKIES:
+                response.delete_cookie(name, path=path)
         try:
             audit_log(request.user, "LOGOUT", entity_type="user", entity_id=str(request.user.id), meta=extract_request_meta(request))
         except Exception:
@@ -222,21 +307,35 @@ class TokenRefreshRotateView(APIView):
         if REFRESH_REQUIRE_CUSTOM_HEADER and not request.headers.get(REFRESH_REQUIRED_HEADER_NAME):
             return Response({"detail": f"Missing required header {REFRESH_REQUIRED_HEADER_NAME}"}, status=status.HTTP_403_FORBIDDEN)
 
-        refresh_str = request.COOKIES.get(REFRESH_TOKEN_COOKIE_NAME)
-        if not refresh_str:
-            return Response({"detail": "Refresh token missing"}, status=status.HTTP_401_UNAUTHORIZED)
+        handle = request.COOKIES.get(REFRESH_HANDLE_COOKIE_NAME) if REFRESH_TOKEN_MODE == "opaque" else None
+        handle_secret = None
+        if handle:
+            # opaque handle: no signature to verify; the secret half is checked against the row
+            parsed = parse_refresh_handle(handle)
+            if parsed is None:
+                return Response({"detail": "Invalid refresh token"}, status=status.HTTP_401_UNAUTHORIZED)
+            incoming_jti, handle_secret = parsed
+            user_id = None  # an unverified handle must not trigger revoke-all for anyone
+        else:
+            # jwt mode, or a jwt cookie issued before switching to opaque mode
+            refresh_str = request.COOKIES.get(REFRESH_TOKEN_COOKIE_NAME)
+            if not refresh_str:
+                return Response({"detail": "Refresh token missing"}, status=status.HTTP_401_UNAUTHORIZED)
 
-        # Verify signature & extract jti & user id
-        try:
-            incoming_rt = SimpleRefreshToken(refresh_str)
-            incoming_jti = incoming_rt["jti"]
-            user_claim = settings.SIMPLE_JWT.get("USER_ID_CLAIM", "user_id")
-            user_id = incoming_rt.get(user_claim)
-        except Exception:
-            return Response({"detail": "Invalid refresh token"}, status=status.HTTP_401_UNAUTHORIZED)
+            # Verify signature & extract jti & user id
+            try:
+                with span("jwt.decode"):
+                    incoming_rt = SimpleRefreshToken(refresh_str)
+                incoming_jti = incoming_rt["jti"]
+                user_claim = settings.SIMPLE_JWT.get("USER_ID_CLAIM", "user_id")
+                user_id = incoming_rt.get(user_claim)
+            except Exception:
+                return Response({"detail": "Invalid refresh token"}, status=status.HTTP_401_UNAUTHORIZED)
 
         # cache-first meta check
         meta = get_cached_rt_meta(incoming_jti)
+        if meta and handle_secret is not None and not refresh_handle_matches(meta.get("handle_hash"), handle_secret):
+            meta = None  # unverified handle: let the DB row decide
         now = timezone.now()
         if meta:
             # quick cache based reject
@@ -250,9 +349,9 @@ class TokenRefreshRotateView(APIView):
                         pass
                 return Response({"detail": "Refresh token invalid"}, status=status.HTTP_401_UNAUTHORIZED)
 
-        # DB lookup (use select_related to also load user)
+        # DB lookup on the jti's shard (db_rt.user then loads from the primary)
         try:
-            db_rt = DBRefreshToken.objects.select_related("user").get(jti=incoming_jti)
+            db_rt = DBRefreshToken.objects.get_by_jti(incoming_jti)
         except DBRefreshToken.DoesNotExist:
             # unknown jti -> possible replay. Revoke all user's sessions if we can deduce user.
             if user_id:
@@ -263,6 +362,9 @@ class TokenRefreshRotateView(APIView):
                     pass
             return Response({"detail": "Refresh token not recognized (possible reuse). All sessions revoked."}, status=status.HTTP_401_UNAUTHORIZED)
 
+        if handle_secret is not None and not refresh_handle_matches(db_rt.handle_hash, handle_secret):
+            return Response({"detail": "Invalid refresh token"}, status=status.HTTP_401_UNAUTHORIZED)
+
         # If revoked (and rotated) -> reuse detection
         if db_rt.revoked:
             if db_rt.replaced_by_jti:
@@ -274,37 +376,40 @@ class TokenRefreshRotateView(APIView):
         # expiry check
         if db_rt.expires_at and db_rt.expires_at < now:
             db_rt.revoke(reason="expired")
-            cache.delete(f"rt:{incoming_jti}")
+            cache.delete(_cache_key(incoming_jti))
             return Response({"detail": "Refresh token expired"}, status=status.HTTP_401_UNAUTHORIZED)
 
+        if handle_secret is None and REFRESH_TOKEN_MODE == "opaque":
+            # legacy JWT cookie: rotate so the client moves to an opaque handle
+            decision = RotationDecision(True, "upgrade")
+        else:
+            decision = get_rotation_policy().decide(db_rt.created_at, db_rt.expires_at, now)
+        record_rotation_decision(decision)
+        current_span().set("rotation", f"{'rotate' if decision.rotate else 'keep'}:{decision.reason}")
+        if not decision.rotate:
+            # same session, new access token only: no insert/update, refresh cookie unchanged
+            response = Response({"access": mint_access_token(db_rt.user, db_rt.jti)}, status=status.HTTP_200_OK)
+            try:
+                touch_last_active_throttled(incoming_jti, now=now)
+            except Exception:
+                pass
+            return response
+
         # rotate now (pass db row & user to helper)
         request_meta = extract_request_meta(request)
-        new_simple_rt, new_refresh_str, new_jti, new_db_rt = rotate_refresh_token(db_rt, db_rt.user, request_meta)
+        try:
+            new_simple_rt, new_refresh_str, new_jti, new_db_rt = rotate_refresh_token(db_rt, db_rt.user, request_meta)
+        except RefreshTokenReused:
+            # another request rotated (or revoked) this token since we read it: same as reuse
+            invalidate_all_user_sessions(db_rt.user, reason="replay_detected_reuse")
+            return Response({"detail": "Refresh token reuse detected. All sessions revoked."}, status=status.HTTP_401_UNAUTHORIZED)
 
         # rotate succeeded, produce new access
         new_access = str(new_simple_rt.access_token)
 
         # set cookies with the new refresh
         response = Response({"access": new_access}, status=status.HTTP_200_OK)
-        cookie_secure = getattr(settings, "SESSION_COOKIE_SECURE", True)
-        response.set_cookie(
-            REFRESH_TOKEN_COOKIE_NAME,
-            new_refresh_str,
-            max_age=REFRESH_COOKIE_MAX_AGE,
-            httponly=True,
-            secure=cookie_secure,
-            samesite="Lax",
-            path="/",
-        )
-        response.set_cookie(
-            REFRESH_JTI_COOKIE_NAME,
-            new_jti,
-            max_age=REFRESH_COOKIE_MAX_AGE,
-            httponly=True,
-            secure=cookie_secure,
-            samesite="Lax",
-            path="/",
-        )
+        _set_refresh_cookies(request, response, new_refresh_str, new_jti)
 
         # touch last_active (throttled)
         try:
@@ -313,7 +418,7 @@ class TokenRefreshRotateView(APIView):
             pass
 
         try:
-            audit_log(db_rt.user, "TOKEN_ROTATED", entity_type="refresh", entity_id=str(db_rt.id), meta={"old_jti": db_rt.jti, "new_jti": new_jti})
+            audit_log(db_rt.user, "TOKEN_ROTATED", entity_type="refresh", entity_id=str(db_rt.id), meta={"old_jti": normalize_jti(db_rt.jti), "new_jti": new_jti})
         except Exception:
             pass
 
@@ -329,9 +434,12 @@ class InviteCreateView(APIView):
         s = InviteCreateSerializer(data=request.data)
         s.is_valid(raise_exception=True)
         email = s.validated_data["email"]
+        role = s.validated_data["role"]
+        if not can_assign_role(request.user.role, role):
+            return Response({"detail": f"Not allowed to invite role {role}"}, status=status.HTTP_403_FORBIDDEN)
 
         # Use helper to create invite token (sets expiry, invited_by)
-        inv = create_invite_token(email=email, invited_by=request.user)
+        inv = create_invite_token(email=email, invited_by=request.user, role=role)
 
         # send invite email (helper handles formatting; should be resilient)
         try:
@@ -344,6 +452,129 @@ class InviteCreateView(APIView):
         return Response({"detail": "Invite sent"}, status=status.HTTP_200_OK)
 
 
+class InviteBulkCreateView(APIView):
+    """
+    Bulk invite endpoint.
+    POST /api/auth/invite/bulk/ with a JSON array (emails or {"email", "role"} objects)
+    or a multipart CSV upload in "file".
+    Each batch dedupes against users + pending invites in one query, bulk_creates the
+    tokens and hands the sends to the batched email dispatcher.
+    Add ?stream=1 to receive NDJSON per-row results and progress lines as batches complete
+    (required above BULK_INVITE_MAX_ROWS rows).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [FastJSONParser, MultiPartParser, FormParser]
+
+    def post(self, request):
+        if request.user.role not in ("SUPER_ADMIN", "ADMIN", "HR"):
+            return Response({"detail": "Forbidden"}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            rows = iter_invite_rows(request)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if request.query_params.get("stream") in ("1", "true"):
+            return StreamingHttpResponse(self._stream(request, rows), content_type="application/x-ndjson")
+
+        # count before creating or emailing anything; at most MAX_ROWS + 1 rows are held
+        rows = list(itertools.islice(rows, BULK_INVITE_MAX_ROWS + 1))
+        if len(rows) > BULK_INVITE_MAX_ROWS:
+            return Response(
+                {"detail": f"Too many rows (max {BULK_INVITE_MAX_ROWS}); use ?stream=1"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        results = []
+        seen = set()  # emails already handled earlier in this upload
+        for batch in self._batches(rows):
+            results.extend(self._process_batch(request, batch, seen))
+        return Response({"summary": self._summarize(results), "results": results}, status=status.HTTP_200_OK)
+
+    def _stream(self, request, rows):
+        summary = {"processed": 0}
+        seen = set()
+        for batch in self._batches(rows):
+            batch_results = self._process_batch(request, batch, seen)
+            for r in batch_results:
+                summary[r["status"]] = summary.get(r["status"], 0) + 1
+                yield json.dumps(r) + "\n"
+            summary["processed"] += len(batch_results)
+            yield json.dumps({"progress": dict(summary)}) + "\n"
+        yield json.dumps({"summary": summary}) + "\n"
+
+    @staticmethod
+    def _batches(rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= BULK_INVITE_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _summarize(results):
+        summary = {"processed": len(results)}
+        for r in results:
+            summary[r["status"]] = summary.get(r["status"], 0) + 1
+        return summary
+
+    def _process_batch(self, request, batch, seen):
+        results = []
+        pending = []  # (result, email, role) rows that passed validation
+        for row_no, raw_email, role in batch:
+            email = (raw_email or "").strip().lower()
+            role = (role or "").strip() or None
+            result = {"row": row_no, "email": email}
+            try:
+                validate_email(email)
+            except ValidationError:
+                result.update(status="invalid", detail="Enter a valid email address.")
+                results.append(result)
+                continue
+            if role and role not in ROLE_RANK:
+                result.update(status="invalid", detail=f"Unknown role {role}.")
+                results.append(result)
+                continue
+            if role and not can_assign_role(request.user.role, role):
+                result.update(status="invalid", detail=f"Not allowed to invite role {role}.")
+                results.append(result)
+                continue
+            if email in seen:
+                result.update(status="duplicate", detail="Duplicate row in upload.")
+                results.append(result)
+                continue
+            seen.add(email)
+            results.append(result)
+            pending.append((result, email, role))
+
+        taken = find_taken_invite_emails(email for _, email, _ in pending)
+        to_invite = []
+        for result, email, role in pending:
+            if email in taken:
+                result.update(status="skipped", detail="User or pending invite already exists.")
+            else:
+                to_invite.append((result, email, role))
+
+        if not to_invite:
+            return results
+
+        with transaction.atomic():
+            invites = create_invite_tokens_bulk(
+                [email for _, email, _ in to_invite], invited_by=request.user, roles=[role for _, _, role in to_invite]
+            )
+        for (result, _, _), inv in zip(to_invite, invites):
+            result.update(status="invited", invite_id=str(inv.id))
+
+        failed = {inv.id for inv in send_invite_emails_batch(invites, request)}
+        for (result, email, _), inv in zip(to_invite, invites):
+            if inv.id in failed:
+                result["status"] = "send_failed"
+                audit_log(request.user, "INVITE_SEND_FAILED", entity_type="invite", entity_id=str(inv.id), meta={"email": email})
+        audit_log(request.user, "INVITE_BULK_CREATED", entity_type="invite", meta={"count": len(invites)})
+        return results
+
+
 class AcceptInviteView(APIView):
     permission_classes = [permissions.AllowAny]
 
@@ -356,7 +587,7 @@ class AcceptInviteView(APIView):
         password = s.validated_data["password"]
 
         try:
-            inv = InviteToken.objects.select_for_update().get(token=token, used=False)
+            inv = InviteToken.objects.select_for_update().get(token_hash=hash_token(token), used=False)
         except InviteToken.DoesNotExist:
             return Response({"detail": "Invalid invite"}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -364,12 +595,18 @@ class AcceptInviteView(APIView):
             return Response({"detail": "Invite expired"}, status=status.HTTP_400_BAD_REQUEST)
 
         # create or update user for the invited email
-        user, created = User.objects.get_or_create(email=inv.email, defaults={"full_name": full_name, "is_active": True})
-        if not created:
-            user.full_name = full_name
+        user = User.objects.filter_by_email(inv.email).first()
+        created = user is None
+        if created:
+            # role is only granted to new accounts, never raised on an existing one
+            user = User(email=inv.email, role=inv.role)
+        user.full_name = full_name
         user.set_password(password)
         user.is_active = True
-        user.save(update_fields=["full_name", "password", "is_active"])
+        if created:
+            user.save()
+        else:
+            user.save(update_fields=["full_name", "password", "is_active"])
 
         # mark invite used inside same transaction
         inv.used = True
@@ -388,7 +625,7 @@ class RequestPasswordResetView(APIView):
         s.is_valid(raise_exception=True)
         email = s.validated_data["email"]
         try:
-            user = User.objects.get(email=email)
+            user = User.objects.get_by_email(email)
         except User.DoesNotExist:
             # don't reveal presence of account
             return Response({"detail": "If that account exists, we'll send a reset link."}, status=status.HTTP_200_OK)
@@ -415,7 +652,7 @@ class ConfirmPasswordResetView(APIView):
         new_pass = s.validated_data["password"]
 
         try:
-            pr = PasswordResetToken.objects.select_for_update().get(token=token, used=False)
+            pr = PasswordResetToken.objects.select_for_update().get(token_hash=hash_token(token), used=False)
         except PasswordResetToken.DoesNotExist:
             return Response({"detail": "Invalid token"}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -439,11 +676,12 @@ class VerifyEmailView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def post(self, request):
-        token = request.data.get("token")
-        if not token:
+        data = request.data if isinstance(request.data, dict) else {}
+        token = data.get("token")
+        if not token or not isinstance(token, str):
             return Response({"detail": "Token required"}, status=status.HTTP_400_BAD_REQUEST)
         try:
-            v = EmailVerificationToken.objects.get(token=token, used=False)
+            v = EmailVerificationToken.objects.get(token_hash=hash_token(token), used=False)
         except EmailVerificationToken.DoesNotExist:
             return Response({"detail": "Invalid token"}, status=status.HTTP_400_BAD_REQUEST)
         if v.expires_at and v.expires_at < timezone.now():
@@ -464,19 +702,13 @@ class SessionsListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        rts = DBRefreshToken.objects.filter(user=request.user).order_by("-created_at")
-        data = [{
-            "jti": rt.jti,
-            "created_at": rt.created_at,
-            "expires_at": rt.expires_at,
-            "revoked": rt.revoked,
-            "revoked_reason": getattr(rt, "revoked_reason", None),
-            "replaced_by_jti": getattr(rt, "replaced_by_jti", None),
-            "device": rt.device,
-            "ip": rt.ip_address,
-            "last_active": getattr(rt, "last_active", None),
-        } for rt in rts]
-        return Response(data, status=status.HTTP_200_OK)
+        with read_from(replica_for(request.user.pk)):
+            rows = list(
+                DBRefreshToken.objects.for_user(request.user.pk)
+                .order_by("-created_at")
+                .values(*compiled_session_serializer.columns)
+            )
+        return HttpResponse(compiled_session_serializer.render(rows), content_type="application/json")
 
 
 @api_view(["POST"])
@@ -498,12 +730,100 @@ class UserView(APIView):
     """
     Return the currently authenticated user (or 401 if not authenticated).
     GET /api/auth/me/
+
+    Authenticates statelessly from the access token (no user row load) and serves the
+    cached rendered body for the user's current version stamp. The stamp is the strong
+    ETag / Last-Modified, so If-None-Match / If-Modified-Since answer 304 from cache alone.
+    """
+    authentication_classes = [JWTStatelessUserAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        with read_from(replica_for(request.user.id)):
+            return self._get(request)
+
+    def _get(self, request):
+        user_id = request.user.id
+        entry = get_user_version(user_id)
+        if entry is None:
+            return Response({"detail": "User not found"}, status=status.HTTP_401_UNAUTHORIZED)
+        version, is_active = entry
+        if not is_active:
+            return Response({"detail": "User is inactive"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        etag = f'"{version}"'
+        last_modified = version // 1_000_000
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is None:
+            body = get_user_body(user_id, version)
+            if body is None:
+                data = get_user_data(user_id)
+                if data is None:
+                    return Response({"detail": "User not found"}, status=status.HTTP_401_UNAUTHORIZED)
+                body = json_dumps(data)
+                set_user_body(user_id, version, body)
+            response = HttpResponse(body, content_type="application/json")
+        else:
+            response = not_modified
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+class UserListView(APIView):
+    """
+    Users directory with keyset pagination.
+    GET /api/auth/users/?role=EMPLOYEE&is_active=true&fields=id,full_name&limit=50&cursor=...
+    Pages follow User.Meta.ordering (-created_at, then -id as tiebreaker); "next" is an opaque
+    cursor. No total count is computed, so page cost is independent of table size.
+    Staff roles only (SUPER_ADMIN, ADMIN, HR), like invites: the directory exposes every email.
     """
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-        return Response(UserSerializer(user).data, status=status.HTTP_200_OK)
+        if request.user.role not in ("SUPER_ADMIN", "ADMIN", "HR"):
+            return Response({"detail": "Forbidden"}, status=status.HTTP_403_FORBIDDEN)
+        params = request.query_params
+
+        fields = USER_LIST_FIELDS
+        if params.get("fields"):
+            fields = tuple(f.strip() for f in params["fields"].split(",") if f.strip())
+            unknown = [f for f in fields if f not in USER_LIST_FIELDS]
+            if unknown or not fields:
+                return Response({"detail": f"Unknown fields: {', '.join(unknown)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = min(int(params.get("limit", USER_LIST_DEFAULT_LIMIT)), USER_LIST_MAX_LIMIT)
+        except ValueError:
+            return Response({"detail": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(limit, 1)
+
+        qs = User.objects.all()
+        if "role" in params:
+            if params["role"] not in ROLE_RANK:
+                return Response({"detail": f"Unknown role: {params['role']}"}, status=status.HTTP_400_BAD_REQUEST)
+            qs = qs.filter(role=params["role"])
+        if "is_active" in params:
+            is_active = params["is_active"].lower()
+            if is_active not in ("1", "true", "0", "false"):
+                return Response({"detail": "is_active must be true or false"}, status=status.HTTP_400_BAD_REQUEST)
+            qs = qs.filter(is_active=is_active in ("1", "true"))
+        if params.get("cursor"):
+            decoded = decode_cursor(params["cursor"])
+            if decoded is None:
+                return Response({"detail": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+            qs = seek_after_desc(qs, *decoded)
+
+        # cursor columns are always selected; only requested fields are returned
+        columns = tuple(dict.fromkeys(fields + ("id", "created_at")))
+        rows = list(qs.order_by("-created_at", "-id").values(*columns)[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"]) if has_more else None
+
+        results = [{f: row[f] for f in fields} for row in rows]
+        return Response({"results": results, "next": next_cursor}, status=status.HTTP_200_OK)
+
 
 class UserDetailView(APIView):
     """
@@ -513,8 +833,204 @@ class UserDetailView(APIView):
     permission_classes = [permissions.IsAuthenticated]  # adjust to IsAdminUser if you want restricted access
 
     def get(self, request, user_id):
-        try:
-            u = User.objects.get(pk=user_id)
-        except User.DoesNotExist:
+        with read_from(replica_for(user_id)):
+            data = get_user_data(user_id)
+        if data is None:
             return Response({"detail": "User not found"}, status=status.HTTP_404_NOT_FOUND)
-        return Response(UserSerializer(u).data, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class UserBatchView(APIView):
+    """
+    Resolve many users in one call (assignees, team members, ...).
+    GET /api/auth/users/batch/?ids=<uuid>,<uuid>,...
+    Served from the per-user cache; misses are loaded with a single pk__in query.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        raw = [i.strip() for i in request.query_params.get("ids", "").split(",") if i.strip()]
+        if not raw:
+            return Response({"detail": "ids required"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(raw) > USER_BATCH_MAX_IDS:
+            return Response({"detail": f"At most {USER_BATCH_MAX_IDS} ids per request"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            ids = [str(uuid.UUID(i)) for i in raw]
+        except ValueError:
+            return Response({"detail": "ids must be UUIDs"}, status=status.HTTP_400_BAD_REQUEST)
+
+        found = get_user_data_many(ids)
+        missing = [i for i in dict.fromkeys(ids) if i not in found]
+        return Response({"results": found, "missing": missing}, status=status.HTTP_200_OK)
+
+
+class IntrospectView(APIView):
+    """
+    Batch session / access-token status for internal services (see accounts/introspection.py).
+    POST /api/auth/introspect/ with `Authorization: Service <key>`.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        if authenticate_service(request) is None:
+            return Response({"detail": "Service credential required"}, status=status.HTTP_401_UNAUTHORIZED)
+        data = request.data if isinstance(request.data, dict) else {}
+        jtis = data.get("jtis") or []
+        tokens = data.get("tokens") or []
+        if not isinstance(jtis, list) or not isinstance(tokens, list):
+            return Response({"detail": "jtis and tokens must be lists"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(jtis) + len(tokens) > INTROSPECTION_MAX_ITEMS:
+            return Response({"detail": f"At most {INTROSPECTION_MAX_ITEMS} items per request"}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = Response(introspect(jtis, tokens), status=status.HTTP_200_OK)
+        # per-item "ttl" is the caching hint; the batch itself is not cacheable
+        response["Cache-Control"] = "no-store"
+        return response
+
+
+class UserExportView(APIView):
+    """
+    Stream all users as CSV or NDJSON with constant memory.
+    GET /api/auth/users/export/?export_format=csv|ndjson&fields=email,full_name,role
+    (not ?format=, which DRF reserves for renderer selection)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        if request.user.role not in ("SUPER_ADMIN", "ADMIN"):
+            return Response({"detail": "Forbidden"}, status=status.HTTP_403_FORBIDDEN)
+        fmt = "ndjson" if request.query_params.get("export_format") == "ndjson" else "csv"
+        try:
+            fields = parse_export_fields(request.query_params.get("fields"))
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        content_type = "application/x-ndjson" if fmt == "ndjson" else "text/csv"
+        response = StreamingHttpResponse(iter_export(fields, fmt), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="users.{fmt}"'
+        audit_log(request.user, "USERS_EXPORTED", entity_type="user", meta={"format": fmt, "fields": list(fields)})
+        return response
+
+
+class UserImportView(APIView):
+    """
+    Import users from a CSV (header row) or NDJSON upload in "file".
+    POST /api/auth/users/import/?import_format=csv|ndjson[&stream=1]
+    Columns: email, full_name, role, is_active, is_staff, password (plain, hashed server side).
+    Rows may not grant a role above the caller's, or is_staff unless the caller is staff.
+    With ?stream=1 per-row results and progress (incl. rows_per_sec) are streamed as NDJSON.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request):
+        if request.user.role not in ("SUPER_ADMIN", "ADMIN"):
+            return Response({"detail": "Forbidden"}, status=status.HTTP_403_FORBIDDEN)
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"detail": "file required"}, status=status.HTTP_400_BAD_REQUEST)
+        fmt = "ndjson" if request.query_params.get("import_format") == "ndjson" else "csv"
+
+        audit_log(request.user, "USERS_IMPORTED", entity_type="user", meta={"format": fmt, "file": upload.name})
+        events = import_users(iter_import_rows(upload, fmt), actor=request.user)
+        if request.query_params.get("stream") in ("1", "true"):
+            return StreamingHttpResponse((json.dumps(e) + "\n" for e in events), content_type="application/x-ndjson")
+
+        results, summary = [], {}
+        for event in events:
+            if "progress" in event:
+                summary = event["progress"]
+            else:
+                results.append(event)
+        return Response({"summary": summary, "results": results}, status=status.HTTP_200_OK)
+
+
+class AuditEventsView(APIView):
+    """
+    Stream audit events as NDJSON, oldest first.
+    GET /api/auth/audit/?entity_type=user&entity_id=<id> | ?actor=<user id>
+        optional: since / until (unix timestamps), limit
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        if request.user.role not in ("SUPER_ADMIN", "ADMIN"):
+            return Response({"detail": "Forbidden"}, status=status.HTTP_403_FORBIDDEN)
+        params = request.query_params
+        try:
+            since = float(params["since"]) if params.get("since") else None
+            until = float(params["until"]) if params.get("until") else None
+            limit = int(params["limit"]) if params.get("limit") else None
+        except ValueError:
+            return Response({"detail": "since, until and limit must be numbers"}, status=status.HTTP_400_BAD_REQUEST)
+        if not (params.get("entity_type") or params.get("entity_id") or params.get("actor")) and since is None:
+            return Response({"detail": "Filter by entity, actor or since"}, status=status.HTTP_400_BAD_REQUEST)
+
+        events = get_audit_store().iter_events(
+            entity_type=params.get("entity_type"),
+            entity_id=params.get("entity_id"),
+            actor_id=params.get("actor"),
+            since=since,
+            until=until,
+        )
+        if limit is not None:
+            events = itertools.islice(events, limit)
+        return StreamingHttpResponse((json_dumps(e) + b"\n" for e in events), content_type="application/x-ndjson")
+
+
+class ProfilingCaptureListView(APIView):
+    """
+    List request profiles captured by ProfilingMiddleware, newest first.
+    GET /api/auth/profiling/
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        if request.user.role != "SUPER_ADMIN":
+            return Response({"detail": "Forbidden"}, status=status.HTTP_403_FORBIDDEN)
+        return Response({"results": list_captures()})
+
+
+class ProfilingCaptureDownloadView(APIView):
+    """GET /api/auth/profiling/<id>/ -> gzip JSON capture"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, capture_id):
+        if request.user.role != "SUPER_ADMIN":
+            return Response({"detail": "Forbidden"}, status=status.HTTP_403_FORBIDDEN)
+        fh = open_capture(capture_id)
+        if fh is None:
+            return Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(fh, as_attachment=True, filename=f"{capture_id}.json.gz", content_type="application/gzip")
+
+
+class RotationMetricsView(APIView):
+    """GET /api/auth/metrics/rotation/ -> this process's refresh rotation decisions (super admin)."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        if request.user.role != "SUPER_ADMIN":
+            return Response({"detail": "Forbidden"}, status=status.HTTP_403_FORBIDDEN)
+        return Response(rotation_metrics(), status=status.HTTP_200_OK)
+
+
+class DatabaseHealthView(APIView):
+    """
+    GET /api/auth/health/db/ -> 200 when every database answers SELECT 1, else 503.
+    Super admins also get connection / pool metrics.
+    Public, so the probe result is reused for DB_HEALTH_CHECK_CACHE_SECONDS and callers are
+    rate limited by the "health" throttle scope.
+    """
+    permission_classes = [permissions.AllowAny]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = "health"
+
+    def get(self, request):
+        checks = check_databases_cached()
+        healthy = all(c["ok"] for c in checks.values())
+        body = {"status": "ok" if healthy else "unavailable"}
+        if getattr(request.user, "role", None) == "SUPER_ADMIN":
+            body["databases"] = checks
+            body["connections"] = pool_metrics()
+        return Response(body, status=status.HTTP_200_OK if healthy else status.HTTP_503_SERVICE_UNAVAILABLE)
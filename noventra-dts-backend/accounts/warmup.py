@@ -0,0 +1,182 @@
+# backend/apps/accounts/warmup.py
+"""
+Cache warm-up for a cold per-process cache (LocMemCache after a deploy/restart).
+
+warm_caches() streams recently active, live RefreshToken rows (most recent last_active
+first, merged across shards) in chunks and writes their rt:<jti> metadata with set_many,
+then warms the per-user cache (user_cache.get_user_data_many) for the owners of each
+chunk. It stops at whichever budget runs out first:
+  - max_seconds       wall time
+  - max_bytes         pickled size of the values written (what LocMemCache stores)
+  - max_entries       cache entries written; also capped below the cache's MAX_ENTRIES so
+                      warm-up never triggers LocMemCache culling
+Entries already present are left alone. Revocation deletes rt: keys rather than marking
+them, so that alone can't protect a revocation landing between the read and set_many;
+instead each chunk is re-checked against the database after set_many and entries whose row
+was revoked meanwhile are deleted again. Either the revocation's own delete runs after our
+write, or our re-check runs after its commit.
+
+Triggers:
+  - CACHE_WARMUP_ON_BOOT = True: each worker process warms itself in a background thread
+    on its first request (fork-safe: works with preforking servers).
+  - `manage.py accounts_warm_cache`, for shared caches (Redis/Memcached) after a flush.
+"""
+import heapq
+import itertools
+import logging
+import os
+import pickle
+import threading
+import time
+from datetime import timedelta
+from typing import Callable, Dict, Iterator, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_started
+from django.db import connections
+from django.utils import timezone
+
+from .models import RefreshToken
+from .sharding import all_shards, is_sharded
+from .tokens import CACHE_PREFIX_RT, CACHE_TTL_DEFAULT, RT_META_FIELDS, rt_meta_from_row
+from .user_cache import get_user_data_many
+
+logger = logging.getLogger(__name__)
+
+CACHE_WARMUP_ON_BOOT = bool(getattr(settings, "CACHE_WARMUP_ON_BOOT", False))
+CACHE_WARMUP_WINDOW_HOURS = float(getattr(settings, "CACHE_WARMUP_WINDOW_HOURS", 24))
+CACHE_WARMUP_MAX_SECONDS = float(getattr(settings, "CACHE_WARMUP_MAX_SECONDS", 30))
+CACHE_WARMUP_MAX_BYTES = int(getattr(settings, "CACHE_WARMUP_MAX_BYTES", 64 * 1024 * 1024))
+CACHE_WARMUP_MAX_ENTRIES = int(getattr(settings, "CACHE_WARMUP_MAX_ENTRIES", 200_000))
+CACHE_WARMUP_CHUNK_SIZE = int(getattr(settings, "CACHE_WARMUP_CHUNK_SIZE", 2000))
+# share of the cache's MAX_ENTRIES warm-up may fill, leaving room for live traffic
+CACHE_WARMUP_CACHE_FRACTION = 0.5
+
+
+def _entry_cap(max_entries: int) -> int:
+    cache_max = getattr(cache, "_max_entries", None)  # LocMemCache / FileBasedCache
+    if cache_max:
+        return min(max_entries, int(cache_max * CACHE_WARMUP_CACHE_FRACTION))
+    return max_entries
+
+
+def _iter_sessions(since, chunk_size: int) -> Iterator[dict]:
+    now = timezone.now()
+    aliases = all_shards() if is_sharded() else [None]
+    streams = []
+    for alias in aliases:
+        qs = RefreshToken.objects.filter(revoked=False, expires_at__gt=now, last_active__gte=since)
+        if alias is not None:
+            qs = qs.using(alias)
+        streams.append(qs.order_by("-last_active").values("last_active", *RT_META_FIELDS).iterator(chunk_size=chunk_size))
+    if len(streams) == 1:
+        return streams[0]
+    return heapq.merge(*streams, key=lambda row: row["last_active"], reverse=True)
+
+
+def _revoked_among(jtis) -> list:
+    """The jtis whose rows are revoked now (possibly after we read them as live)."""
+    aliases = all_shards() if is_sharded() else [None]
+    revoked = []
+    for alias in aliases:
+        qs = RefreshToken.objects.filter(jti__in=jtis, revoked=True)
+        if alias is not None:
+            qs = qs.using(alias)
+        revoked.extend(jti.hex for jti in qs.values_list("jti", flat=True))
+    return revoked
+
+
+def warm_caches(
+    max_seconds: float = CACHE_WARMUP_MAX_SECONDS,
+    max_bytes: int = CACHE_WARMUP_MAX_BYTES,
+    max_entries: int = CACHE_WARMUP_MAX_ENTRIES,
+    chunk_size: int = CACHE_WARMUP_CHUNK_SIZE,
+    window_hours: float = CACHE_WARMUP_WINDOW_HOURS,
+    warm_users: bool = True,
+    progress: Optional[Callable[[dict], None]] = None,
+) -> Dict[str, object]:
+    """Warm rt:<jti> (and user:<id>) entries within the budgets; returns the final stats."""
+    started = time.perf_counter()
+    deadline = started + max_seconds
+    entry_cap = _entry_cap(max_entries)
+    stats = {"sessions": 0, "users": 0, "skipped": 0, "revoked": 0, "bytes": 0, "chunks": 0, "stopped_by": "done"}
+
+    def report():
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        if progress is not None:
+            progress(dict(stats))
+
+    rows = _iter_sessions(timezone.now() - timedelta(hours=window_hours), chunk_size)
+    try:
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            entries = {f"{CACHE_PREFIX_RT}{r['jti'].hex}": rt_meta_from_row(r) for r in chunk}
+            present = cache.get_many(list(entries))
+            fresh = {k: v for k, v in entries.items() if k not in present}
+            stats["skipped"] += len(entries) - len(fresh)
+            if fresh:
+                cache.set_many(fresh, timeout=CACHE_TTL_DEFAULT)
+                stats["bytes"] += len(pickle.dumps(fresh, pickle.HIGHEST_PROTOCOL))
+                revoked = _revoked_among([r["jti"] for r in chunk if f"{CACHE_PREFIX_RT}{r['jti'].hex}" in fresh])
+                if revoked:
+                    cache.delete_many([f"{CACHE_PREFIX_RT}{jti}" for jti in revoked])
+                    stats["revoked"] += len(revoked)
+            stats["sessions"] += len(fresh)
+            if warm_users:
+                users = get_user_data_many(r["user_id"] for r in chunk)
+                stats["users"] += len(users)
+                stats["bytes"] += len(pickle.dumps(users, pickle.HIGHEST_PROTOCOL))
+            stats["chunks"] += 1
+            report()
+
+            if time.perf_counter() >= deadline:
+                stats["stopped_by"] = "max_seconds"
+            elif stats["bytes"] >= max_bytes:
+                stats["stopped_by"] = "max_bytes"
+            elif stats["sessions"] + stats["users"] >= entry_cap:
+                stats["stopped_by"] = "max_entries"
+            else:
+                continue
+            break
+    finally:
+        rows.close()  # release server-side cursors when stopping early
+    report()
+    return stats
+
+
+# ---------------------------
+# Boot trigger
+# ---------------------------
+_started_pid = None
+_started_lock = threading.Lock()
+
+
+def _run_in_background():
+    try:
+        stats = warm_caches()
+        logger.info("cache warm-up finished: %s", stats)
+    except Exception:
+        logger.exception("cache warm-up failed")
+    finally:
+        # this thread's connections only; request threads keep theirs
+        connections.close_all()
+
+
+def _warm_on_first_request(sender, **kwargs):
+    global _started_pid
+    if _started_pid == os.getpid():
+        return
+    with _started_lock:
+        if _started_pid == os.getpid():
+            return
+        _started_pid = os.getpid()
+    threading.Thread(target=_run_in_background, name="accounts-cache-warmup", daemon=True).start()
+
+
+def install_boot_warmup() -> None:
+    """Called from AccountsConfig.ready(): warm each worker process once, off the request path."""
+    if CACHE_WARMUP_ON_BOOT:
+        request_started.connect(_warm_on_first_request, dispatch_uid="accounts_cache_warmup")
@@ -0,0 +1,159 @@
+# backend/apps/accounts/ws.py
+"""
+Raw ASGI WebSocket endpoint pushing session events to the browser (no Channels needed).
+
+  GET ws(s)://<host>/ws/auth/events/   (authenticated by the httpOnly refresh_jti cookie, or
+                                        in opaque refresh mode by the "rh_ws" copy of the
+                                        refresh handle, scoped to this path)
+
+Server -> client messages are JSON objects from accounts.events:
+  {"type": "session_revoked", "jtis": [...], "reason": "..."}
+  {"type": "profile_changed", "fields": [...], "is_active": bool}
+  {"type": "session_rotated", "jti": "...", "replaced_by": "...", "expires_at": ts}
+
+When the socket's own session is revoked or expires the server closes with 4401;
+a deactivated user gets 4403. Clients may send "ping" and receive "pong".
+"""
+import asyncio
+import json
+import time
+from typing import Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import parse_cookie
+
+from .events import EVENT_PROFILE_CHANGED, EVENT_SESSION_REVOKED, EVENT_SESSION_ROTATED, get_broker
+from .models import RefreshToken
+from .tokens import get_cached_rt_meta, normalize_jti, parse_refresh_handle, refresh_handle_matches
+
+WS_EVENTS_PATH = getattr(settings, "ACCOUNTS_WS_EVENTS_PATH", "/ws/auth/events/")
+REFRESH_JTI_COOKIE_NAME = getattr(settings, "REFRESH_JTI_COOKIE_NAME", "refresh_jti")
+REFRESH_HANDLE_WS_COOKIE_NAME = getattr(settings, "REFRESH_HANDLE_WS_COOKIE_NAME", "rh_ws")
+# cookie-authenticated sockets must check Origin to prevent cross-site socket hijacking
+WS_ALLOWED_ORIGINS = set(getattr(settings, "ACCOUNTS_WS_ALLOWED_ORIGINS", getattr(settings, "CORS_ALLOWED_ORIGINS", [])))
+
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_FORBIDDEN = 4403
+CLOSE_NOT_FOUND = 4404
+
+
+def _headers(scope) -> dict:
+    return {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+
+
+def _resolve_session(jti: str) -> Optional[Tuple[str, float]]:
+    """Return (user_id, expires_at timestamp) for a live session, cache first then DB."""
+    meta = get_cached_rt_meta(jti)
+    if meta is None:
+        try:
+            row = RefreshToken.objects.get_by_jti(jti)
+        except RefreshToken.DoesNotExist:
+            return None
+        meta = {
+            "user_id": str(row.user_id),
+            "revoked": row.revoked,
+            "expires_at": row.expires_at.timestamp() if row.expires_at else 0,
+        }
+    if meta.get("revoked") or (meta.get("expires_at") and meta["expires_at"] < time.time()):
+        return None
+    return meta["user_id"], meta.get("expires_at") or 0
+
+
+def _session_jti(cookies: dict) -> Optional[str]:
+    """jti from the refresh_jti cookie, or from an opaque handle whose secret matches its row."""
+    jti = normalize_jti(cookies.get(REFRESH_JTI_COOKIE_NAME))
+    if jti:
+        return jti
+    parsed = parse_refresh_handle(cookies.get(REFRESH_HANDLE_WS_COOKIE_NAME))
+    if parsed is None:
+        return None
+    jti, secret = parsed
+    row = RefreshToken.objects.get_by_jti(jti) if jti else None
+    return jti if row is not None and refresh_handle_matches(row.handle_hash, secret) else None
+
+
+async def _close(send, code: int):
+    await send({"type": "websocket.close", "code": code})
+
+
+async def _send_json(send, data: dict):
+    await send({"type": "websocket.send", "text": json.dumps(data)})
+
+
+async def auth_events_app(scope, receive, send):
+    message = await receive()
+    if message["type"] != "websocket.connect":
+        return
+    if scope.get("path") != WS_EVENTS_PATH:
+        await _close(send, CLOSE_NOT_FOUND)
+        return
+
+    headers = _headers(scope)
+    origin = headers.get("origin")
+    if origin and origin not in WS_ALLOWED_ORIGINS:
+        await _close(send, CLOSE_FORBIDDEN)
+        return
+
+    try:
+        jti = await sync_to_async(_session_jti)(parse_cookie(headers.get("cookie", "")))
+    except RefreshToken.DoesNotExist:
+        jti = None
+    session = await sync_to_async(_resolve_session)(jti) if jti else None
+    if session is None:
+        await _close(send, CLOSE_UNAUTHORIZED)
+        return
+    user_id, _ = session
+
+    queue: asyncio.Queue = asyncio.Queue()
+    unsubscribe = get_broker().subscribe(user_id, asyncio.get_running_loop(), queue.put_nowait)
+    try:
+        # re-check after subscribing so a revocation between lookup and subscribe is not missed
+        session = await sync_to_async(_resolve_session)(jti)
+        if session is None:
+            await _close(send, CLOSE_UNAUTHORIZED)
+            return
+        expires_at = session[1]
+        await send({"type": "websocket.accept"})
+        await _serve(receive, send, queue, jti, expires_at)
+    finally:
+        unsubscribe()
+
+
+async def _serve(receive, send, queue: asyncio.Queue, jti: str, expires_at: float):
+    """Pump broker events to the client until disconnect, revocation or expiry."""
+    inbound = asyncio.ensure_future(receive())
+    outbound = asyncio.ensure_future(queue.get())
+    try:
+        while True:
+            timeout = max(expires_at - time.time(), 0) if expires_at else None
+            done, _ = await asyncio.wait({inbound, outbound}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                await _close(send, CLOSE_UNAUTHORIZED)
+                return
+
+            if inbound in done:
+                message = inbound.result()
+                if message["type"] == "websocket.disconnect":
+                    return
+                if message.get("text") == "ping":
+                    await send({"type": "websocket.send", "text": "pong"})
+                inbound = asyncio.ensure_future(receive())
+
+            if outbound in done:
+                event = outbound.result()
+                outbound = asyncio.ensure_future(queue.get())
+                kind = event.get("type")
+                if kind == EVENT_SESSION_ROTATED and event.get("jti") == jti:
+                    jti = event.get("replaced_by") or jti
+                    expires_at = event.get("expires_at", expires_at)
+                await _send_json(send, event)
+                if kind == EVENT_SESSION_REVOKED and jti in event.get("jtis", ()):
+                    await _close(send, CLOSE_UNAUTHORIZED)
+                    return
+                if kind == EVENT_PROFILE_CHANGED and event.get("is_active") is False:
+                    await _close(send, CLOSE_FORBIDDEN)
+                    return
+    finally:
+        inbound.cancel()
+        outbound.cancel()
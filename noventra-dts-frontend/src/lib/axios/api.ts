@@ -220,7 +220,8 @@ export async function refreshTokenRotate() {
 }
 
 export async function logoutUser() {
-  const res = await api.post("/api/auth/logout/");
+  // token/logout/ is under the opaque refresh handle's cookie path, so the session is revoked in both modes
+  const res = await api.post("/api/auth/token/logout/");
   setAccessToken(null);
   return res;
 }